@@ -1,17 +1,67 @@
 """
 Веб-интерфейс для бизнес-модели QUANTUM
 Flask приложение с API для расчетов
+
+Обработчики не изменяют общее состояние модели: параметры запроса действуют только
+в калькуляторе и входных массивах этого запроса, а кэши потокобезопасны. Поэтому
+приложение можно запускать многопоточным сервером или несколькими процессами
+(например, gunicorn -w 4 --threads 4 app:app); проверка - check_concurrency.py.
+Фоновые задания /api/jobs хранятся в процессе, который их принял: при нескольких
+процессах запросы к заданию должны попадать в тот же процесс.
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
+import numpy as np
 from business_calculator import BusinessCalculator
+from batch_calculator import BATCH_INPUTS, SUMMARY_COLUMNS, batch_inputs_from_config, stack_config_inputs, calculate_batch
+from sweep import SWEEP_CATEGORIES, run_sweep, validate_categories
+from parallel import thread_safe_context
+from result_store import open_store
+from goal_seek import goal_seek, break_even_analysis
+from sensitivity import scan_parameter, tornado
+from optimizer import optimize_deal
+from result_cache import MemoryCache, cached_financial_summary, default_cache, params_hash
+from jobs import JobQueue, JobQueueFull
 from parameters import *
 from parameters import RUB_TO_USD_RATE
+import os
 import json
+import time
+import atexit
+import shutil
+import hashlib
+import tempfile
+import itertools
 from datetime import datetime
 
 app = Flask(__name__)
 
+# Кэш ответов /api/calculate: количество записей и время жизни (секунды)
+CALCULATE_CACHE_SIZE = 256
+CALCULATE_CACHE_TTL = 300
+calculate_cache = MemoryCache(CALCULATE_CACHE_SIZE, CALCULATE_CACHE_TTL)
+
+# Наибольшее количество конфигураций в одном запросе /api/calculate/batch
+MAX_BATCH_ROWS = 200_000
+
+# Наибольшая порция строк потоковых ответов (первая порция - одна строка)
+STREAM_CHUNK_ROWS = 1024
+
+# Фоновые задания: количество потоков и наибольшее количество строк сетки в задании
+# (результат сетки хранится на диске в JOB_STORE_DIR и выдается страницами до MAX_BATCH_ROWS строк)
+JOB_WORKERS = 2
+MAX_JOB_ROWS = 5_000_000
+JOB_STORE_DIR = os.environ.get('QUANTUM_JOB_DIR') or os.path.join(tempfile.gettempdir(), 'quantum_jobs')
+
+# Конфигурация по умолчанию (как у BusinessCalculator)
+DEFAULT_CONFIG = {
+    'scenario': 'baseline',
+    'variant': 'B',
+    'equipment_type': 'mini',
+    'assembly_option': 'shiwa_assembled',
+    'assembly_variant': '80_20',
+}
+
 @app.route('/')
 def index():
     """Главная страница"""
@@ -57,72 +107,304 @@ def get_scenarios():
         'variants': variants
     })
 
+def stream_chunks(total):
+    """Отрезки [start, stop) длиной 1, 2, 4, ... до STREAM_CHUNK_ROWS, покрывающие [0, total)"""
+    start, size = 0, 1
+    while start < total:
+        yield start, min(start + size, total)
+        start += size
+        size = min(size * 2, STREAM_CHUNK_ROWS)
+
+def _json_value(value):
+    """NaN и бесконечности - null (как в ответах остальных методов API)"""
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_value(item) for item in value]
+    return value
+
+def _format_event(kind, payload, stream_format):
+    """Событие в формате потока: строка NDJSON {"type", "data"} или блок SSE"""
+    event = payload if stream_format == 'sse' else {'type': kind, 'data': payload}
+    try:
+        data = json.dumps(event, ensure_ascii=False, allow_nan=False)
+    except ValueError:
+        data = json.dumps(_json_value(event), ensure_ascii=False)
+    if stream_format == 'sse':
+        return f"event: {kind}\ndata: {data}\n\n"
+    return data + "\n"
+
+def streaming_response(events):
+    """
+    Потоковый ответ из событий (вид, данные): NDJSON или Server-Sent Events
+
+    Формат выбирается параметром ?format=ndjson|sse или заголовком Accept: text/event-stream.
+    Каждое событие отправляется сразу; в конце - событие done (количество строк и время),
+    при ошибке во время расчета - событие error. Ошибка до первого события
+    возвращается обычным ответом 400.
+    """
+    stream_format = request.args.get('format')
+    if stream_format is None:
+        stream_format = 'sse' if request.accept_mimetypes.best == 'text/event-stream' else 'ndjson'
+    if stream_format not in ('ndjson', 'sse'):
+        return jsonify({'success': False, 'error': f"Неизвестный формат потока: {stream_format}"}), 400
+    
+    start = time.perf_counter()
+    try:
+        first = next(events, None)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    def generate():
+        rows = 0
+        # Строки отправляются вместе со следующим событием progress (и первая строка - сразу)
+        pending = []
+        try:
+            for kind, payload in itertools.chain([first] if first else [], events):
+                rows += kind == 'row'
+                pending.append(_format_event(kind, payload, stream_format))
+                if kind != 'row' or rows == 1:
+                    yield ''.join(pending)
+                    pending = []
+        except Exception as e:
+            pending.append(_format_event('error', {'error': str(e)}, stream_format))
+            yield ''.join(pending)
+            return
+        pending.append(_format_event('done', {'rows': rows, 'elapsed_ms': (time.perf_counter() - start) * 1000},
+                                     stream_format))
+        yield ''.join(pending)
+    
+    mimetype = 'text/event-stream' if stream_format == 'sse' else 'application/x-ndjson'
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def calculate_result(data):
+    """Ответ /api/calculate для параметров запроса data (без времени ответа - оно добавляется при отправке)"""
+    # Получаем параметры из запроса
+    scenario = data.get('scenario', 'baseline')
+    variant = data.get('variant', 'B')
+    
+    # Получаем параметры оборудования
+    equipment_type = data.get('equipment_type', 'mini')
+    assembly_option = data.get('assembly_option', 'shiwa_assembled')
+    assembly_variant = data.get('assembly_variant', '80_20')
+    
+    # Пользовательские параметры сценария (не изменяют общие таблицы)
+    overrides = {}
+    if 'hotels_count' in data:
+        overrides['hotels_count'] = int(data['hotels_count'])
+    if 'monthly_fee' in data:
+        overrides['monthly_fee'] = float(data['monthly_fee'])
+    
+    # Параметры оборудования - входные величины модели (как в InteractiveAnalyzer):
+    # курс действует на все цены и затраты, себестоимость задается в долларах по этому курсу
+    rate = float(data.get('exchange_rate', RUB_TO_USD_RATE))
+    if 'exchange_rate' in data:
+        overrides['rub_to_usd_rate'] = rate
+    if 'equipment_cost' in data:
+        overrides['equipment_cost_rub'] = float(data['equipment_cost']) * rate
+    
+    # Калькулятор создается на каждый запрос: все изменения параметров остаются в нем,
+    # общие таблицы parameters.py не изменяются (запросы разных потоков не влияют друг на друга)
+    calc = BusinessCalculator(scenario, variant, equipment_type, assembly_option, assembly_variant, overrides=overrides)
+    
+    # Рассчитываем результаты
+    summary, payback = cached_financial_summary(calc)
+    
+    # Формируем ответ
+    result = {
+        'success': True,
+        'data': {
+            'summary': summary,
+            'payback': payback,
+            'equipment_prices': calc.equipment_prices,
+            'costs': calc.total_costs
+        }
+    }
+    return result
+
 @app.route('/api/calculate', methods=['POST'])
 def calculate():
-    """Рассчитать бизнес-модель с заданными параметрами"""
+    """
+    Рассчитать бизнес-модель с заданными параметрами
+
+    Ответы кэшируются по каноническому телу запроса и сбрасываются при изменении
+    таблиц параметров; ETag позволяет клиенту получить 304 для неизменного ответа.
+    Время ответа (timestamp) не входит в кэш и ETag и задается для каждого ответа.
+    """
     try:
         data = request.get_json()
+        version = parameter_tables_fingerprint()
+        key = params_hash('api_calculate', data, version)
+        cached = calculate_cache.get(key, version)
+        cache_status = 'HIT' if cached is not None else 'MISS'
+        if cached is None:
+            result = calculate_result(data)
+            body = jsonify(result).get_data()
+            cached = calculate_cache.put(key, (result, hashlib.sha256(body).hexdigest()[:32]), version)
+        result, etag = cached
         
-        # Получаем параметры из запроса
-        scenario = data.get('scenario', 'baseline')
-        variant = data.get('variant', 'B')
-        
-        # Получаем параметры оборудования
-        equipment_type = data.get('equipment_type', 'mini')
-        assembly_option = data.get('assembly_option', 'shiwa_assembled')
-        assembly_variant = data.get('assembly_variant', '80_20')
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            # Кэшированный результат общий для потоков: время добавляется в копию
+            response = jsonify(dict(result, data=dict(result['data'], timestamp=datetime.now().isoformat())))
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Cache'] = cache_status
+        return response
         
-        # Создаем калькулятор
-        calc = BusinessCalculator(scenario, variant, equipment_type, assembly_option, assembly_variant)
-        
-        # Применяем пользовательские параметры если есть
-        if 'hotels_count' in data:
-            calc.scenario_params['hotels_count'] = int(data['hotels_count'])
-        if 'monthly_fee' in data:
-            calc.scenario_params['monthly_fee'] = float(data['monthly_fee'])
-        if 'equipment_cost' in data:
-            # Обновляем базовую стоимость оборудования
-            new_cost_usd = float(data['equipment_cost'])
-            calc.equipment_prices['base_cost_usd'] = new_cost_usd
-            calc.equipment_prices['base_cost_rub'] = new_cost_usd * RUB_TO_USD_RATE
-        if 'exchange_rate' in data:
-            rate = float(data['exchange_rate'])
-            # Пересчитываем цены с новым курсом
-            if 'base_cost_rub' in calc.equipment_prices:
-                calc.equipment_prices['base_cost_usd'] = calc.equipment_prices['base_cost_rub'] / rate
-            if 'adjusted_cost_rub' in calc.equipment_prices:
-                calc.equipment_prices['adjusted_cost_usd'] = calc.equipment_prices['adjusted_cost_rub'] / rate
-            if 'selling_price_rub' in calc.equipment_prices:
-                calc.equipment_prices['selling_price_usd'] = calc.equipment_prices['selling_price_rub'] / rate
-            if 'hotel_price_rub' in calc.equipment_prices:
-                calc.equipment_prices['hotel_price_usd'] = calc.equipment_prices['hotel_price_rub'] / rate
-        if 'equipment_type' in data:
-            calc.equipment_type = data['equipment_type']
-            calc.equipment_prices = calculate_equipment_prices(data['equipment_type'], calc.assembly_option)
-        if 'assembly_option' in data:
-            calc.assembly_option = data['assembly_option']
-            calc.equipment_prices = calculate_equipment_prices(calc.equipment_type, data['assembly_option'])
-        if 'assembly_variant' in data:
-            calc.assembly_variant = data['assembly_variant']
-            calc.local_assembly_params = get_local_assembly_variant(data['assembly_variant'])
-        
-        # Рассчитываем результаты
-        summary = calc.generate_financial_summary()
-        payback = calc.calculate_payback_period()
-        
-        # Формируем ответ
-        result = {
-            'success': True,
-            'data': {
-                'summary': summary,
-                'payback': payback,
-                'equipment_prices': calc.equipment_prices,
-                'costs': calc.total_costs,
-                'timestamp': datetime.now().isoformat()
-            }
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    """Счетчики кэша ответов /api/calculate и кэша результатов на диске"""
+    results_cache = default_cache()
+    return jsonify({
+        'success': True,
+        'data': {
+            'calculate': calculate_cache.stats(),
+            'results': results_cache.stats() if results_cache is not None else None
         }
-        
-        return jsonify(result)
+    })
+
+def _json_column(values):
+    """Колонка результатов для JSON: NaN и бесконечности передаются как null"""
+    values = np.asarray(values, dtype=float).ravel()
+    finite = np.isfinite(values)
+    if finite.all():
+        return values.tolist()
+    return np.where(finite, values, None).tolist()
+
+def _grid_axis(name, spec):
+    """Значения оси сетки: список или {'start', 'stop', 'num'} (равномерная сетка)"""
+    if isinstance(spec, dict):
+        values = np.linspace(float(spec['start']), float(spec['stop']), int(spec.get('num', 2)))
+    else:
+        values = np.asarray(spec)
+    if values.ndim != 1 or len(values) == 0:
+        raise ValueError(f"Ось {name} должна быть непустым списком")
+    return values
+
+def batch_result(data, max_rows=MAX_BATCH_ROWS, workers=1, progress=None, store=None, mp_context=None):
+    """
+    Расчет /api/calculate/batch: список конфигураций или сетка за один проход
+
+    Args:
+        data: тело запроса (configs или grid, base, columns)
+        max_rows: наибольшее количество конфигураций
+        workers: количество процессов для сетки (None - все ядра)
+        progress: функция progress(готово строк, всего строк) (см. run_sweep)
+        store: каталог хранилища (result_store), в который записывается результат сетки
+        mp_context: контекст multiprocessing для пула процессов (см. run_sweep)
+
+    Returns:
+        dict: 'rows', 'columns' (показатель -> список значений по строкам)
+              и для сетки 'dimensions' (ось -> значения; строки идут в C-порядке осей);
+              с store для сетки - 'rows', 'columns' (имена показателей), 'grid' (оси запроса)
+              и 'store', а значения читаются через batch_page
+    """
+    columns = tuple(data.get('columns') or SUMMARY_COLUMNS)
+    unknown = set(columns) - set(SUMMARY_COLUMNS)
+    if unknown:
+        raise ValueError(f"Неизвестные показатели: {sorted(unknown)}")
+
+    if 'configs' in data:
+        configs = data['configs']
+        if not isinstance(configs, list) or not configs:
+            raise ValueError("configs должен быть непустым списком конфигураций")
+        if len(configs) > max_rows:
+            raise ValueError(f"Не более {max_rows} конфигураций в одном запросе")
+        results = calculate_batch(stack_config_inputs(configs))
+        if progress is not None:
+            progress(len(configs), len(configs))
+        return {'rows': len(configs), 'columns': {name: _json_column(results[name]) for name in columns}}
+
+    if 'grid' not in data:
+        raise ValueError("Нужен список configs или сетка grid")
+    base = dict(data.get('base') or {})
+    grid = {name: _grid_axis(name, spec) for name, spec in data['grid'].items()}
+    unknown = (set(grid) | set(base)) - set(SWEEP_CATEGORIES) - set(BATCH_INPUTS)
+    if unknown:
+        raise ValueError(f"Неизвестные параметры: {sorted(unknown)}")
+    rows = int(np.prod([len(values) for values in grid.values()]))
+    if rows > max_rows:
+        raise ValueError(f"Не более {max_rows} конфигураций в одном запросе")
+
+    # Неизменяемые параметры - оси из одного значения
+    categories = {name: [str(value) for value in grid[name]] if name in grid else [base.get(name, default)]
+                  for name, default in DEFAULT_CONFIG.items()}
+    validate_categories(categories)
+    grids = {name: grid[name] if name in grid else np.array([base[name]])
+             for name in BATCH_INPUTS if name in grid or name in base}
+    result = run_sweep(grids, categories, columns, workers=workers, chunk_size=MAX_BATCH_ROWS, store=store,
+                       progress=progress, mp_context=mp_context)
+    if store is not None:
+        return {'rows': rows, 'columns': list(columns), 'grid': list(grid), 'store': store}
+
+    # Оси куба переставляются в порядок сетки запроса
+    axes = list(result['dimensions'])
+    order = [axes.index(name) for name in grid] + [axis for axis, name in enumerate(axes) if name not in grid]
+    return {
+        'rows': rows,
+        'dimensions': {name: values.tolist() for name, values in grid.items()},
+        'columns': {name: _json_column(np.transpose(result['columns'][name], order)) for name in columns}
+    }
+
+def batch_page(result, start=0, limit=MAX_BATCH_ROWS):
+    """
+    Страница результата сетки из хранилища batch_result(store=...)
+
+    Строки нумеруются так же, как в ответе /api/calculate/batch (C-порядок осей запроса).
+
+    Returns:
+        dict: 'rows' (всего строк), 'start', 'stop', 'dimensions' и 'columns' для строк [start, stop)
+    """
+    store = open_store(result['store'])
+    dimensions = store.attributes['dimensions']
+    shape = tuple(store.attributes['shape'])
+    axes, grid = list(dimensions), result['grid']
+    order = [axes.index(name) for name in grid] + [axis for axis, name in enumerate(axes) if name not in grid]
+    start = min(start, len(store))
+    stop = min(start + limit, len(store))
+
+    # Номера строк страницы в хранилище, где оси идут в порядке run_sweep
+    index = np.unravel_index(np.arange(start, stop), tuple(shape[axis] for axis in order))
+    rows = np.ravel_multi_index(tuple(index[order.index(axis)] for axis in range(len(shape))), shape)
+    return {
+        'rows': len(store),
+        'start': start,
+        'stop': stop,
+        'dimensions': {name: dimensions[name] for name in grid},
+        'columns': {name: _json_column(store[name][rows]) for name in result['columns']}
+    }
+
+@app.route('/api/calculate/batch', methods=['POST'])
+def calculate_batch_endpoint():
+    """
+    Рассчитать много конфигураций одним запросом (ответ - колонки значений)
+
+    Тело запроса: {"configs": [{"scenario": ..., "hotels_count": ...}, ...]}
+    или {"grid": {"hotels_count": {"start": 10, "stop": 100, "num": 10}, "variant": ["A", "B"]},
+         "base": {"scenario": "optimistic"}}; необязательно "columns": [показатели].
+    """
+    try:
+        data = request.get_json() or {}
+        start = datetime.now()
+        result = batch_result(data)
+        result['elapsed_ms'] = (datetime.now() - start).total_seconds() * 1000
+        return jsonify({
+            'success': True,
+            'data': result
+        })
         
     except Exception as e:
         return jsonify({
@@ -130,6 +412,23 @@ def calculate():
             'error': str(e)
         }), 400
 
+def compare_row(scenario_data):
+    """Строка сравнения сценариев"""
+    calc = BusinessCalculator(
+        scenario_data.get('scenario', 'baseline'),
+        scenario_data.get('variant', 'B')
+    )
+    
+    summary = calc.generate_financial_summary()
+    payback = calc.calculate_payback_period()
+    
+    return {
+        'scenario': summary['scenario'],
+        'variant': summary['variant'],
+        'summary': summary,
+        'payback': payback
+    }
+
 @app.route('/api/compare', methods=['POST'])
 def compare_scenarios():
     """Сравнить несколько сценариев"""
@@ -137,23 +436,7 @@ def compare_scenarios():
         data = request.get_json()
         scenarios_to_compare = data.get('scenarios', [])
         
-        results = []
-        
-        for scenario_data in scenarios_to_compare:
-            calc = BusinessCalculator(
-                scenario_data.get('scenario', 'baseline'),
-                scenario_data.get('variant', 'B')
-            )
-            
-            summary = calc.generate_financial_summary()
-            payback = calc.calculate_payback_period()
-            
-            results.append({
-                'scenario': summary['scenario'],
-                'variant': summary['variant'],
-                'summary': summary,
-                'payback': payback
-            })
+        results = [compare_row(scenario_data) for scenario_data in scenarios_to_compare]
         
         return jsonify({
             'success': True,
@@ -166,6 +449,31 @@ def compare_scenarios():
             'error': str(e)
         }), 400
 
+@app.route('/api/compare/stream', methods=['POST'])
+def compare_scenarios_stream():
+    """Сравнение сценариев потоком: строка по каждому сценарию сразу после расчета"""
+    def events(scenarios_to_compare):
+        total = len(scenarios_to_compare)
+        for index, scenario_data in enumerate(scenarios_to_compare, start=1):
+            yield 'row', compare_row(scenario_data)
+            yield 'progress', {'done': index, 'total': total}
+    
+    data = request.get_json() or {}
+    return streaming_response(events(data.get('scenarios', [])))
+
+def sensitivity_rows(parameter, values, inputs):
+    """Строки анализа чувствительности (значения рассчитываются одним пакетом)"""
+    # Количество отелей - целое, как в калькуляторе (10.6 рассчитывается как 10 отелей)
+    computed = [int(value) for value in values] if parameter == 'hotels_count' else values
+    columns = scan_parameter(parameter, computed, inputs)
+    return [{
+        'value': value,
+        'shiwa_profit': float(columns['shiwa_net_profit'][index]),
+        'shiwa_roi': float(columns['shiwa_roi'][index]),
+        'etecsa_profit': float(columns['etecsa_net_profit'][index]),
+        'total_revenue': float(columns['shiwa_total_revenue'][index])
+    } for index, value in enumerate(values)]
+
 @app.route('/api/sensitivity', methods=['POST'])
 def sensitivity_analysis():
     """Анализ чувствительности"""
@@ -177,28 +485,8 @@ def sensitivity_analysis():
         base_scenario = data.get('scenario', 'baseline')
         base_variant = data.get('variant', 'B')
         
-        results = []
-        
-        for value in values:
-            calc = BusinessCalculator(base_scenario, base_variant)
-            
-            # Применяем изменение параметра
-            if parameter == 'hotels_count':
-                calc.scenario_params['hotels_count'] = int(value)
-            elif parameter == 'monthly_fee':
-                calc.scenario_params['monthly_fee'] = float(value)
-            elif parameter == 'equipment_cost':
-                calc.equipment_prices['cost_price_usd'] = float(value)
-            
-            summary = calc.generate_financial_summary()
-            
-            results.append({
-                'value': value,
-                'shiwa_profit': summary['shiwa']['net_profit'],
-                'shiwa_roi': summary['shiwa']['roi'],
-                'etecsa_profit': summary['etecsa']['net_profit'],
-                'total_revenue': summary['shiwa']['total_revenue']
-            })
+        # Все значения параметра рассчитываются одним пакетом
+        results = sensitivity_rows(parameter, values, batch_inputs_from_config(base_scenario, base_variant))
         
         return jsonify({
             'success': True,
@@ -214,34 +502,151 @@ def sensitivity_analysis():
             'error': str(e)
         }), 400
 
+@app.route('/api/sensitivity/stream', methods=['POST'])
+def sensitivity_analysis_stream():
+    """
+    Анализ чувствительности потоком
+
+    Значения рассчитываются порциями растущей длины (1, 2, 4, ... до STREAM_CHUNK_ROWS),
+    поэтому первая строка приходит сразу, а большие диапазоны считаются пакетами.
+    """
+    def events(parameter, values, inputs):
+        for start, stop in stream_chunks(len(values)):
+            for row in sensitivity_rows(parameter, values[start:stop], inputs):
+                yield 'row', row
+            yield 'progress', {'done': stop, 'total': len(values)}
+    
+    data = request.get_json() or {}
+    inputs = batch_inputs_from_config(data.get('scenario', 'baseline'), data.get('variant', 'B'))
+    return streaming_response(events(data.get('parameter'), data.get('values', []), inputs))
+
+@app.route('/api/tornado', methods=['POST'])
+def tornado_analysis():
+    """Диаграмма «торнадо» и эластичности показателя по всем параметрам"""
+    try:
+        data = request.get_json() or {}
+        
+        inputs = batch_inputs_from_config(
+            data.get('scenario', 'baseline'),
+            data.get('variant', 'B'),
+            data.get('equipment_type', 'mini'),
+            data.get('assembly_option', 'shiwa_assembled'),
+            data.get('assembly_variant', '80_20')
+        )
+        result = tornado(
+            data.get('output', 'shiwa_net_profit'),
+            inputs,
+            data.get('ranges'),
+            float(data.get('relative_change', 0.1))
+        )
+        
+        # NaN (например, эластичность при нулевом показателе) передается как null
+        for row in result['rows']:
+            for key, value in row.items():
+                if isinstance(value, float) and np.isnan(value):
+                    row[key] = None
+        
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/optimize', methods=['POST'])
+def optimize_deal_parameters():
+    """Подбор условий сделки: плата, доля SHIWA, оборудование и вариант сборки"""
+    try:
+        data = request.get_json() or {}
+        
+        # Ограничения: {показатель: [минимум, максимум]}, null - нет границы
+        constraints = {output: tuple(limits) for output, limits in data.get('constraints', {}).items()}
+        result = optimize_deal(
+            data.get('objective', 'shiwa_roi'),
+            constraints,
+            data.get('scenario', 'baseline'),
+            data.get('variant', 'B'),
+            maximize=data.get('maximize', True),
+            seed=data.get('seed')
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 @app.route('/api/breakeven')
 def breakeven_analysis():
     """Анализ точки безубыточности"""
     try:
-        # Для SHIWA NETWORK
-        calc = BusinessCalculator('baseline', 'B')
-        monthly_costs = calc.total_costs['total_costs_usd'] / 12
-        monthly_revenue_per_hotel = 500 * 0.8  # 80% от абонентской платы
-        shiwa_breakeven = monthly_costs / monthly_revenue_per_hotel
+        analysis = break_even_analysis(
+            scenario=request.args.get('scenario', 'baseline'),
+            variant=request.args.get('variant', 'B'),
+            equipment_type=request.args.get('equipment_type', 'mini'),
+            assembly_option=request.args.get('assembly_option', 'shiwa_assembled'),
+            assembly_variant=request.args.get('assembly_variant', '80_20')
+        )
         
-        # Для ETECSA
-        etecsas_monthly_costs = ETECSA_OPERATIONAL_COSTS_USD / 12
-        etecsas_monthly_revenue_per_hotel = 500 * 0.2  # 20% от абонентской платы
-        etecsas_breakeven = etecsas_monthly_costs / etecsas_monthly_revenue_per_hotel
+        # Недостижимая безубыточность передается как null
+        for party_data in analysis.values():
+            if np.isnan(party_data['breakeven_hotels']):
+                party_data['breakeven_hotels'] = None
+        
+        return jsonify({
+            'success': True,
+            'data': analysis
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/goal-seek', methods=['POST'])
+def goal_seek_analysis():
+    """Подбор значения параметра, при котором показатель достигает цели"""
+    try:
+        data = request.get_json()
+        
+        inputs = batch_inputs_from_config(
+            data.get('scenario', 'baseline'),
+            data.get('variant', 'B'),
+            data.get('equipment_type', 'mini'),
+            data.get('assembly_option', 'shiwa_assembled'),
+            data.get('assembly_variant', '80_20'),
+            **data.get('overrides', {})
+        )
+        
+        # target может быть числом или списком целей (решаются одним вызовом)
+        result = goal_seek(
+            data['output'],
+            np.asarray(data['target'], dtype=float),
+            data['variable'],
+            float(data['low']),
+            float(data['high']),
+            inputs=inputs
+        )
+        values = [None if np.isnan(value) else float(value) for value in np.atleast_1d(result['value'])]
         
         return jsonify({
             'success': True,
             'data': {
-                'shiwa': {
-                    'monthly_costs': monthly_costs,
-                    'monthly_revenue_per_hotel': monthly_revenue_per_hotel,
-                    'breakeven_hotels': shiwa_breakeven
-                },
-                'etecsa': {
-                    'monthly_costs': etecsas_monthly_costs,
-                    'monthly_revenue_per_hotel': etecsas_monthly_revenue_per_hotel,
-                    'breakeven_hotels': etecsas_breakeven
-                }
+                'output': data['output'],
+                'variable': data['variable'],
+                'target': data['target'],
+                'value': values if isinstance(data['target'], list) else values[0],
+                'method': result['method']
             }
         })
         
@@ -328,5 +733,209 @@ def get_analytics():
             'timestamp': datetime.now().isoformat()
         }), 400
 
+def _batch_job(params, progress):
+    """
+    Задание batch: конфигурации (до MAX_BATCH_ROWS) или сетка до MAX_JOB_ROWS строк на всех ядрах
+
+    Результат сетки записывается в хранилище в JOB_STORE_DIR, а в памяти остаются только
+    сведения о нем. Пул процессов создается из потока задания, поэтому процессы
+    запускаются через forkserver/spawn (thread_safe_context), а не fork.
+    """
+    start = datetime.now()
+    if 'configs' in params:
+        result = batch_result(params, progress=progress)
+    else:
+        os.makedirs(JOB_STORE_DIR, exist_ok=True)
+        store = tempfile.mkdtemp(prefix='job-', dir=JOB_STORE_DIR)
+        try:
+            result = batch_result(params, MAX_JOB_ROWS, workers=None, progress=progress, store=store,
+                                  mp_context=thread_safe_context())
+        except BaseException:
+            shutil.rmtree(store, ignore_errors=True)
+            raise
+    result['elapsed_ms'] = (datetime.now() - start).total_seconds() * 1000
+    return result
+
+def _discard_job_result(result):
+    """Удалить хранилище результата задания batch"""
+    if isinstance(result, dict) and 'store' in result:
+        shutil.rmtree(result['store'], ignore_errors=True)
+
+def _sensitivity_job(params, progress):
+    """Задание sensitivity: анализ чувствительности порциями с отчетом о ходе"""
+    parameter = params.get('parameter')
+    values = params.get('values', [])
+    inputs = batch_inputs_from_config(params.get('scenario', 'baseline'), params.get('variant', 'B'))
+    results = []
+    for start, stop in stream_chunks(len(values)):
+        results.extend(sensitivity_rows(parameter, values[start:stop], inputs))
+        progress(stop, len(values))
+    return {'parameter': parameter, 'results': results}
+
+def _compare_job(params, progress):
+    """Задание compare: сравнение сценариев"""
+    scenarios_to_compare = params.get('scenarios', [])
+    results = []
+    for index, scenario_data in enumerate(scenarios_to_compare, start=1):
+        results.append(compare_row(scenario_data))
+        progress(index, len(scenarios_to_compare))
+    return results
+
+def _optimize_job(params, progress):
+    """Задание optimize: подбор условий сделки (ход - по итерациям)"""
+    constraints = {output: tuple(limits) for output, limits in params.get('constraints', {}).items()}
+    return optimize_deal(
+        params.get('objective', 'shiwa_roi'),
+        constraints,
+        params.get('scenario', 'baseline'),
+        params.get('variant', 'B'),
+        maximize=params.get('maximize', True),
+        population=int(params.get('population', 2000)),
+        iterations=int(params.get('iterations', 25)),
+        seed=params.get('seed'),
+        progress=progress
+    )
+
+# Виды фоновых заданий: функция(параметры, progress)
+JOB_KINDS = {
+    'batch': _batch_job,
+    'sensitivity': _sensitivity_job,
+    'compare': _compare_job,
+    'optimize': _optimize_job,
+}
+
+job_queue = JobQueue(JOB_WORKERS, on_discard=_discard_job_result)
+atexit.register(job_queue.shutdown)
+
+def _job_not_found(job_id):
+    return jsonify({
+        'success': False,
+        'error': f"Задание не найдено: {job_id}"
+    }), 404
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    Поставить долгий расчет в очередь фоновых заданий
+
+    Тело запроса: {"kind": "batch" | "sensitivity" | "compare" | "optimize", "params": {...}}
+    (params - тело соответствующего метода API). Ответ 202 с состоянием задания;
+    ход выполнения - GET /api/jobs/<id>, результат - GET /api/jobs/<id>/result,
+    отмена - DELETE /api/jobs/<id>.
+    """
+    try:
+        data = request.get_json() or {}
+        kind = data.get('kind')
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Неизвестный вид задания: {kind} (допустимы {', '.join(JOB_KINDS)})")
+        params = data.get('params') or {}
+        if not isinstance(params, dict):
+            raise ValueError("params должен быть объектом")
+        job = job_queue.submit(kind, JOB_KINDS[kind], params)
+    except JobQueueFull as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    response = jsonify({
+        'success': True,
+        'data': job.info()
+    })
+    response.status_code = 202
+    response.headers['Location'] = f'/api/jobs/{job.id}'
+    return response
+
+@app.route('/api/jobs')
+def list_jobs():
+    """Хранимые задания (без результатов) и количество заданий по состояниям"""
+    return jsonify({
+        'success': True,
+        'data': {
+            'jobs': [job.info() for job in job_queue.list()],
+            'stats': job_queue.stats()
+        }
+    })
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Состояние и ход выполнения задания"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return _job_not_found(job_id)
+    return jsonify({
+        'success': True,
+        'data': job.info()
+    })
+
+@app.route('/api/jobs/<job_id>/result')
+def get_job_result(job_id):
+    """
+    Результат задания: 200 - готов, 202 - еще выполняется,
+    409 - задание завершилось ошибкой или отменено
+
+    Результат сетки batch выдается страницами: ?start=<первая строка>&limit=<строк>
+    (limit не более MAX_BATCH_ROWS; всего строк - поле rows).
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return _job_not_found(job_id)
+    if job.state == 'done':
+        result = job.result
+        if isinstance(result, dict) and 'store' in result:
+            try:
+                start = int(request.args.get('start', 0))
+                limit = int(request.args.get('limit', MAX_BATCH_ROWS))
+                if start < 0 or not 0 < limit <= MAX_BATCH_ROWS:
+                    raise ValueError(f"Нужны start >= 0 и 0 < limit <= {MAX_BATCH_ROWS}")
+            except ValueError as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 400
+            try:
+                result = dict(batch_page(result, start, limit), elapsed_ms=result['elapsed_ms'])
+            except FileNotFoundError:
+                # Результат удален из очереди между запросом задания и чтением
+                return _job_not_found(job_id)
+        return jsonify({
+            'success': True,
+            'data': result,
+            'job': job.info()
+        })
+    if job.finished_state:
+        return jsonify({
+            'success': False,
+            'error': job.error or f"Задание {job.state}",
+            'job': job.info()
+        }), 409
+    return jsonify({
+        'success': True,
+        'data': None,
+        'job': job.info()
+    }), 202
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Отменить задание (выполняемое задание останавливается при следующем отчете о ходе)"""
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return _job_not_found(job_id)
+    if job.state in ('done', 'failed'):
+        return jsonify({
+            'success': False,
+            'error': f"Задание уже завершено: {job.state}",
+            'job': job.info()
+        }), 409
+    return jsonify({
+        'success': True,
+        'data': job.info()
+    })
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
@@ -0,0 +1,157 @@
+"""
+Векторизованный расчет бизнес-модели проекта QUANTUM
+Один вызов рассчитывает все показатели сводки для массивов входных параметров
+"""
+
+import numpy as np
+from parameters import *
+from model_graph import FINANCIAL_MODEL
+
+# Входные параметры пакетного расчета (все могут быть массивами NumPy)
+BATCH_INPUTS = (
+    'hotels_count',                 # Количество отелей
+    'monthly_fee',                  # Абонентская плата отеля (USD/месяц)
+    'success_rate',                 # % успешного внедрения
+    'cost_factor',                  # Множитель затрат (additional_costs пессимистичного сценария)
+    'is_sale',                      # True - вариант А (продажа + подписка), False - вариант Б (аренда)
+    'shiwa_subscription',           # Подписка SHIWA в варианте А (USD/месяц)
+    'etecsa_subscription',          # Абонентская плата ETECSA в варианте А (USD/месяц)
+    'etecsa_markup_percent',        # Наценка ETECSA при продаже отелям (%)
+    'rub_to_usd_rate',              # Курс рубль/доллар
+    'equipment_cost_rub',           # Себестоимость оборудования (рубли)
+    'cost_multiplier',              # Множитель себестоимости варианта сборки
+    'intellectual_value_rub',       # Интеллектуальная стоимость (рубли)
+    'shiwa_margin',                 # Маржа SHIWA при продаже ETECSA
+    'assembly_fee_rate',            # Комиссия ETECSA за сборку (доля)
+    'shiwa_share',                  # Доля SHIWA от абонентской платы (вариант Б)
+    'etecsa_share',                 # Доля ETECSA от абонентской платы (вариант Б)
+    'shiwa_costs_rub',              # Годовые затраты SHIWA (рубли)
+    'etecsa_fixed_costs',           # Операционные затраты ETECSA (USD в год)
+    'etecsa_assembly_support',      # Поддержка локальной сборки ETECSA (USD)
+    'hotel_annual_benefit',         # Годовая выгода отеля (USD)
+)
+
+# Выходные колонки пакетного расчета
+SUMMARY_COLUMNS = (
+    'effective_hotels',
+    'equipment_adjusted_cost_usd',
+    'equipment_selling_price_usd',
+    'shiwa_equipment_revenue',
+    'shiwa_subscription_revenue',
+    'shiwa_total_revenue',
+    'shiwa_total_costs',
+    'shiwa_net_profit',
+    'shiwa_profit_margin',
+    'shiwa_roi',
+    'shiwa_monthly_profit',
+    'payback_months',
+    'etecsa_equipment_profit',
+    'etecsa_subscription_revenue',
+    'etecsa_assembly_fee_revenue',
+    'etecsa_total_revenue',
+    'etecsa_operational_costs',
+    'etecsa_net_profit',
+    'hotels_annual_cost',
+    'hotels_total_benefit',
+    'hotels_roi',
+)
+
+def batch_inputs_from_config(scenario='baseline', variant='B', equipment_type='mini',
+                             assembly_option='shiwa_assembled', assembly_variant='80_20', **overrides):
+    """
+    Получить входные параметры пакетного расчета для конфигурации BusinessCalculator
+
+    Args:
+        scenario, variant, equipment_type, assembly_option, assembly_variant: как в BusinessCalculator
+        **overrides: замена отдельных входных параметров (имена из BATCH_INPUTS)
+
+    Returns:
+        dict: скалярные значения всех входных параметров
+    """
+    scenario_params = get_scenario_params(scenario)
+    variant_params = get_variant_params(variant)
+    eq_type = get_equipment_type_info(equipment_type)
+    assembly = get_assembly_option_info(assembly_option)
+    local_assembly = get_local_assembly_variant(assembly_variant)
+
+    # Дополнительные затраты применяются только в пессимистичном сценарии
+    cost_factor = 1.0
+    if scenario_params['name'] == PESSIMISTIC_SCENARIO['name']:
+        cost_factor = scenario_params.get('additional_costs', 1)
+
+    # Поддержка производства нужна только при сборке ETECSA
+    assembly_support = 0.0
+    if assembly_option == 'etecsa_assembly':
+        assembly_support = LOCAL_ASSEMBLY_COSTS['monthly_support_cost_usd']
+
+    inputs = {
+        'hotels_count': scenario_params['hotels_count'],
+        'monthly_fee': scenario_params['monthly_fee'],
+        'success_rate': scenario_params['success_rate'],
+        'cost_factor': cost_factor,
+        'is_sale': variant_params['name'] == VARIANT_A['name'],
+        'shiwa_subscription': VARIANT_A['monthly_subscription_shiwa'],
+        'etecsa_subscription': VARIANT_A['monthly_subscription_etecsa'],
+        'etecsa_markup_percent': VARIANT_A['etecsa_markup_percent'],
+        'rub_to_usd_rate': RUB_TO_USD_RATE,
+        'equipment_cost_rub': eq_type['cost_rub'],
+        'cost_multiplier': assembly['cost_multiplier'],
+        'intellectual_value_rub': INTELLECTUAL_VALUE_RUB,
+        'shiwa_margin': assembly['shiwa_profit_margin'],
+        'assembly_fee_rate': assembly.get('etecsa_assembly_fee', 0.0),
+        'shiwa_share': local_assembly['shiwa_share'],
+        'etecsa_share': local_assembly['etecsa_share'],
+        'shiwa_costs_rub': PROJECT_FOT_RUB + OFFICE_EXPENSES_RUB + BUSINESS_TRIPS_RUB + DELIVERY_EXPENSES_RUB,
+        'etecsa_fixed_costs': ETECSA_OPERATIONAL_COSTS_USD,
+        'etecsa_assembly_support': assembly_support,
+        'hotel_annual_benefit': HOTEL_BILLING_SAVINGS_USD + HOTEL_EFFICIENCY_SAVINGS_USD + HOTEL_DOWNTIME_SAVINGS_USD,
+    }
+
+    unknown = set(overrides) - set(BATCH_INPUTS)
+    if unknown:
+        raise ValueError(f"Неизвестные входные параметры: {sorted(unknown)}")
+    inputs.update(overrides)
+
+    return inputs
+
+def stack_config_inputs(configs):
+    """
+    Собрать входные массивы из списка конфигураций
+
+    Args:
+        configs: список словарей с ключами batch_inputs_from_config
+                 (scenario, variant, ..., а также переопределения входных параметров)
+
+    Returns:
+        dict: имя входного параметра -> массив длиной len(configs)
+    """
+    rows = [batch_inputs_from_config(**config) for config in configs]
+    return {name: np.array([row[name] for row in rows]) for name in BATCH_INPUTS}
+
+def calculate_batch(inputs=None, **arrays):
+    """
+    Рассчитать все показатели сводки для массивов входных параметров
+
+    Расчет выполняется по графу FINANCIAL_MODEL, как и в BusinessCalculator:
+    для скалярных входов результат равен generate_financial_summary()
+    и calculate_payback_period().
+
+    Args:
+        inputs: словарь входных параметров (по умолчанию базовая конфигурация)
+        **arrays: массивы или скаляры, заменяющие отдельные входные параметры
+
+    Returns:
+        dict: имя колонки из SUMMARY_COLUMNS -> массив результатов
+    """
+    values = dict(batch_inputs_from_config() if inputs is None else inputs)
+    values.update(arrays)
+
+    missing = set(BATCH_INPUTS) - set(values)
+    if missing:
+        raise ValueError(f"Не заданы входные параметры: {sorted(missing)}")
+
+    shape = np.broadcast_shapes(*(np.shape(values[name]) for name in BATCH_INPUTS))
+    results = FINANCIAL_MODEL.evaluate({name: values[name] for name in BATCH_INPUTS}, SUMMARY_COLUMNS)
+
+    # Все колонки приводим к общей форме входных массивов
+    return {name: np.broadcast_to(results[name], shape).astype(float) for name in SUMMARY_COLUMNS}
@@ -4,13 +4,19 @@
 """
 
 from parameters import *
+from parameter_set import ParameterOverrides
+from model_graph import FINANCIAL_MODEL
+from cashflow import CASH_FLOW_PARTIES, cash_flows_from_values
+from investment_metrics import investment_metrics
+from result_cache import cached_financial_summary
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 
 class BusinessCalculator:
     """Класс для расчета бизнес-модели проекта"""
     
-    def __init__(self, scenario='baseline', variant='B', equipment_type='mini', assembly_option='shiwa_assembled', assembly_variant='80_20'):
+    def __init__(self, scenario='baseline', variant='B', equipment_type='mini', assembly_option='shiwa_assembled', assembly_variant='80_20', overrides=None):
         """
         Инициализация калькулятора
         
@@ -20,179 +26,147 @@ class BusinessCalculator:
             equipment_type: тип оборудования ('mini' или '1u_2u')
             assembly_option: вариант сборки ('shiwa_assembled', 'etecsa_assembly', 'mixed_approach')
             assembly_variant: вариант распределения доходов ('80_20' или '50_50')
+            overrides: замена параметров сценария, например {'hotels_count': 75},
+                       а также входных величин модели equipment_cost_rub (себестоимость оборудования, рубли)
+                       и rub_to_usd_rate (курс рубль/доллар для цен и затрат)
         """
-        self.scenario_params = get_scenario_params(scenario)
+        self.scenario = scenario
+        self.variant = variant
+        # Общая таблица сценария не копируется: изменения остаются в этом калькуляторе
+        self.scenario_params = ParameterOverrides(get_scenario_params(scenario), overrides)
         self.variant_params = get_variant_params(variant)
         self.equipment_type = equipment_type
         self.assembly_option = assembly_option
         self.assembly_variant = assembly_variant
-        self.equipment_prices = calculate_equipment_prices(equipment_type, assembly_option)
-        self.total_costs = calculate_total_costs()
+        rate = self.scenario_params.get('rub_to_usd_rate', RUB_TO_USD_RATE)
+        self.equipment_prices = calculate_equipment_prices(equipment_type, assembly_option,
+                                                           self.scenario_params.get('equipment_cost_rub'), rate)
+        self.total_costs = calculate_total_costs(rate)
         self.local_assembly_params = get_local_assembly_variant(assembly_variant)
+        self._evaluation = None
+        self._investment = None
+    
+    def params_key(self):
+        """
+        Хешируемый ключ конфигурации калькулятора (для кэширования результатов)
         
-    def calculate_shiwa_revenue(self):
-        """Рассчитать доходы SHIWA NETWORK"""
-        hotels_count = self.scenario_params['hotels_count']
-        success_rate = self.scenario_params['success_rate'] / 100
-        effective_hotels = hotels_count * success_rate
-        
-        # Доход от продажи оборудования ETECSA
-        equipment_revenue = effective_hotels * self.equipment_prices['selling_price_usd']
-        
-        # Доход от абонентской платы
-        if self.variant_params['name'] == 'Продажа оборудования + подписка':
-            # Вариант А: продажа + подписка (реалистичная модель)
-            monthly_subscription = self.variant_params['monthly_subscription_shiwa']
-            annual_subscription = effective_hotels * monthly_subscription * 12
-            total_annual_revenue = equipment_revenue + annual_subscription
-            
-        else:
-            # Вариант Б: аренда с настраиваемым разделением
-            # Всегда используем выбранный вариант распределения
-            shiwa_share = self.local_assembly_params['shiwa_share']
-            
-            monthly_fee = self.scenario_params['monthly_fee']
-            annual_subscription = effective_hotels * monthly_fee * shiwa_share * 12
-            total_annual_revenue = annual_subscription  # При аренде нет дохода от продажи оборудования
+        Прямые изменения equipment_prices и total_costs в ключ не входят.
+        """
+        return (self.scenario_params.freeze(), self.variant_params, self.equipment_type,
+                self.assembly_option, self.assembly_variant)
         
-        return {
-            'equipment_revenue': equipment_revenue,
-            'subscription_revenue': annual_subscription,
-            'total_revenue': total_annual_revenue,
-            'effective_hotels': effective_hotels
-        }
-    
-    def calculate_etecsa_revenue(self):
-        """Рассчитать доходы ETECSA"""
-        hotels_count = self.scenario_params['hotels_count']
-        success_rate = self.scenario_params['success_rate'] / 100
-        effective_hotels = hotels_count * success_rate
+    def model_inputs(self):
+        """
+        Входные величины графа FINANCIAL_MODEL для текущего состояния калькулятора
         
-        if self.variant_params['name'] == 'Продажа оборудования + подписка':
-            # Вариант А: доход от продажи оборудования отелям + абонентская плата
-            # ETECSA продает оборудование с наценкой 50%
-            markup = self.variant_params['etecsa_markup_percent'] / 100
-            hotel_price = self.equipment_prices['selling_price_usd'] * (1 + markup)
-            equipment_profit = effective_hotels * (hotel_price - self.equipment_prices['selling_price_usd'])
-            
-            # Доход от абонентской платы ETECSA
-            monthly_etecsa_fee = self.variant_params['monthly_subscription_etecsa']
-            subscription_revenue = effective_hotels * monthly_etecsa_fee * 12
-            
-            # Комиссия за сборку оборудования (если применимо)
-            assembly_fee_revenue = effective_hotels * self.equipment_prices['assembly_fee_usd']
-            
-        else:
-            # Вариант Б: доля от абонентской платы
-            # Всегда используем выбранный вариант распределения
-            etecsas_share = self.local_assembly_params['etecsa_share']
-            
-            monthly_fee = self.scenario_params['monthly_fee']
-            subscription_revenue = effective_hotels * monthly_fee * etecsas_share * 12
-            equipment_profit = 0
-            assembly_fee_revenue = 0
+        Цены оборудования и затраты SHIWA передаются готовыми значениями
+        из equipment_prices и total_costs, поэтому их прямые изменения учитываются.
+        """
+        scenario_params = self.scenario_params
+        variant_params = self.variant_params
         
-        # Операционные затраты
-        operational_costs = ETECSA_OPERATIONAL_COSTS_USD
+        # Применяем дополнительные затраты для пессимистичного сценария
+        cost_factor = 1
+        if scenario_params['name'] == 'Пессимистичный':
+            cost_factor = scenario_params.get('additional_costs', 1)
         
         # Дополнительные затраты при локальной сборке
+        assembly_support = 0
         if self.assembly_option == 'etecsa_assembly':
-            operational_costs += LOCAL_ASSEMBLY_COSTS['monthly_support_cost_usd']
-        
-        # Применяем дополнительные затраты для пессимистичного сценария
-        if self.scenario_params['name'] == 'Пессимистичный':
-            operational_costs *= self.scenario_params.get('additional_costs', 1)
+            assembly_support = LOCAL_ASSEMBLY_COSTS['monthly_support_cost_usd']
         
-        # Общий доход ETECSA
-        total_revenue = equipment_profit + subscription_revenue + assembly_fee_revenue
+        return {
+            'hotels_count': scenario_params['hotels_count'],
+            'monthly_fee': scenario_params['monthly_fee'],
+            'success_rate': scenario_params['success_rate'],
+            'cost_factor': cost_factor,
+            'is_sale': variant_params['name'] == 'Продажа оборудования + подписка',
+            'shiwa_subscription': variant_params.get('monthly_subscription_shiwa', 0),
+            'etecsa_subscription': variant_params.get('monthly_subscription_etecsa', 0),
+            'etecsa_markup_percent': variant_params.get('etecsa_markup_percent', 0),
+            'shiwa_share': self.local_assembly_params['shiwa_share'],
+            'etecsa_share': self.local_assembly_params['etecsa_share'],
+            'etecsa_fixed_costs': ETECSA_OPERATIONAL_COSTS_USD,
+            'etecsa_assembly_support': assembly_support,
+            'hotel_annual_benefit': HOTEL_BILLING_SAVINGS_USD + HOTEL_EFFICIENCY_SAVINGS_USD + HOTEL_DOWNTIME_SAVINGS_USD,
+            'equipment_adjusted_cost_usd': self.equipment_prices['adjusted_cost_usd'],
+            'equipment_selling_price_usd': self.equipment_prices['selling_price_usd'],
+            'equipment_assembly_fee_usd': self.equipment_prices['assembly_fee_usd'],
+            'shiwa_fixed_costs_usd': self.total_costs['total_costs_usd']
+        }
+    
+    def evaluate(self):
+        """
+        Рассчитать все величины модели за один проход по графу зависимостей
         
-        # Чистая прибыль
-        net_profit = total_revenue - operational_costs
+        Результат кэшируется до изменения входных величин калькулятора.
+        """
+        inputs = self.model_inputs()
+        if self._evaluation is not None and self._evaluation[0] == inputs:
+            return self._evaluation[1]
         
+        values = FINANCIAL_MODEL.evaluate(inputs)
+        values = {name: float(value) for name, value in values.items() if name not in inputs}
+        self._evaluation = (inputs, values)
+        return values
+    
+    def calculate_shiwa_revenue(self):
+        """Рассчитать доходы SHIWA NETWORK"""
+        values = self.evaluate()
+        return {
+            'equipment_revenue': values['shiwa_equipment_revenue'],
+            'subscription_revenue': values['shiwa_subscription_revenue'],
+            'total_revenue': values['shiwa_total_revenue'],
+            'effective_hotels': values['effective_hotels']
+        }
+    
+    def calculate_etecsa_revenue(self):
+        """Рассчитать доходы ETECSA"""
+        values = self.evaluate()
         return {
-            'equipment_profit': equipment_profit,
-            'subscription_revenue': subscription_revenue,
-            'assembly_fee_revenue': assembly_fee_revenue,
-            'total_revenue': total_revenue,
-            'operational_costs': operational_costs,
-            'net_profit': net_profit,
-            'effective_hotels': effective_hotels
+            'equipment_profit': values['etecsa_equipment_profit'],
+            'subscription_revenue': values['etecsa_subscription_revenue'],
+            'assembly_fee_revenue': values['etecsa_assembly_fee_revenue'],
+            'total_revenue': values['etecsa_total_revenue'],
+            'operational_costs': values['etecsa_operational_costs'],
+            'net_profit': values['etecsa_net_profit'],
+            'effective_hotels': values['effective_hotels']
         }
     
     def calculate_hotel_benefits(self):
         """Рассчитать выгоды для отелей"""
-        hotels_count = self.scenario_params['hotels_count']
-        success_rate = self.scenario_params['success_rate'] / 100
-        effective_hotels = hotels_count * success_rate
+        values = self.evaluate()
         
-        monthly_fee = self.scenario_params['monthly_fee']
-        annual_cost = monthly_fee * 12
-        
-        # Более консервативная оценка выгод для отелей
+        # Консервативная оценка выгод для отелей
         # Основные выгоды от синхронизации времени:
         # 1. Снижение ошибок в биллинге
         # 2. Повышение эффективности персонала
         # 3. Сокращение простоя IT-систем
-        
-        # Консервативная оценка экономии (в USD в год на отель)
-        billing_savings = 1000  # Экономия от снижения ошибок в биллинге
-        efficiency_savings = 5000  # Экономия от повышения эффективности персонала
-        downtime_savings = 1200  # Экономия от сокращения простоя систем
-        
-        total_benefit = billing_savings + efficiency_savings + downtime_savings
-        
-        # ROI только если выгода превышает затраты
-        if total_benefit > annual_cost:
-            roi = (total_benefit - annual_cost) / annual_cost * 100
-        else:
-            roi = 0
-        
         return {
-            'annual_cost': annual_cost,
-            'billing_savings': billing_savings,
-            'efficiency_savings': efficiency_savings,
-            'downtime_savings': downtime_savings,
-            'total_benefit': total_benefit,
-            'roi_percent': roi,
-            'effective_hotels': effective_hotels
+            'annual_cost': values['hotels_annual_cost'],
+            'billing_savings': HOTEL_BILLING_SAVINGS_USD,
+            'efficiency_savings': HOTEL_EFFICIENCY_SAVINGS_USD,
+            'downtime_savings': HOTEL_DOWNTIME_SAVINGS_USD,
+            'total_benefit': values['hotels_total_benefit'],
+            'roi_percent': values['hotels_roi'],
+            'effective_hotels': values['effective_hotels']
         }
     
     def calculate_shiwa_profitability(self):
         """Рассчитать прибыльность SHIWA NETWORK"""
-        revenue = self.calculate_shiwa_revenue()
-        
-        # Базовые операционные затраты
-        operational_costs = self.total_costs['total_costs_usd']
-        
-        # Для модели продажи добавляем затраты на оборудование
-        equipment_costs = 0
-        if self.variant_params['name'] == 'Продажа оборудования + подписка':
-            equipment_costs = self.equipment_prices['adjusted_cost_usd'] * self.scenario_params['hotels_count']
-        
-        # Общие затраты
-        costs = operational_costs + equipment_costs
-        
-        # Применяем дополнительные затраты для пессимистичного сценария
-        if self.scenario_params['name'] == 'Пессимистичный':
-            costs *= self.scenario_params.get('additional_costs', 1)
-        
-        net_profit = revenue['total_revenue'] - costs
-        profit_margin = (net_profit / revenue['total_revenue']) * 100 if revenue['total_revenue'] > 0 else 0
-        
+        values = self.evaluate()
         return {
-            'total_revenue': revenue['total_revenue'],
-            'total_costs': costs,
-            'net_profit': net_profit,
-            'profit_margin_percent': profit_margin,
-            'roi_percent': (net_profit / costs) * 100 if costs > 0 else 0
+            'total_revenue': values['shiwa_total_revenue'],
+            'total_costs': values['shiwa_total_costs'],
+            'net_profit': values['shiwa_net_profit'],
+            'profit_margin_percent': values['shiwa_profit_margin'],
+            'roi_percent': values['shiwa_roi']
         }
     
     def generate_financial_summary(self):
-        """Сгенерировать финансовую сводку"""
-        shiwa_revenue = self.calculate_shiwa_revenue()
-        etecsas_revenue = self.calculate_etecsa_revenue()
-        hotel_benefits = self.calculate_hotel_benefits()
-        shiwa_profitability = self.calculate_shiwa_profitability()
+        """Сгенерировать финансовую сводку (все величины рассчитываются один раз)"""
+        values = self.evaluate()
+        investment = self.calculate_investment_metrics()
         
         return {
             'scenario': self.scenario_params['name'],
@@ -203,51 +177,98 @@ class BusinessCalculator:
             'assembly_name': self.equipment_prices['assembly_name'],
             'assembly_variant': self.assembly_variant,
             'hotels_count': self.scenario_params['hotels_count'],
-            'effective_hotels': shiwa_revenue['effective_hotels'],
+            'effective_hotels': values['effective_hotels'],
             'shiwa': {
-                'equipment_revenue': shiwa_revenue['equipment_revenue'],
-                'subscription_revenue': shiwa_revenue['subscription_revenue'],
-                'total_revenue': shiwa_revenue['total_revenue'],
-                'total_costs': shiwa_profitability['total_costs'],
-                'net_profit': shiwa_profitability['net_profit'],
-                'profit_margin': shiwa_profitability['profit_margin_percent'],
-                'roi': shiwa_profitability['roi_percent']
+                'equipment_revenue': values['shiwa_equipment_revenue'],
+                'subscription_revenue': values['shiwa_subscription_revenue'],
+                'total_revenue': values['shiwa_total_revenue'],
+                'total_costs': values['shiwa_total_costs'],
+                'net_profit': values['shiwa_net_profit'],
+                'profit_margin': values['shiwa_profit_margin'],
+                'roi': values['shiwa_roi'],
+                **investment['shiwa']
             },
             'etecsa': {
-                'equipment_profit': etecsas_revenue['equipment_profit'],
-                'subscription_revenue': etecsas_revenue['subscription_revenue'],
-                'operational_costs': etecsas_revenue['operational_costs'],
-                'net_profit': etecsas_revenue['net_profit']
+                'equipment_profit': values['etecsa_equipment_profit'],
+                'subscription_revenue': values['etecsa_subscription_revenue'],
+                'operational_costs': values['etecsa_operational_costs'],
+                'net_profit': values['etecsa_net_profit'],
+                **investment['etecsa']
             },
             'hotels': {
-                'annual_cost': hotel_benefits['annual_cost'],
-                'billing_savings': hotel_benefits['billing_savings'],
-                'efficiency_savings': hotel_benefits['efficiency_savings'],
-                'downtime_savings': hotel_benefits['downtime_savings'],
-                'total_benefit': hotel_benefits['total_benefit'],
-                'roi': hotel_benefits['roi_percent']
+                'annual_cost': values['hotels_annual_cost'],
+                'billing_savings': HOTEL_BILLING_SAVINGS_USD,
+                'efficiency_savings': HOTEL_EFFICIENCY_SAVINGS_USD,
+                'downtime_savings': HOTEL_DOWNTIME_SAVINGS_USD,
+                'total_benefit': values['hotels_total_benefit'],
+                'roi': values['hotels_roi'],
+                **investment['hotel']
             }
         }
     
+    def calculate_investment_metrics(self, discount_rate=DISCOUNT_RATE_PERCENT):
+        """
+        NPV, IRR и дисконтированная окупаемость SHIWA, ETECSA и отеля
+        
+        Args:
+            discount_rate: ставка дисконтирования (% годовых)
+        
+        Returns:
+            dict: участник ('shiwa', 'etecsa', 'hotel') -> {'npv', 'irr', 'discounted_payback_month'};
+                  None, если IRR не существует или окупаемость не достигнута на горизонте
+        """
+        values = self.evaluate()
+        if self._investment is not None and self._investment[:2] == (values, discount_rate):
+            return self._investment[2]
+        
+        metrics = investment_metrics(self.calculate_monthly_cash_flow(), discount_rate)
+        result = {}
+        for party in CASH_FLOW_PARTIES:
+            result[party] = {}
+            for key in ('npv', 'irr', 'discounted_payback_month'):
+                value = float(metrics[f'{party}_{key}'])
+                result[party][key] = None if np.isnan(value) else value
+        self._investment = (values, discount_rate, result)
+        return result
+    
     def calculate_payback_period(self):
         """Рассчитать период окупаемости"""
-        shiwa_profitability = self.calculate_shiwa_profitability()
-        monthly_profit = shiwa_profitability['net_profit'] / 12
+        values = self.evaluate()
+        monthly_profit = values['shiwa_monthly_profit']
         
         if monthly_profit <= 0:
             return None
         
         # Время окупаемости в месяцах (на основе чистой прибыли)
-        payback_months = shiwa_profitability['total_costs'] / monthly_profit
+        payback_months = values['payback_months']
+        
+        # Точный месяц окупаемости по помесячному накопленному потоку
+        payback_month = float(self.calculate_monthly_cash_flow()['shiwa_payback_month'])
         
         return {
             'payback_months': payback_months,
             'payback_years': payback_months / 12,
-            'monthly_profit': monthly_profit
+            'monthly_profit': monthly_profit,
+            'payback_month': None if np.isnan(payback_month) else int(payback_month),
+            'meets_payback_target': payback_month <= PAYBACK_PERIOD_MONTHS
         }
+    
+    def calculate_monthly_cash_flow(self, horizon_months=CASH_FLOW_HORIZON_MONTHS, rollout_months=HOTEL_ROLLOUT_MONTHS):
+        """
+        Помесячный денежный поток SHIWA, ETECSA и отеля
+        
+        Args:
+            horizon_months: горизонт расчета (месяцы)
+            rollout_months: срок подключения всех отелей (месяцы)
+        
+        Returns:
+            dict: ряды доходов, затрат и накопленного потока (см. cashflow.cash_flows_from_values)
+        """
+        values = dict(self.model_inputs(), **self.evaluate())
+        return cash_flows_from_values(values, horizon_months, rollout_months)
 
-def compare_scenarios():
-    """Сравнить все сценарии"""
+def compare_scenarios(cache=None):
+    """Сравнить все сценарии (сводки берутся из кэша результатов, см. result_cache)"""
     scenarios = ['baseline', 'optimistic', 'pessimistic']
     variants = ['A', 'B']
     
@@ -256,7 +277,7 @@ def compare_scenarios():
     for scenario in scenarios:
         for variant in variants:
             calculator = BusinessCalculator(scenario, variant)
-            summary = calculator.generate_financial_summary()
+            summary, _ = cached_financial_summary(calculator, cache)
             results.append(summary)
     
     return results
@@ -0,0 +1,149 @@
+"""
+Помесячный денежный поток проекта QUANTUM
+Доходы, затраты и накопленный поток SHIWA, ETECSA и отеля по месяцам
+для массивов сценариев и точный месяц окупаемости
+"""
+
+import numpy as np
+from parameters import *
+from model_graph import FINANCIAL_MODEL
+from batch_calculator import BATCH_INPUTS, batch_inputs_from_config
+
+# Годовые величины графа, из которых строится помесячный поток
+CASH_FLOW_NODES = (
+    'sale_mode',
+    'cost_factor',
+    'monthly_fee',
+    'hotel_price_usd',
+    'shiwa_equipment_revenue',
+    'shiwa_subscription_revenue',
+    'shiwa_fixed_costs_usd',
+    'shiwa_equipment_costs',
+    'etecsa_equipment_profit',
+    'etecsa_assembly_fee_revenue',
+    'etecsa_subscription_revenue',
+    'etecsa_operational_costs',
+    'hotels_total_benefit',
+)
+
+# Участники и их помесячные ряды (доход, затраты, чистый и накопленный поток)
+CASH_FLOW_PARTIES = ('shiwa', 'etecsa', 'hotel')
+
+def rollout_profile(horizon_months=CASH_FLOW_HORIZON_MONTHS, rollout_months=HOTEL_ROLLOUT_MONTHS):
+    """
+    Доля подключенных отелей по месяцам при равномерном подключении
+
+    Returns:
+        tuple: (доля работающих отелей, доля подключенных в этом месяце) - массивы длиной horizon_months
+    """
+    if horizon_months < 1 or rollout_months < 1:
+        raise ValueError("Горизонт и срок подключения должны быть не меньше одного месяца")
+    months = np.arange(1, horizon_months + 1)
+    active = np.minimum(months / rollout_months, 1.0)
+    new = np.diff(active, prepend=0.0)
+    return active, new
+
+def payback_month(cumulative):
+    """
+    Месяц окупаемости по накопленному потоку (последняя ось - месяцы)
+
+    Окупаемость наступает в первом месяце, начиная с которого накопленный
+    поток больше не бывает отрицательным. NaN - не окупается на горизонте.
+    """
+    cumulative = np.asarray(cumulative)
+    horizon = cumulative.shape[-1]
+    negative = cumulative < 0
+    # Поиск последнего отрицательного месяца через argmax по развернутому ряду
+    last_negative = horizon - np.argmax(negative[..., ::-1], axis=-1)
+    month = np.where(negative.any(axis=-1), last_negative + 1, 1).astype(float)
+    return np.where(month > horizon, np.nan, month)
+
+def cash_flows_from_values(values, horizon_months=CASH_FLOW_HORIZON_MONTHS, rollout_months=HOTEL_ROLLOUT_MONTHS):
+    """
+    Помесячный поток по рассчитанным величинам графа FINANCIAL_MODEL
+
+    Годовые величины модели относятся к периоду CALCULATION_PERIOD_MONTHS.
+    Разовые доходы и затраты на оборудование приходятся на месяц подключения
+    отелей, подписка и постоянные затраты - на каждый месяц. Поток отеля
+    рассчитывается для одного отеля, подключенного в первом месяце.
+
+    Args:
+        values: словарь величин CASH_FLOW_NODES (скаляры или массивы одной формы)
+        horizon_months: горизонт расчета (месяцы)
+        rollout_months: срок подключения всех отелей (месяцы)
+
+    Returns:
+        dict: 'months', 'active_share' и для каждого участника из CASH_FLOW_PARTIES
+              ряды *_revenue (у отеля *_benefit), *_costs, *_net, *_cumulative
+              формы (..., horizon_months) и *_payback_month формы (...)
+    """
+    missing = set(CASH_FLOW_NODES) - set(values)
+    if missing:
+        raise ValueError(f"Не заданы величины модели: {sorted(missing)}")
+
+    period = CALCULATION_PERIOD_MONTHS
+    active, new = rollout_profile(horizon_months, rollout_months)
+    shape = np.broadcast_shapes(*(np.shape(values[name]) for name in CASH_FLOW_NODES))
+
+    def column(name):
+        # Величина сценария как столбец, умножаемый на помесячный профиль
+        return np.broadcast_to(np.asarray(values[name], dtype=float), shape)[..., None]
+
+    sale_mode = column('sale_mode') > 0
+    cost_factor = column('cost_factor')
+
+    # SHIWA NETWORK
+    # При аренде нет дохода от продажи оборудования
+    equipment_revenue = np.where(sale_mode, column('shiwa_equipment_revenue'), 0.0)
+    shiwa_revenue = new * equipment_revenue + active * (column('shiwa_subscription_revenue') / period)
+    shiwa_costs = (column('shiwa_fixed_costs_usd') / period + new * column('shiwa_equipment_costs')) * cost_factor
+    shiwa_costs = np.broadcast_to(shiwa_costs, shiwa_revenue.shape)
+
+    # ETECSA
+    etecsa_revenue = (new * (column('etecsa_equipment_profit') + column('etecsa_assembly_fee_revenue'))
+                      + active * (column('etecsa_subscription_revenue') / period))
+    etecsa_costs = np.broadcast_to(column('etecsa_operational_costs') / period, etecsa_revenue.shape)
+
+    # Отель: покупка оборудования в варианте А и ежемесячная плата
+    first_month = np.arange(horizon_months) == 0
+    hotel_purchase = np.where(sale_mode, column('hotel_price_usd'), 0.0)
+    hotel_costs = column('monthly_fee') + first_month * hotel_purchase
+    hotel_benefit = np.broadcast_to(column('hotels_total_benefit') / period, hotel_costs.shape)
+
+    flows = {
+        'months': np.arange(1, horizon_months + 1),
+        'active_share': active,
+    }
+    for party, income, costs in (('shiwa', shiwa_revenue, shiwa_costs),
+                                 ('etecsa', etecsa_revenue, etecsa_costs),
+                                 ('hotel', hotel_benefit, hotel_costs)):
+        net = income - costs
+        cumulative = np.cumsum(net, axis=-1)
+        flows[f'{party}_benefit' if party == 'hotel' else f'{party}_revenue'] = income
+        flows[f'{party}_costs'] = costs
+        flows[f'{party}_net'] = net
+        flows[f'{party}_cumulative'] = cumulative
+        flows[f'{party}_payback_month'] = payback_month(cumulative)
+    return flows
+
+def calculate_cash_flows(inputs=None, horizon_months=CASH_FLOW_HORIZON_MONTHS,
+                         rollout_months=HOTEL_ROLLOUT_MONTHS, **arrays):
+    """
+    Помесячный поток для массивов входных параметров (как calculate_batch)
+
+    Args:
+        inputs: словарь входных параметров (по умолчанию базовая конфигурация)
+        horizon_months: горизонт расчета (месяцы)
+        rollout_months: срок подключения всех отелей (месяцы)
+        **arrays: массивы или скаляры, заменяющие отдельные входные параметры
+
+    Returns:
+        dict: результат cash_flows_from_values
+    """
+    values = dict(batch_inputs_from_config() if inputs is None else inputs)
+    values.update(arrays)
+    missing = set(BATCH_INPUTS) - set(values)
+    if missing:
+        raise ValueError(f"Не заданы входные параметры: {sorted(missing)}")
+    values = FINANCIAL_MODEL.evaluate({name: values[name] for name in BATCH_INPUTS}, CASH_FLOW_NODES)
+    return cash_flows_from_values(values, horizon_months, rollout_months)
@@ -0,0 +1,169 @@
+"""
+Нагрузочная проверка веб-приложения: N параллельных клиентов
+Набор запросов сначала выполняется последовательно (эталон), затем тот же набор
+в перемешанном порядке отправляют N клиентов одновременно. Каждый ответ должен
+совпасть с эталоном: параметры одного запроса не должны влиять на другие.
+Проверяется приложение в процессе (Flask test_client, клиенты - потоки)
+или запущенный сервер по адресу (многопоточный или с несколькими процессами).
+"""
+
+import sys
+import json
+import time
+import random
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Поля ответа, которые различаются между одинаковыми запросами
+VOLATILE_FIELDS = ('timestamp', 'elapsed_ms')
+
+def stress_requests(count, seed=None):
+    """
+    Набор запросов (метод, путь, тело) со случайными пользовательскими параметрами
+
+    Запросы /api/calculate получают уникальное поле _request, чтобы не попадать
+    в кэш ответов и действительно рассчитываться под нагрузкой.
+    """
+    rng = random.Random(seed)
+    scenarios = ('baseline', 'optimistic', 'pessimistic')
+    result = []
+    for index in range(count):
+        kind = rng.choice(('calculate', 'calculate', 'calculate', 'sensitivity', 'batch', 'breakeven'))
+        scenario, variant = rng.choice(scenarios), rng.choice(('A', 'B'))
+        if kind == 'calculate':
+            body = {'scenario': scenario, 'variant': variant, '_request': index,
+                    'equipment_type': rng.choice(('mini', '1u_2u')),
+                    'assembly_option': rng.choice(('shiwa_assembled', 'etecsa_assembly', 'mixed_approach')),
+                    'assembly_variant': rng.choice(('80_20', '50_50'))}
+            if rng.random() < 0.7:
+                body['hotels_count'] = rng.randint(1, 500)
+            if rng.random() < 0.7:
+                body['monthly_fee'] = rng.choice((250, 400, 500, 750, 1000))
+            if rng.random() < 0.3:
+                body['equipment_cost'] = rng.choice((150, 300, 450))
+            if rng.random() < 0.3:
+                body['exchange_rate'] = rng.choice((70, 78, 90))
+            result.append(('POST', '/api/calculate', body))
+        elif kind == 'sensitivity':
+            parameter = rng.choice(('hotels_count', 'monthly_fee'))
+            values = sorted(rng.sample(range(10, 1000), 5))
+            result.append(('POST', '/api/sensitivity', {'parameter': parameter, 'values': values,
+                                                        'scenario': scenario, 'variant': variant}))
+        elif kind == 'batch':
+            configs = [{'scenario': rng.choice(scenarios), 'variant': rng.choice(('A', 'B')),
+                        'hotels_count': rng.randint(1, 500)} for _ in range(rng.randint(1, 20))]
+            result.append(('POST', '/api/calculate/batch', {'configs': configs}))
+        else:
+            result.append(('GET', f'/api/breakeven?scenario={scenario}&variant={variant}', None))
+    return result
+
+def _strip(value):
+    """Ответ без полей, зависящих от времени"""
+    if isinstance(value, dict):
+        return {key: _strip(item) for key, item in value.items() if key not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [_strip(item) for item in value]
+    return value
+
+def app_transport(app):
+    """Отправка запросов в приложение того же процесса (по клиенту на поток)"""
+    def send(method, path, body):
+        client = app.test_client()
+        response = client.open(path, method=method, json=body)
+        return response.status_code, response.get_json()
+    return send
+
+def url_transport(base_url, timeout=60):
+    """Отправка запросов на запущенный сервер"""
+    def send(method, path, body):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(base_url.rstrip('/') + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b'null')
+    return send
+
+def run_stress(send, clients=8, requests_count=200, seed=None):
+    """
+    Сравнить ответы N параллельных клиентов с последовательным эталоном
+
+    Args:
+        send: функция send(метод, путь, тело) -> (код ответа, JSON) (app_transport, url_transport)
+        clients: количество одновременных клиентов
+        requests_count: количество запросов в наборе
+        seed: зерно генератора набора запросов и порядка отправки
+
+    Returns:
+        dict: 'requests', 'clients', 'mismatches' (список расхождений), 'errors' (ответы не 200),
+              'serial_seconds', 'parallel_seconds', 'requests_per_second', 'latency_ms' (p50, p95, max)
+    """
+    plan = stress_requests(requests_count, seed)
+
+    start = time.perf_counter()
+    expected = [send(*item) for item in plan]
+    serial_seconds = time.perf_counter() - start
+
+    order = list(range(len(plan)))
+    random.Random(seed).shuffle(order)
+    latencies = [0.0] * len(plan)
+
+    def call(index):
+        begin = time.perf_counter()
+        result = send(*plan[index])
+        latencies[index] = time.perf_counter() - begin
+        return index, result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        results = list(executor.map(call, order))
+    parallel_seconds = time.perf_counter() - start
+
+    mismatches, errors = [], []
+    for index, (status, body) in results:
+        if status != 200:
+            errors.append({'request': plan[index], 'status': status, 'body': body})
+        if (status, _strip(body)) != (expected[index][0], _strip(expected[index][1])):
+            mismatches.append({'request': plan[index], 'expected': expected[index], 'actual': (status, body)})
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'requests': len(plan),
+        'clients': clients,
+        'mismatches': mismatches,
+        'errors': errors,
+        'serial_seconds': serial_seconds,
+        'parallel_seconds': parallel_seconds,
+        'requests_per_second': len(plan) / parallel_seconds if parallel_seconds > 0 else float('inf'),
+        'latency_ms': {
+            'p50': float(np.percentile(latencies_ms, 50)),
+            'p95': float(np.percentile(latencies_ms, 95)),
+            'max': float(latencies_ms.max()),
+        },
+    }
+
+def print_stress_report(result):
+    """Вывести итоги нагрузочной проверки"""
+    print(f"=== НАГРУЗОЧНАЯ ПРОВЕРКА ({result['requests']} запросов, {result['clients']} клиентов) ===")
+    print(f"Последовательно: {result['requests'] / result['serial_seconds']:,.0f} запросов/с; "
+          f"параллельно: {result['requests_per_second']:,.0f} запросов/с")
+    latency = result['latency_ms']
+    print(f"Задержка: p50 {latency['p50']:.1f} мс, p95 {latency['p95']:.1f} мс, максимум {latency['max']:.1f} мс")
+    print(f"Расхождений с эталоном: {len(result['mismatches'])}, ответов с ошибкой: {len(result['errors'])}")
+    for mismatch in result['mismatches'][:5]:
+        print(f"  {mismatch['request'][0]} {mismatch['request'][1]} {mismatch['request'][2]}")
+
+if __name__ == "__main__":
+    # python check_concurrency.py [адрес сервера] - без адреса проверяется приложение в процессе
+    if len(sys.argv) > 1:
+        send = url_transport(sys.argv[1])
+    else:
+        from app import app
+        send = app_transport(app)
+    result = run_stress(send, clients=16, requests_count=400, seed=1)
+    print_stress_report(result)
+    sys.exit(1 if result['mismatches'] else 0)
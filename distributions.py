@@ -0,0 +1,171 @@
+"""
+Вероятностные распределения входных параметров бизнес-модели
+Все распределения задаются обратной функцией распределения (ppf),
+поэтому одинаково работают со случайными и квазислучайными выборками
+"""
+
+import math
+import numpy as np
+from parameters import UNCERTAINTY_RANGES, SCALED_UNCERTAINTY_INPUTS
+
+class Distribution:
+    """Базовый класс распределения"""
+
+    def ppf(self, u):
+        """Обратная функция распределения для массива u из [0, 1)"""
+        raise NotImplementedError
+
+    def sample(self, rng, size):
+        """Сгенерировать size значений с помощью генератора rng"""
+        return self.ppf(rng.random(size))
+
+class Constant(Distribution):
+    """Фиксированное значение"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def ppf(self, u):
+        return np.full(np.shape(u), self.value, dtype=float)
+
+    def __repr__(self):
+        return f"Constant({self.value})"
+
+class Uniform(Distribution):
+    """Равномерное распределение на [low, high]"""
+
+    def __init__(self, low, high):
+        if high < low:
+            raise ValueError("Верхняя граница меньше нижней")
+        self.low = low
+        self.high = high
+
+    def ppf(self, u):
+        return self.low + (self.high - self.low) * np.asarray(u, dtype=float)
+
+    def __repr__(self):
+        return f"Uniform({self.low}, {self.high})"
+
+class Triangular(Distribution):
+    """Треугольное распределение (минимум, наиболее вероятное, максимум)"""
+
+    def __init__(self, low, mode, high):
+        if not low <= mode <= high or low == high:
+            raise ValueError("Требуется low <= mode <= high и low < high")
+        self.low = low
+        self.mode = mode
+        self.high = high
+
+    def ppf(self, u):
+        u = np.asarray(u, dtype=float)
+        width = self.high - self.low
+        split = (self.mode - self.low) / width
+        left = self.low + np.sqrt(u * width * (self.mode - self.low))
+        right = self.high - np.sqrt((1 - u) * width * (self.high - self.mode))
+        return np.where(u < split, left, right)
+
+    def __repr__(self):
+        return f"Triangular({self.low}, {self.mode}, {self.high})"
+
+class Normal(Distribution):
+    """Нормальное распределение, при необходимости усеченное границами [low, high]"""
+
+    def __init__(self, mean, std, low=None, high=None):
+        if std <= 0:
+            raise ValueError("Стандартное отклонение должно быть положительным")
+        self.mean = mean
+        self.std = std
+        self.low = low
+        self.high = high
+        # Доли вероятности, отсекаемые границами
+        self._u_low = 0.0 if low is None else _normal_cdf((low - mean) / std)
+        self._u_high = 1.0 if high is None else _normal_cdf((high - mean) / std)
+
+    def ppf(self, u):
+        u = self._u_low + (self._u_high - self._u_low) * np.asarray(u, dtype=float)
+        return self.mean + self.std * _normal_ppf(u)
+
+    def __repr__(self):
+        return f"Normal({self.mean}, {self.std}, low={self.low}, high={self.high})"
+
+class Discrete(Distribution):
+    """Дискретное распределение по списку значений с вероятностями"""
+
+    def __init__(self, values, probabilities=None):
+        self.values = np.asarray(values, dtype=float)
+        if probabilities is None:
+            probabilities = np.full(len(self.values), 1 / len(self.values))
+        probabilities = np.asarray(probabilities, dtype=float)
+        if len(probabilities) != len(self.values) or not np.isclose(probabilities.sum(), 1):
+            raise ValueError("Вероятности должны соответствовать значениям и давать в сумме 1")
+        self.probabilities = probabilities
+        self._cumulative = np.cumsum(probabilities)
+
+    def ppf(self, u):
+        index = np.searchsorted(self._cumulative, np.asarray(u, dtype=float), side='right')
+        return self.values[np.minimum(index, len(self.values) - 1)]
+
+    def __repr__(self):
+        return f"Discrete({self.values.tolist()}, {self.probabilities.tolist()})"
+
+def _normal_cdf(x):
+    """Функция стандартного нормального распределения (скаляр)"""
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+# Коэффициенты рациональной аппроксимации обратной нормальной функции (P. J. Acklam)
+_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+      1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+      6.680131188771972e+01, -1.328068155288572e+01)
+_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+      -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+      3.754408661907416e+00)
+
+def _normal_ppf(u):
+    """Векторизованная обратная функция стандартного нормального распределения"""
+    u = np.clip(np.asarray(u, dtype=float), 1e-300, 1 - 1e-16)
+    result = np.empty_like(u)
+    low = u < 0.02425
+    high = u > 1 - 0.02425
+    mid = ~(low | high)
+
+    q = u[mid] - 0.5
+    r = q * q
+    result[mid] = ((((((_A[0] * r + _A[1]) * r + _A[2]) * r + _A[3]) * r + _A[4]) * r + _A[5]) * q /
+                   (((((_B[0] * r + _B[1]) * r + _B[2]) * r + _B[3]) * r + _B[4]) * r + 1))
+
+    for mask, sign, tail in ((low, 1, u[low]), (high, -1, 1 - u[high])):
+        q = np.sqrt(-2 * np.log(tail))
+        result[mask] = sign * ((((((_C[0] * q + _C[1]) * q + _C[2]) * q + _C[3]) * q + _C[4]) * q + _C[5]) /
+                               ((((_D[0] * q + _D[1]) * q + _D[2]) * q + _D[3]) * q + 1))
+
+    return result
+
+def _scaled_range(name, bounds, base_value):
+    """Диапазон bounds, пересчитанный так, что наиболее вероятное значение равно base_value"""
+    values = np.unique(np.asarray(base_value, dtype=float))
+    if len(values) != 1:
+        raise ValueError(f"Базовые значения {name} различаются: задайте распределение явно")
+    scale = values[0] / bounds[1]
+    return tuple(bound * scale for bound in bounds)
+
+def default_distributions(base_inputs=None):
+    """
+    Треугольные распределения по диапазонам UNCERTAINTY_RANGES из parameters.py
+
+    Диапазоны SCALED_UNCERTAINTY_INPUTS заданы для мини-оборудования; если передан
+    base_inputs, они масштабируются к базовым значениям (себестоимость 1U/2U ±20%
+    от ее собственной величины, а не от цены мини-оборудования)
+    """
+    distributions = {}
+    for name, bounds in UNCERTAINTY_RANGES.items():
+        if base_inputs is not None and name in SCALED_UNCERTAINTY_INPUTS and name in base_inputs:
+            bounds = _scaled_range(name, bounds, base_inputs[name])
+        distributions[name] = Triangular(*bounds)
+    return distributions
+
+def range_distributions(ranges=None):
+    """Равномерные распределения на [минимум, максимум] диапазонов (по умолчанию UNCERTAINTY_RANGES)"""
+    ranges = UNCERTAINTY_RANGES if ranges is None else ranges
+    return {name: Uniform(bounds[0], bounds[-1]) for name, bounds in ranges.items()}
@@ -0,0 +1,158 @@
+"""
+Подбор параметра (goal seek) для бизнес-модели проекта QUANTUM
+Находит значение любого входного параметра, при котором показатель модели
+достигает цели; там, где модель линейна, решение находится в явном виде,
+иначе - пакетной бисекцией сразу для всех задач
+"""
+
+import numpy as np
+from parameters import *
+from model_graph import FINANCIAL_MODEL
+from batch_calculator import BATCH_INPUTS, batch_inputs_from_config
+
+# Допуск проверки линейности (относительно размаха показателя)
+LINEARITY_TOLERANCE = 1e-9
+
+def _prepare(output, variable, inputs, arrays):
+    """Входные параметры и заранее рассчитанные величины, не зависящие от variable"""
+    if output not in FINANCIAL_MODEL.nodes:
+        raise ValueError(f"Неизвестный показатель: {output}")
+    if variable not in BATCH_INPUTS:
+        raise ValueError(f"Неизвестный входной параметр: {variable}")
+
+    unknown = set(arrays) - set(BATCH_INPUTS)
+    if unknown:
+        raise ValueError(f"Неизвестные входные параметры: {sorted(unknown)}")
+    values = dict(batch_inputs_from_config() if inputs is None else inputs)
+    values.update(arrays)
+    values = {name: values[name] for name in BATCH_INPUTS if name != variable}
+
+    # Узлы, не зависящие от подбираемого параметра, рассчитываются один раз
+    affected = FINANCIAL_MODEL.dependents([variable])
+    givens = FINANCIAL_MODEL.evaluate(values, [name for name in FINANCIAL_MODEL.nodes if name not in affected])
+
+    def evaluate(x):
+        result = FINANCIAL_MODEL.evaluate(dict(givens, **{variable: x}), [output])[output]
+        # NaN (например, окупаемость не достигнута) считается бесконечно большим значением
+        return np.where(np.isnan(result), np.inf, result)
+
+    return evaluate
+
+def goal_seek(output, target, variable, low, high, inputs=None, tol=1e-9, max_iter=200, **arrays):
+    """
+    Найти значение variable на отрезке [low, high], при котором output равен target
+
+    Все аргументы могут быть массивами: тысячи задач решаются одним вызовом.
+    Если показатель линеен по параметру на отрезке (совпадает с хордой в точках проверки
+    и в найденном корне), решение находится в явном виде, иначе - пакетной бисекцией (показатель должен менять знак относительно цели на концах).
+
+    Args:
+        output: показатель модели (узел FINANCIAL_MODEL, например 'shiwa_net_profit')
+        target: целевое значение показателя
+        variable: подбираемый входной параметр из BATCH_INPUTS
+        low, high: границы поиска
+        inputs: остальные входные параметры (по умолчанию базовая конфигурация)
+        tol: точность по параметру
+        max_iter: максимальное число итераций бисекции
+        **arrays: замена отдельных входных параметров
+
+    Returns:
+        dict: 'value' - найденные значения (NaN, если решения на отрезке нет),
+              'method' - 'linear' или 'bisection'
+    """
+    evaluate = _prepare(output, variable, inputs, arrays)
+    target = np.asarray(target, dtype=float)
+    low, high = np.broadcast_arrays(np.asarray(low, dtype=float), np.asarray(high, dtype=float))
+
+    f_low = evaluate(low) - target
+    f_high = evaluate(high) - target
+    shape = np.broadcast_shapes(np.shape(f_low), np.shape(f_high))
+    low, high = np.broadcast_to(low, shape), np.broadcast_to(high, shape)
+    f_low, f_high = np.broadcast_to(f_low, shape), np.broadcast_to(f_high, shape)
+
+    with np.errstate(all='ignore'):
+        # Проверка линейности по двум внутренним точкам
+        scale = np.maximum(np.abs(f_low), np.abs(f_high)) + 1.0
+        linear = np.isfinite(f_low) & np.isfinite(f_high)
+        for fraction in (1 / 3, 2 / 3):
+            point = low + fraction * (high - low)
+            expected = f_low + fraction * (f_high - f_low)
+            linear &= np.abs(evaluate(point) - target - expected) <= LINEARITY_TOLERANCE * scale
+
+        if np.all(linear):
+            slope = f_high - f_low
+            value = np.where(slope != 0, low - f_low * (high - low) / slope, np.nan)
+            value = np.where(f_low == 0, low, value)
+            inside = (value >= np.minimum(low, high)) & (value <= np.maximum(low, high))
+            # Излом между точками проверки (max(0, ...), смена режима) не виден по хорде:
+            # явное решение принимается, только если в нем показатель действительно равен цели
+            residual = np.abs(evaluate(np.where(inside, value, low)) - target)
+            if np.all(~inside | (residual <= LINEARITY_TOLERANCE * scale)):
+                return {'value': np.where(inside, value, np.nan), 'method': 'linear'}
+
+    return {'value': _bisect(evaluate, target, low, high, f_low, f_high, tol, max_iter),
+            'method': 'bisection'}
+
+def _bisect(evaluate, target, low, high, f_low, f_high, tol, max_iter):
+    """Пакетная бисекция: все задачи сужают свои отрезки одновременно"""
+    bracketed = np.sign(f_low) * np.sign(f_high) <= 0
+    low, high, f_low = low.copy(), high.copy(), f_low.copy()
+
+    for _ in range(max_iter):
+        middle = (low + high) / 2
+        f_middle = evaluate(middle) - target
+        same_sign = np.sign(f_middle) == np.sign(f_low)
+        low = np.where(same_sign, middle, low)
+        f_low = np.where(same_sign, f_middle, f_low)
+        high = np.where(same_sign, high, middle)
+        if np.all(np.abs(high - low) <= tol * np.maximum(1.0, np.abs(low))):
+            break
+
+    value = np.where(f_low == 0, low, (low + high) / 2)
+    return np.where(bracketed, value, np.nan)
+
+def break_even(party='shiwa', variable='hotels_count', low=0, high=100_000, **config):
+    """
+    Значение параметра, при котором чистая прибыль участника равна нулю
+
+    Args:
+        party: 'shiwa' или 'etecsa'
+        variable: подбираемый параметр (по умолчанию количество отелей)
+        low, high: границы поиска
+        **config: конфигурация batch_inputs_from_config (scenario, variant, ... и переопределения)
+
+    Returns:
+        float или np.ndarray: точка безубыточности (NaN, если не достигается)
+    """
+    if party not in ('shiwa', 'etecsa'):
+        raise ValueError(f"Неизвестный участник: {party}")
+    value = goal_seek(f'{party}_net_profit', 0.0, variable, low, high,
+                      inputs=batch_inputs_from_config(**config))['value']
+    return float(value) if np.ndim(value) == 0 else value
+
+def break_even_analysis(**config):
+    """
+    Точки безубыточности SHIWA и ETECSA по количеству отелей
+
+    Args:
+        **config: конфигурация batch_inputs_from_config (scenario, variant, ... и переопределения)
+
+    Returns:
+        dict: участник -> {'monthly_costs', 'monthly_revenue_per_hotel', 'breakeven_hotels'};
+              постоянные затраты и вклад одного отеля в месяц, NaN - безубыточность не достигается
+    """
+    inputs = batch_inputs_from_config(**config)
+    # Прибыль без отелей и с одним отелем: постоянные затраты и вклад отеля
+    profits = FINANCIAL_MODEL.evaluate(dict(inputs, hotels_count=np.array([0.0, 1.0])),
+                                       ['shiwa_net_profit', 'etecsa_net_profit'])
+
+    result = {}
+    for party in ('shiwa', 'etecsa'):
+        profit = np.broadcast_to(profits[f'{party}_net_profit'], (2,))
+        breakeven = goal_seek(f'{party}_net_profit', 0.0, 'hotels_count', 0, 100_000, inputs=inputs)['value']
+        result[party] = {
+            'monthly_costs': float(-profit[0] / 12),
+            'monthly_revenue_per_hotel': float((profit[1] - profit[0]) / 12),
+            'breakeven_hotels': float(breakeven)
+        }
+    return result
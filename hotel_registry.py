@@ -0,0 +1,241 @@
+"""
+Потоковая загрузка реестра отелей (CSV / JSONL) для расчета портфеля
+Файл читается типизированными пакетами, и каждый пакет сразу переводится
+в структурированный массив HOTEL_DTYPE, поэтому объем памяти не зависит
+от размера реестра; скорость загрузки сообщается в строках в секунду
+"""
+
+import os
+import time
+import numpy as np
+import pandas as pd
+from parameters import *
+from portfolio import (HOTEL_DTYPE, EQUIPMENT_TYPE_CODES, ASSEMBLY_OPTION_CODES,
+                       portfolio_sums, merge_portfolio_sums, portfolio_totals)
+
+# Колонки реестра и их типы при чтении (остальные колонки пропускаются)
+REGISTRY_COLUMNS = {
+    'region': 'category',           # Страна или регион
+    'rooms': 'float64',             # Количество номеров
+    'fee_tier': 'category',         # Тариф из FEE_TIERS (если не задана monthly_fee)
+    'monthly_fee': 'float64',       # Абонентская плата (USD/месяц)
+    'equipment_type': 'category',   # Тип оборудования из EQUIPMENT_TYPES
+    'assembly_option': 'category',  # Вариант сборки из ASSEMBLY_OPTIONS
+    'go_live_month': 'float64',     # Месяц подключения (с 1)
+    'success_rate': 'float64',      # % успешного внедрения
+}
+
+# Форматы файлов по расширению
+REGISTRY_FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+# Строк в одном пакете по умолчанию
+DEFAULT_REGISTRY_CHUNK = 250_000
+
+# Регион строк без указания региона
+DEFAULT_REGION = 'unknown'
+
+def registry_format(path):
+    """Формат файла реестра по расширению (сжатие .gz/.zip/... допускается)"""
+    name = os.fspath(path).lower()
+    for extension in ('.gz', '.bz2', '.zip', '.xz', '.zst'):
+        if name.endswith(extension):
+            name = name[:-len(extension)]
+    file_format = REGISTRY_FORMATS.get(os.path.splitext(name)[1])
+    if file_format is None:
+        raise ValueError(f"Неизвестный формат реестра: {path} (ожидается {', '.join(REGISTRY_FORMATS)})")
+    return file_format
+
+def _category_codes(column, names, default, field):
+    """Номера значений категориальной колонки в names (пропуски - default)"""
+    column = column.astype('category')
+    categories = [str(value) for value in column.cat.categories]
+    unknown = set(categories) - set(names)
+    if unknown:
+        raise ValueError(f"Неизвестные значения {field}: {sorted(unknown)}")
+    # Код -1 (пропуск) попадает на последний элемент таблицы - значение по умолчанию
+    lookup = np.array([names.index(value) for value in categories] + [names.index(default)])
+    return lookup[column.cat.codes.to_numpy()]
+
+class HotelRegistryReader:
+    """
+    Итератор по пакетам реестра отелей: каждый пакет - массив HOTEL_DTYPE
+
+    Регионы нумеруются в порядке появления в файле; имена доступны в regions.
+    После чтения rows, chunks, load_seconds и rows_per_second описывают загрузку
+    (без времени, затраченного потребителем пакетов).
+    """
+
+    def __init__(self, path, chunk_size=DEFAULT_REGISTRY_CHUNK, file_format=None, regions=None):
+        self.path = path
+        self.chunk_size = int(chunk_size)
+        self.file_format = file_format or registry_format(path)
+        if self.file_format not in REGISTRY_FORMATS.values():
+            raise ValueError(f"Неизвестный формат реестра: {self.file_format}")
+        self.regions = list(regions or [])
+        self._region_codes = {name: code for code, name in enumerate(self.regions)}
+        self.rows = 0
+        self.chunks = 0
+        self.load_seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.load_seconds if self.load_seconds > 0 else float('inf')
+
+    def _reader(self):
+        if self.file_format == 'csv':
+            return pd.read_csv(self.path, chunksize=self.chunk_size, dtype=REGISTRY_COLUMNS,
+                               usecols=lambda column: column in REGISTRY_COLUMNS)
+        return pd.read_json(self.path, lines=True, chunksize=self.chunk_size, dtype=False)
+
+    def _region_code(self, name):
+        if name not in self._region_codes:
+            if len(self.regions) > np.iinfo(HOTEL_DTYPE['region']).max:
+                raise ValueError("Слишком много регионов в реестре")
+            self._region_codes[name] = len(self.regions)
+            self.regions.append(name)
+        return self._region_codes[name]
+
+    def _region_column(self, column):
+        """Номера регионов; новые регионы добавляются в regions"""
+        column = column.astype('category')
+        codes = column.cat.codes.to_numpy()
+        lookup = [self._region_code(str(value)) for value in column.cat.categories]
+        # Регион по умолчанию появляется, только если в пакете есть пропуски
+        lookup.append(self._region_code(DEFAULT_REGION) if np.any(codes < 0) else 0)
+        return np.array(lookup)[codes]
+
+    def _convert(self, frame):
+        """Пакет реестра -> структурированный массив HOTEL_DTYPE"""
+        count = len(frame)
+        hotels = np.empty(count, dtype=HOTEL_DTYPE)
+
+        def numeric(name, default):
+            if name not in frame:
+                return np.full(count, default, dtype=float)
+            values = pd.to_numeric(frame[name], errors='raise').to_numpy(dtype=float, na_value=np.nan)
+            return np.where(np.isnan(values), default, values)
+
+        missing = pd.Series([None] * count, dtype='category')
+        hotels['region'] = self._region_column(frame['region'] if 'region' in frame else missing)
+
+        # Плата: явная monthly_fee, иначе тариф, иначе плата по умолчанию
+        fee_tiers = list(FEE_TIERS) + ['']
+        tier_fees = np.array([FEE_TIERS[name] for name in FEE_TIERS] + [MONTHLY_FEE_USD], dtype=float)
+        tiers = _category_codes(frame['fee_tier'] if 'fee_tier' in frame else missing, fee_tiers, '', 'fee_tier')
+        hotels['monthly_fee'] = numeric('monthly_fee', np.nan)
+        hotels['monthly_fee'] = np.where(np.isnan(hotels['monthly_fee']), tier_fees[tiers], hotels['monthly_fee'])
+
+        hotels['equipment_type'] = _category_codes(frame['equipment_type'] if 'equipment_type' in frame else missing,
+                                                   EQUIPMENT_TYPE_CODES, DEFAULT_EQUIPMENT_TYPE, 'equipment_type')
+        hotels['assembly_option'] = _category_codes(frame['assembly_option'] if 'assembly_option' in frame else missing,
+                                                    ASSEMBLY_OPTION_CODES, 'shiwa_assembled', 'assembly_option')
+        hotels['go_live_month'] = numeric('go_live_month', 1)
+        hotels['size'] = numeric('rooms', TYPICAL_HOTEL_ROOMS) / TYPICAL_HOTEL_ROOMS
+        hotels['success_rate'] = numeric('success_rate', BASELINE_SCENARIO['success_rate'])
+
+        if np.any(hotels['go_live_month'] < 1):
+            raise ValueError(f"Месяц подключения должен быть не меньше 1 (строки {self.rows + 1}...{self.rows + count})")
+        return hotels
+
+    def __iter__(self):
+        start = time.perf_counter()
+        with self._reader() as reader:
+            for frame in reader:
+                hotels = self._convert(frame)
+                self.rows += len(hotels)
+                self.chunks += 1
+                self.load_seconds += time.perf_counter() - start
+                yield hotels
+                start = time.perf_counter()
+        self.load_seconds += time.perf_counter() - start
+
+def load_registry(path, chunk_size=DEFAULT_REGISTRY_CHUNK, file_format=None):
+    """
+    Загрузить весь реестр в один массив HOTEL_DTYPE (22 байта на отель)
+
+    Returns:
+        tuple: (массив отелей, имена регионов по номерам)
+    """
+    reader = HotelRegistryReader(path, chunk_size, file_format)
+    chunks = list(reader)
+    hotels = np.concatenate(chunks) if chunks else np.empty(0, dtype=HOTEL_DTYPE)
+    return hotels, reader.regions
+
+def calculate_registry(path, by=None, chunk_size=DEFAULT_REGISTRY_CHUNK, file_format=None, **config):
+    """
+    Итоги портфеля по реестру, обрабатываемому пакетами при постоянном объеме памяти
+
+    Args:
+        path: файл реестра (.csv, .jsonl)
+        by: поле или список полей из PORTFOLIO_GROUPS для итогов по группам
+        chunk_size: строк в одном пакете
+        file_format: 'csv' или 'jsonl' (по умолчанию - по расширению)
+        **config: конфигурация batch_inputs_from_config (scenario, variant, assembly_variant, ...)
+
+    Returns:
+        dict: результат calculate_portfolio (регионы групп - по именам),
+              'rows', 'elapsed_seconds', 'rows_per_second' и 'load_rows_per_second'
+    """
+    start = time.perf_counter()
+    reader = HotelRegistryReader(path, chunk_size, file_format)
+    sums = None
+    for hotels in reader:
+        partial = portfolio_sums(hotels, by, **config)
+        sums = partial if sums is None else merge_portfolio_sums(sums, partial)
+    if sums is None:
+        sums = portfolio_sums(np.empty(0, dtype=HOTEL_DTYPE), by, **config)
+
+    result = portfolio_totals(sums)
+    for group in result.get('groups', []):
+        if 'region' in group:
+            group['region'] = reader.regions[group['region']]
+
+    elapsed = time.perf_counter() - start
+    result.update(
+        rows=reader.rows,
+        elapsed_seconds=elapsed,
+        rows_per_second=reader.rows / elapsed if elapsed > 0 else float('inf'),
+        load_rows_per_second=reader.rows_per_second,
+    )
+    return result
+
+def write_sample_registry(path, count, seed=None, regions=('Cuba', 'Dominican Republic', 'Mexico', 'Jamaica'),
+                          chunk_size=DEFAULT_REGISTRY_CHUNK):
+    """Записать синтетический реестр из count отелей (для проверки и замеров), пакетами"""
+    rng = np.random.default_rng(seed)
+    file_format = registry_format(path)
+    with open(path, 'w', encoding='utf-8') as file:
+        for start in range(0, count, chunk_size):
+            size = min(chunk_size, count - start)
+            frame = pd.DataFrame({
+                'hotel_id': np.arange(start, start + size),
+                'region': rng.choice(regions, size),
+                'rooms': rng.integers(20, 600, size),
+                'fee_tier': rng.choice(list(FEE_TIERS), size, p=[0.3, 0.5, 0.2]),
+                'equipment_type': rng.choice(list(EQUIPMENT_TYPES), size, p=[0.8, 0.2]),
+                'assembly_option': rng.choice(list(ASSEMBLY_OPTIONS), size),
+                'go_live_month': rng.integers(1, 25, size),
+            })
+            if file_format == 'csv':
+                frame.to_csv(file, index=False, header=start == 0)
+            else:
+                frame.to_json(file, orient='records', lines=True, force_ascii=False)
+                file.write('\n')
+
+def print_registry_report(result):
+    """Вывести итоги реестра и скорость загрузки"""
+    totals = result['totals']
+    print(f"=== РЕЕСТР ОТЕЛЕЙ ({result['rows']:,} строк) ===")
+    print(f"Загрузка: {result['load_rows_per_second']:,.0f} строк/с; "
+          f"полный расчет: {result['rows_per_second']:,.0f} строк/с ({result['elapsed_seconds']:.2f} с)")
+    print(f"SHIWA: выручка ${totals['shiwa_total_revenue']:,.0f}, прибыль ${totals['shiwa_net_profit']:,.0f}")
+    print(f"ETECSA: выручка ${totals['etecsa_total_revenue']:,.0f}, прибыль ${totals['etecsa_net_profit']:,.0f}")
+    for group in result.get('groups', []):
+        print(f"  {group.get('region', '')}: {group['hotels']:,} отелей, вклад SHIWA ${group['shiwa_contribution']:,.0f}")
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'hotels.csv')
+        write_sample_registry(path, 1_000_000, seed=42)
+        print_registry_report(calculate_registry(path, by='region', variant='A'))
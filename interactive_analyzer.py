@@ -3,30 +3,82 @@
 Позволяет изменять параметры и сразу видеть результаты
 """
 
+import numpy as np
 from business_calculator import BusinessCalculator, quick_analysis
 from scenario_analyzer import ScenarioAnalyzer
+from batch_calculator import SUMMARY_COLUMNS, batch_inputs_from_config
+from model_graph import FINANCIAL_MODEL, IncrementalEvaluation
+from result_cache import cached_financial_summary
 import json
 
+# Показатели, которые усредняются (а не суммируются) по портфелю конфигураций
+_AVERAGED_COLUMNS = ('shiwa_profit_margin', 'shiwa_roi', 'payback_months',
+                     'hotels_annual_cost', 'hotels_total_benefit', 'hotels_roi')
+
 class InteractiveAnalyzer:
     """Интерактивный анализатор для изменения параметров"""
     
-    def __init__(self):
+    def __init__(self, base_inputs=None):
+        """
+        Args:
+            base_inputs: фиксированные входные параметры пакетного расчета поверх
+                         сценария, в том числе массивы (портфель конфигураций)
+        """
         self.current_scenario = 'baseline'
         self.current_variant = 'B'
         self.custom_params = {}
+        self.base_inputs = dict(base_inputs or {})
+        self._aggregates = {}
+        # Инкрементальный расчет: изменение параметра пересчитывает только зависящие величины
+        self.session = IncrementalEvaluation(FINANCIAL_MODEL, self._session_inputs())
+    
+    def _session_inputs(self):
+        """Входные величины модели для текущего сценария и пользовательских параметров"""
+        inputs = batch_inputs_from_config(self.current_scenario, self.current_variant, **self.base_inputs)
+        
+        for key in ('hotels_count', 'monthly_fee', 'rub_to_usd_rate'):
+            if key in self.custom_params:
+                inputs[key] = self.custom_params[key]
+        
+        if 'equipment_cost' in self.custom_params:
+            # Себестоимость задается в долларах по текущему курсу
+            inputs['equipment_cost_rub'] = self.custom_params['equipment_cost'] * inputs['rub_to_usd_rate']
+        
+        return inputs
+    
+    def _sync_session(self):
+        """Передать изменения параметров в инкрементальный расчет"""
+        return self.session.update(self._session_inputs())
+    
+    def _value(self, name):
+        """Значение величины (для портфеля - сумма или среднее)"""
+        value = self.session[name]
+        if np.ndim(value) == 0:
+            return float(value)
+        
+        # Свертка массива кэшируется, пока узел не пересчитан
+        cached = self._aggregates.get(name)
+        if cached is not None and cached[0] is value:
+            return cached[1]
+        if name in _AVERAGED_COLUMNS or name in FINANCIAL_MODEL.inputs:
+            aggregate = float(np.nanmean(value))
+        else:
+            aggregate = float(np.sum(value))
+        self._aggregates[name] = (value, aggregate)
+        return aggregate
     
     def show_current_parameters(self):
         """Показать текущие параметры"""
-        calc = BusinessCalculator(self.current_scenario, self.current_variant)
+        rate = self._value('rub_to_usd_rate')
         
         print("=== ТЕКУЩИЕ ПАРАМЕТРЫ ===")
         print(f"Сценарий: {self.current_scenario}")
         print(f"Вариант: {self.current_variant}")
-        print(f"Количество отелей: {calc.scenario_params['hotels_count']}")
-        print(f"Абонентская плата: ${calc.scenario_params['monthly_fee']}")
-        print(f"Курс рубль/доллар: {calc.equipment_prices.get('rub_to_usd_rate', 78)}")
-        print(f"Себестоимость оборудования: ${calc.equipment_prices['cost_price_usd']:,.0f}")
-        print(f"Цена продажи ETECSA: ${calc.equipment_prices['selling_price_usd']:,.0f}")
+        print(f"Количество отелей: {self._value('hotels_count'):.0f}")
+        print(f"Абонентская плата: ${self._value('monthly_fee')}")
+        print(f"Курс рубль/доллар: {rate}")
+        print(f"Себестоимость оборудования: ${self._value('equipment_cost_rub') / rate:,.0f}")
+        print(f"Цена продажи ETECSA: ${self._value('equipment_selling_price_usd'):,.0f}")
         print()
     
     def change_scenario(self, scenario):
@@ -34,6 +86,7 @@ class InteractiveAnalyzer:
         valid_scenarios = ['baseline', 'optimistic', 'pessimistic']
         if scenario in valid_scenarios:
             self.current_scenario = scenario
+            self._sync_session()
             print(f"Сценарий изменен на: {scenario}")
         else:
             print(f"Неверный сценарий. Доступные: {valid_scenarios}")
@@ -43,6 +96,7 @@ class InteractiveAnalyzer:
         valid_variants = ['A', 'B']
         if variant.upper() in valid_variants:
             self.current_variant = variant.upper()
+            self._sync_session()
             print(f"Вариант изменен на: {variant.upper()}")
         else:
             print(f"Неверный вариант. Доступные: {valid_variants}")
@@ -53,6 +107,7 @@ class InteractiveAnalyzer:
             count = int(count)
             if count > 0:
                 self.custom_params['hotels_count'] = count
+                self._sync_session()
                 print(f"Количество отелей изменено на: {count}")
             else:
                 print("Количество отелей должно быть положительным числом")
@@ -65,6 +120,7 @@ class InteractiveAnalyzer:
             fee = float(fee)
             if fee > 0:
                 self.custom_params['monthly_fee'] = fee
+                self._sync_session()
                 print(f"Абонентская плата изменена на: ${fee}")
             else:
                 print("Абонентская плата должна быть положительным числом")
@@ -77,6 +133,7 @@ class InteractiveAnalyzer:
             cost = float(cost)
             if cost > 0:
                 self.custom_params['equipment_cost'] = cost
+                self._sync_session()
                 print(f"Себестоимость оборудования изменена на: ${cost:,.0f}")
             else:
                 print("Себестоимость должна быть положительным числом")
@@ -89,6 +146,7 @@ class InteractiveAnalyzer:
             rate = float(rate)
             if rate > 0:
                 self.custom_params['rub_to_usd_rate'] = rate
+                self._sync_session()
                 print(f"Курс рубль/доллар изменен на: {rate}")
             else:
                 print("Курс должен быть положительным числом")
@@ -97,72 +155,62 @@ class InteractiveAnalyzer:
     
     def create_custom_calculator(self):
         """Создать калькулятор с пользовательскими параметрами"""
-        calc = BusinessCalculator(self.current_scenario, self.current_variant)
-        
-        # Применяем пользовательские параметры
-        if 'hotels_count' in self.custom_params:
-            calc.scenario_params['hotels_count'] = self.custom_params['hotels_count']
-        
-        if 'monthly_fee' in self.custom_params:
-            calc.scenario_params['monthly_fee'] = self.custom_params['monthly_fee']
-        
-        if 'equipment_cost' in self.custom_params:
-            calc.equipment_prices['cost_price_usd'] = self.custom_params['equipment_cost']
-            # Пересчитываем цену продажи
-            calc.equipment_prices['selling_price_usd'] = (
-                self.custom_params['equipment_cost'] + 
-                calc.equipment_prices['intellectual_value_rub'] / 
-                (self.custom_params.get('rub_to_usd_rate', 78))
-            )
+        # Применяем пользовательские параметры сценария
+        overrides = {key: self.custom_params[key] for key in ('hotels_count', 'monthly_fee') if key in self.custom_params}
+        calc = BusinessCalculator(self.current_scenario, self.current_variant, overrides=overrides)
         
-        if 'rub_to_usd_rate' in self.custom_params:
-            # Пересчитываем все цены в долларах
-            rate = self.custom_params['rub_to_usd_rate']
-            calc.equipment_prices['cost_price_usd'] = calc.equipment_prices['cost_price_rub'] / rate
-            calc.equipment_prices['selling_price_usd'] = calc.equipment_prices['selling_price_rub'] / rate
-            calc.equipment_prices['hotel_price_usd'] = calc.equipment_prices['hotel_price_rub'] / rate
+        if 'equipment_cost' in self.custom_params or 'rub_to_usd_rate' in self.custom_params:
+            # Цены и затраты в долларах берем из расчета сессии
+            calc.equipment_prices['adjusted_cost_usd'] = self._value('equipment_adjusted_cost_usd')
+            calc.equipment_prices['selling_price_usd'] = self._value('equipment_selling_price_usd')
+            calc.equipment_prices['assembly_fee_usd'] = self._value('equipment_assembly_fee_usd')
+            calc.equipment_prices['hotel_price_usd'] = self._value('hotel_price_usd')
+            calc.total_costs['total_costs_usd'] = self._value('shiwa_fixed_costs_usd')
         
         return calc
     
+    def current_results(self):
+        """Показатели сводки из инкрементального расчета (пересчитываются только устаревшие)"""
+        self.session.values(SUMMARY_COLUMNS)
+        return {name: self._value(name) for name in SUMMARY_COLUMNS}
+    
     def run_analysis_with_custom_params(self):
         """Запустить анализ с пользовательскими параметрами"""
-        calc = self.create_custom_calculator()
-        summary = calc.generate_financial_summary()
-        payback = calc.calculate_payback_period()
+        results = self.current_results()
         
         print("=== АНАЛИЗ С ПОЛЬЗОВАТЕЛЬСКИМИ ПАРАМЕТРАМИ ===")
-        print(f"Сценарий: {summary['scenario']}")
-        print(f"Вариант: {summary['variant']}")
-        print(f"Количество отелей: {summary['effective_hotels']:.0f}")
-        print(f"Абонентская плата: ${summary.get('monthly_fee', 500)}")
+        print(f"Сценарий: {self.current_scenario}")
+        print(f"Вариант: {self.current_variant}")
+        print(f"Количество отелей: {results['effective_hotels']:.0f}")
+        print(f"Абонентская плата: ${self._value('monthly_fee')}")
         print()
         
         print(f"=== SHIWA NETWORK ===")
-        print(f"Общий доход: ${summary['shiwa']['total_revenue']:,.0f}")
-        print(f"Общие затраты: ${summary['shiwa']['total_costs']:,.0f}")
-        print(f"Чистая прибыль: ${summary['shiwa']['net_profit']:,.0f}")
-        print(f"Рентабельность: {summary['shiwa']['profit_margin']:.1f}%")
-        print(f"ROI: {summary['shiwa']['roi']:.1f}%")
-        if payback:
-            print(f"Окупаемость: {payback['payback_months']:.1f} месяцев")
+        print(f"Общий доход: ${results['shiwa_total_revenue']:,.0f}")
+        print(f"Общие затраты: ${results['shiwa_total_costs']:,.0f}")
+        print(f"Чистая прибыль: ${results['shiwa_net_profit']:,.0f}")
+        print(f"Рентабельность: {results['shiwa_profit_margin']:.1f}%")
+        print(f"ROI: {results['shiwa_roi']:.1f}%")
+        if not np.isnan(results['payback_months']):
+            print(f"Окупаемость: {results['payback_months']:.1f} месяцев")
         print()
         
         print(f"=== ETECSA ===")
-        print(f"Чистая прибыль: ${summary['etecsa']['net_profit']:,.0f}")
+        print(f"Чистая прибыль: ${results['etecsa_net_profit']:,.0f}")
         print()
         
         print(f"=== ОТЕЛИ ===")
-        print(f"Годовые затраты: ${summary['hotels']['annual_cost']:,.0f}")
-        print(f"Годовая выгода: ${summary['hotels']['total_benefit']:,.0f}")
-        print(f"ROI: {summary['hotels']['roi']:.0f}%")
+        print(f"Годовые затраты: ${results['hotels_annual_cost']:,.0f}")
+        print(f"Годовая выгода: ${results['hotels_total_benefit']:,.0f}")
+        print(f"ROI: {results['hotels_roi']:.0f}%")
         print()
         
-        return summary
+        return results
     
     def save_custom_scenario(self, name):
         """Сохранить пользовательский сценарий"""
         calc = self.create_custom_calculator()
-        summary = calc.generate_financial_summary()
+        summary, _ = cached_financial_summary(calc)
         
         custom_scenario = {
             'name': name,
@@ -188,6 +236,7 @@ class InteractiveAnalyzer:
             self.custom_params = scenario_data['parameters']
             self.current_scenario = scenario_data['scenario']
             self.current_variant = scenario_data['variant']
+            self._sync_session()
             
             print(f"Сценарий '{scenario_data['name']}' загружен")
             self.show_current_parameters()
@@ -0,0 +1,152 @@
+"""
+Инвестиционные показатели проекта QUANTUM: NPV, IRR и дисконтированная окупаемость
+Все функции работают сразу с массивами помесячных денежных потоков (последняя ось - месяцы)
+"""
+
+import numpy as np
+from parameters import *
+from cashflow import CASH_FLOW_PARTIES, calculate_cash_flows, payback_month
+
+# Границы поиска месячной IRR для метода бисекции
+IRR_BRACKET = (-0.99, 1.0)
+
+def monthly_rate(annual_percent):
+    """Месячная ставка, эквивалентная годовой ставке в процентах"""
+    return (1 + np.asarray(annual_percent, dtype=float) / 100) ** (1 / 12) - 1
+
+def annual_percent(rate):
+    """Годовая ставка в процентах, эквивалентная месячной"""
+    return ((1 + np.asarray(rate, dtype=float)) ** 12 - 1) * 100
+
+def _discount_factors(rate, months):
+    """Коэффициенты дисконтирования (1 + r)^-t формы (..., months)"""
+    return np.exp(-np.log1p(np.asarray(rate, dtype=float))[..., None] * np.arange(1, months + 1))
+
+def npv(flows, rate):
+    """
+    Чистая приведенная стоимость помесячных потоков
+
+    Args:
+        flows: потоки формы (..., месяцы); поток месяца t дисконтируется на t месяцев
+        rate: месячная ставка (скаляр или массив формы (...))
+    """
+    flows = np.asarray(flows, dtype=float)
+    return (flows * _discount_factors(rate, flows.shape[-1])).sum(axis=-1)
+
+def _npv_with_derivative(flows, rate):
+    """NPV и ее производная по ставке"""
+    months = np.arange(1, flows.shape[-1] + 1)
+    discounted = flows * _discount_factors(rate, flows.shape[-1])
+    value = discounted.sum(axis=-1)
+    derivative = -(discounted * months).sum(axis=-1) / (1 + rate)
+    return value, derivative
+
+def irr(flows, guess=0.01, tol=1e-10, max_newton=20, max_bisection=100):
+    """
+    Месячная внутренняя норма доходности для массива потоков
+
+    Сначала выполняются векторизованные итерации Ньютона для всех потоков сразу;
+    для потоков, где метод не сошелся, используется бисекция на IRR_BRACKET.
+
+    Args:
+        flows: потоки формы (..., месяцы)
+        guess: начальное приближение месячной ставки
+        tol: точность по ставке
+        max_newton, max_bisection: максимальное число итераций
+
+    Returns:
+        np.ndarray: месячная IRR формы (...); NaN, если потоки не меняют знак
+                    или корень не найден на IRR_BRACKET
+    """
+    flows = np.asarray(flows, dtype=float)
+    shape = flows.shape[:-1]
+    flows = flows.reshape(-1, flows.shape[-1])
+    result = np.full(len(flows), np.nan)
+
+    # IRR существует только при смене знака потока
+    has_root = (flows > 0).any(axis=-1) & (flows < 0).any(axis=-1)
+    active = np.flatnonzero(has_root)
+    rate = np.full(len(active), float(guess))
+
+    with np.errstate(all='ignore'):
+        for _ in range(max_newton):
+            if not len(active):
+                break
+            value, derivative = _npv_with_derivative(flows[active], rate)
+            step = value / derivative
+            rate = rate - step
+            valid = np.isfinite(rate) & (rate > IRR_BRACKET[0])
+            converged = valid & (np.abs(step) < tol)
+            result[active[converged]] = rate[converged]
+            keep = valid & ~converged
+            # Разошедшиеся итерации переходят к бисекции
+            pending = active[~valid]
+            active, rate = active[keep], rate[keep]
+            if len(pending):
+                _bisect(flows, pending, result, tol, max_bisection)
+        if len(active):
+            _bisect(flows, active, result, tol, max_bisection)
+
+    return result.reshape(shape)
+
+def _bisect(flows, rows, result, tol, max_iter):
+    """Бисекция NPV(r) = 0 на IRR_BRACKET для заданных строк"""
+    low = np.full(len(rows), IRR_BRACKET[0])
+    high = np.full(len(rows), IRR_BRACKET[1])
+    low_value = npv(flows[rows], low)
+    bracketed = np.sign(low_value) != np.sign(npv(flows[rows], high))
+
+    for _ in range(max_iter):
+        middle = (low + high) / 2
+        middle_value = npv(flows[rows], middle)
+        same_sign = np.sign(middle_value) == np.sign(low_value)
+        low = np.where(same_sign, middle, low)
+        low_value = np.where(same_sign, middle_value, low_value)
+        high = np.where(same_sign, high, middle)
+        if np.all(high - low < tol):
+            break
+
+    result[rows] = np.where(bracketed, (low + high) / 2, np.nan)
+
+def discounted_payback_month(flows, rate):
+    """Месяц окупаемости по дисконтированному накопленному потоку (NaN - не окупается)"""
+    flows = np.asarray(flows, dtype=float)
+    return payback_month(np.cumsum(flows * _discount_factors(rate, flows.shape[-1]), axis=-1))
+
+def investment_metrics(flows, discount_rate=DISCOUNT_RATE_PERCENT):
+    """
+    NPV, IRR и дисконтированная окупаемость всех участников
+
+    Args:
+        flows: результат cashflow.cash_flows_from_values
+        discount_rate: ставка дисконтирования (% годовых)
+
+    Returns:
+        dict: {участник}_npv (USD), {участник}_irr (% годовых),
+              {участник}_discounted_payback_month для участников CASH_FLOW_PARTIES
+    """
+    rate = monthly_rate(discount_rate)
+    # Потоки всех участников решаются одним пакетом
+    net = np.stack([flows[f'{party}_net'] for party in CASH_FLOW_PARTIES])
+    party_npv = npv(net, rate)
+    party_irr = annual_percent(irr(net))
+    party_payback = discounted_payback_month(net, rate)
+
+    metrics = {}
+    for index, party in enumerate(CASH_FLOW_PARTIES):
+        metrics[f'{party}_npv'] = party_npv[index]
+        metrics[f'{party}_irr'] = party_irr[index]
+        metrics[f'{party}_discounted_payback_month'] = party_payback[index]
+    return metrics
+
+def calculate_investment_metrics(inputs=None, horizon_months=CASH_FLOW_HORIZON_MONTHS,
+                                 rollout_months=HOTEL_ROLLOUT_MONTHS,
+                                 discount_rate=DISCOUNT_RATE_PERCENT, **arrays):
+    """
+    Инвестиционные показатели для массивов входных параметров (как calculate_batch)
+
+    Returns:
+        dict: результат investment_metrics
+    """
+    flows = calculate_cash_flows(inputs, horizon_months, rollout_months, **arrays)
+    return investment_metrics(flows, discount_rate)
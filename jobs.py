@@ -0,0 +1,254 @@
+"""
+Локальная очередь фоновых заданий для долгих расчетов (большие переборы, оптимизация)
+Задания выполняются пулом потоков внутри процесса приложения, без внешнего брокера:
+HTTP-запрос только ставит задание в очередь, а клиент опрашивает его состояние.
+Тяжелые расчеты сами распределяются по процессам (run_sweep) или выполняются
+в numpy, поэтому поток задания не блокирует обработку остальных запросов.
+
+Состояния задания: queued -> running -> done / failed / cancelled.
+Функция задания получает progress(готово, всего); отмена кооперативная -
+очередной вызов progress прерывает расчет исключением JobCancelled.
+Результаты завершенных заданий хранятся JOB_RESULT_TTL секунд; большие результаты
+задание может записать на диск и вернуть ссылку на них - очередь передает
+такой результат в on_discard, когда он больше не нужен.
+Очередь принадлежит процессу: при запуске приложения несколькими процессами
+задание доступно только в процессе, который его принял.
+"""
+
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Состояния задания
+JOB_STATES = ('queued', 'running', 'done', 'failed', 'cancelled')
+
+# Состояния завершенного задания
+FINISHED_STATES = ('done', 'failed', 'cancelled')
+
+# Количество потоков, выполняющих задания, по умолчанию
+DEFAULT_JOB_WORKERS = 2
+
+# Время хранения результатов завершенных заданий (секунды)
+JOB_RESULT_TTL = 3600
+
+# Наибольшее количество ожидающих и выполняемых заданий
+MAX_ACTIVE_JOBS = 32
+
+# Наибольшее количество хранимых завершенных заданий
+MAX_FINISHED_JOBS = 256
+
+class JobCancelled(Exception):
+    """Задание отменено во время выполнения"""
+
+class JobQueueFull(RuntimeError):
+    """В очереди уже MAX_ACTIVE_JOBS незавершенных заданий"""
+
+class Job:
+    """
+    Фоновое задание: вид, параметры, состояние, ход выполнения и результат
+
+    Поля изменяются только потоком задания и очередью; info() - снимок состояния для API.
+    """
+
+    def __init__(self, kind, function, params=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.function = function
+        self.state = 'queued'
+        self.done = 0
+        self.total = None
+        self.result = None
+        self.error = None
+        self.created = datetime.now()
+        self.started = None
+        self.finished = None
+        self._finished_at = None  # time.monotonic() завершения (для времени хранения)
+        self._cancel = threading.Event()
+        self._future = None
+
+    @property
+    def finished_state(self):
+        return self.state in FINISHED_STATES
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def progress(self, done, total=None):
+        """Сообщить ход выполнения; прерывает задание, если запрошена отмена"""
+        if self._cancel.is_set():
+            raise JobCancelled(self.id)
+        self.done = done
+        if total is not None:
+            self.total = total
+
+    def _finish(self, state, result=None, error=None):
+        self.state = state
+        self.result = result
+        self.error = error
+        self.finished = datetime.now()
+        self._finished_at = time.monotonic()
+
+    def info(self):
+        """Состояние задания без результата"""
+        started, finished = self.started, self.finished
+        elapsed = ((finished or datetime.now()) - started).total_seconds() if started else None
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'state': self.state,
+            'progress': {
+                'done': self.done,
+                'total': self.total,
+                'fraction': self.done / self.total if self.total else (1.0 if self.state == 'done' else 0.0)
+            },
+            'cancel_requested': self.cancel_requested,
+            'error': self.error,
+            'created': self.created.isoformat(),
+            'started': started.isoformat() if started else None,
+            'finished': finished.isoformat() if finished else None,
+            'elapsed_seconds': elapsed,
+        }
+
+class JobQueue:
+    """
+    Очередь заданий на пуле потоков
+
+    submit(kind, function, params) ставит в очередь вызов function(params, progress)
+    и сразу возвращает Job; get/list/cancel безопасны при вызове из любых потоков.
+    on_discard(result) вызывается для результата, который удаляется из очереди
+    (просроченное задание, задание, отмененное после расчета, остановка очереди).
+    """
+
+    def __init__(self, workers=DEFAULT_JOB_WORKERS, result_ttl=JOB_RESULT_TTL,
+                 max_active=MAX_ACTIVE_JOBS, max_finished=MAX_FINISHED_JOBS, on_discard=None):
+        self.workers = int(workers)
+        self.result_ttl = result_ttl
+        self.max_active = int(max_active)
+        self.max_finished = int(max_finished)
+        self.on_discard = on_discard
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='quantum-job')
+        self._jobs = OrderedDict()  # id -> Job в порядке постановки
+        self._lock = threading.Lock()
+
+    def submit(self, kind, function, params=None):
+        """Поставить задание в очередь (JobQueueFull, если очередь заполнена)"""
+        job = Job(kind, function, params)
+        with self._lock:
+            removed = self._purge()
+            active = sum(not other.finished_state for other in self._jobs.values())
+            if active < self.max_active:
+                self._jobs[job.id] = job
+                job._future = self._executor.submit(self._run, job)
+        self._discard(removed)
+        if job._future is None:
+            raise JobQueueFull(f"В очереди уже {active} незавершенных заданий")
+        return job
+
+    def _run(self, job):
+        with self._lock:
+            if job.finished_state:
+                return
+            if job.cancel_requested:
+                job._finish('cancelled')
+                return
+            job.state = 'running'
+            job.started = datetime.now()
+        result = None
+        try:
+            result = job.function(job.params, job.progress)
+            # Отмена, запрошенная после последнего progress, тоже соблюдается
+            job.progress(job.total or job.done, job.total)
+        except JobCancelled:
+            finish = ('cancelled',)
+            self._discard([result])
+        except Exception as e:
+            finish = ('failed', None, str(e) or type(e).__name__)
+        else:
+            finish = ('done', result)
+        with self._lock:
+            job._finish(*finish)
+
+    def get(self, job_id):
+        """Задание по идентификатору (None - нет или уже удалено)"""
+        with self._lock:
+            removed = self._purge()
+            job = self._jobs.get(job_id)
+        self._discard(removed)
+        return job
+
+    def list(self):
+        """Все хранимые задания в порядке постановки"""
+        with self._lock:
+            removed = self._purge()
+            jobs = list(self._jobs.values())
+        self._discard(removed)
+        return jobs
+
+    def cancel(self, job_id):
+        """
+        Отменить задание: ожидающее - сразу, выполняемое - при следующем progress
+
+        Returns:
+            Job или None, если задания нет
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished_state:
+                return job
+            job._cancel.set()
+            if job.state == 'queued' and job._future.cancel():
+                job._finish('cancelled')
+            return job
+
+    def _purge(self):
+        """
+        Удалить просроченные и лишние завершенные задания (под блокировкой)
+
+        Returns:
+            list: результаты удаленных заданий - их освобождает _discard после снятия блокировки,
+                  чтобы долгое удаление файлов не задерживало остальные обращения к очереди
+        """
+        now = time.monotonic()
+        finished = [job for job in self._jobs.values() if job.finished_state]
+        excess = len(finished) - self.max_finished
+        removed = []
+        for job in finished:
+            if excess > 0 or now - job._finished_at > self.result_ttl:
+                del self._jobs[job.id]
+                removed.append(job.result)
+                excess -= 1
+        return removed
+
+    def _discard(self, results):
+        """Освободить результаты удаленных заданий (без блокировки)"""
+        if self.on_discard is None:
+            return
+        for result in results:
+            if result is not None:
+                self.on_discard(result)
+
+    def stats(self):
+        """Количество заданий по состояниям"""
+        with self._lock:
+            removed = self._purge()
+            counts = {state: 0 for state in JOB_STATES}
+            for job in self._jobs.values():
+                counts[job.state] += 1
+        self._discard(removed)
+        return dict(counts, workers=self.workers, max_active=self.max_active)
+
+    def shutdown(self, wait=True):
+        """Отменить все незавершенные задания и остановить потоки (wait - и удалить результаты)"""
+        for job in self.list():
+            self.cancel(job.id)
+        self._executor.shutdown(wait=wait)
+        if wait:
+            with self._lock:
+                removed = [job.result for job in self._jobs.values()]
+                self._jobs.clear()
+            self._discard(removed)
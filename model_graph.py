@@ -0,0 +1,402 @@
+"""
+Граф зависимостей финансовой модели проекта QUANTUM
+Каждая промежуточная величина - именованный узел, который вычисляется
+ровно один раз за расчет; граф же определяет, что пересчитывать при изменении входа
+"""
+
+import numpy as np
+
+class ModelGraph:
+    """Граф именованных величин с явными зависимостями"""
+
+    def __init__(self, name):
+        self.name = name
+        self._functions = {}
+        self._dependencies = {}
+        self._order = None
+        self._dependents = {}
+        self._plans = {}
+
+    def node(self, *dependencies):
+        """Декоратор: зарегистрировать функцию как узел графа с заданными зависимостями"""
+        def register(function):
+            name = function.__name__
+            if name in self._functions:
+                raise ValueError(f"Узел {name} уже определен в графе {self.name}")
+            self._functions[name] = function
+            self._dependencies[name] = tuple(dependencies)
+            self._order = None
+            self._dependents.clear()
+            self._plans.clear()
+            return function
+        return register
+
+    @property
+    def nodes(self):
+        """Вычисляемые узлы в топологическом порядке"""
+        return self._topological_order()
+
+    @property
+    def inputs(self):
+        """Входные величины (зависимости, не являющиеся вычисляемыми узлами)"""
+        seen = []
+        for dependencies in self._dependencies.values():
+            for name in dependencies:
+                if name not in self._functions and name not in seen:
+                    seen.append(name)
+        return tuple(seen)
+
+    @property
+    def sinks(self):
+        """Конечные узлы, от которых не зависят другие узлы"""
+        used = {dep for dependencies in self._dependencies.values() for dep in dependencies}
+        return tuple(name for name in self._topological_order() if name not in used)
+
+    def dependencies(self, name):
+        """Прямые зависимости узла"""
+        return self._dependencies.get(name, ())
+
+    def dependents(self, names):
+        """Все вычисляемые узлы, транзитивно зависящие от заданных величин"""
+        key = frozenset(names)
+        if key not in self._dependents:
+            affected = set()
+            for node in self._topological_order():
+                if any(dep in key or dep in affected for dep in self._dependencies[node]):
+                    affected.add(node)
+            self._dependents[key] = frozenset(affected)
+        return self._dependents[key]
+
+    def _topological_order(self):
+        """Топологическая сортировка узлов с проверкой циклов"""
+        if self._order is not None:
+            return self._order
+
+        order = []
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Цикл в графе {self.name}: {' -> '.join(path + [name])}")
+            state[name] = 'visiting'
+            for dependency in self._dependencies[name]:
+                if dependency in self._functions:
+                    visit(dependency, path + [name])
+            state[name] = 'done'
+            order.append(name)
+
+        for name in self._functions:
+            visit(name, [])
+
+        self._order = tuple(order)
+        return self._order
+
+    def _plan(self, outputs, given):
+        """Шаги вычисления (узел, функция, зависимости) и необходимые входы для заданных выходов"""
+        key = (outputs, given)
+        if key in self._plans:
+            return self._plans[key]
+
+        targets = self.sinks if outputs is None else outputs
+        needed = set()
+        required = set()
+        stack = [name for name in targets if name not in given]
+        while stack:
+            name = stack.pop()
+            if name in needed or name in required:
+                continue
+            if name not in self._functions:
+                required.add(name)
+                continue
+            needed.add(name)
+            stack.extend(dep for dep in self._dependencies[name] if dep not in given)
+
+        steps = tuple((name, self._functions[name], self._dependencies[name])
+                      for name in self._topological_order() if name in needed)
+        plan = (steps, frozenset(required))
+        self._plans[key] = plan
+        return plan
+
+    def evaluate(self, values, outputs=None):
+        """
+        Вычислить узлы графа
+
+        Args:
+            values: входные величины; заданные значения вычисляемых узлов
+                    используются как есть (их зависимости не нужны)
+            outputs: нужные узлы (None - конечные узлы и все, что для них нужно)
+
+        Returns:
+            dict: входные величины и все вычисленные узлы
+        """
+        outputs = None if outputs is None else tuple(outputs)
+        given = frozenset(values)
+        steps, required = self._plan(outputs, given)
+
+        missing = required - given
+        if missing:
+            raise ValueError(f"Не заданы входные величины: {sorted(missing)}")
+
+        results = dict(values)
+        for name, function, dependencies in steps:
+            results[name] = function(*[results[dep] for dep in dependencies])
+        return results
+
+    def recompute(self, previous, changes, outputs=None):
+        """
+        Частичный пересчет после изменения отдельных величин
+
+        Узлы, не зависящие от changes, берутся из previous без пересчета.
+
+        Args:
+            previous: результат предыдущего evaluate()
+            changes: словарь измененных величин
+            outputs: нужные узлы (None - конечные узлы и все, что для них нужно)
+
+        Returns:
+            dict: обновленные величины
+        """
+        affected = self.dependents(changes) - set(changes)
+        values = {name: value for name, value in previous.items() if name not in affected}
+        values.update(changes)
+        return self.evaluate(values, outputs)
+
+class IncrementalEvaluation:
+    """
+    Инкрементальный расчет графа с отслеживанием устаревших узлов
+
+    Изменение входа помечает устаревшими только зависящие от него узлы;
+    остальные значения остаются в кэше. Устаревшие узлы пересчитываются
+    лениво - при первом обращении к ним или к зависящим от них величинам.
+    """
+
+    def __init__(self, graph, inputs):
+        self.graph = graph
+        self._values = dict(inputs)
+        self._dirty = set(graph.nodes)
+        # Количество узлов, пересчитанных при последнем обновлении
+        self.last_recomputed = 0
+
+    def update(self, changes):
+        """Изменить входные величины; возвращает количество устаревших узлов"""
+        changed = [name for name, value in changes.items()
+                   if name not in self._values or not _same_value(self._values[name], value)]
+        if not changed:
+            return 0
+
+        self._values.update((name, changes[name]) for name in changed)
+        stale = self.graph.dependents(changed) - set(changed)
+        self._dirty |= stale
+        return len(stale)
+
+    def __getitem__(self, name):
+        if name in self._dirty:
+            self._refresh([name])
+        return self._values[name]
+
+    def values(self, names):
+        """Значения нескольких величин (с пересчетом устаревших)"""
+        self._refresh(names)
+        return {name: self._values[name] for name in names}
+
+    @property
+    def inputs(self):
+        """Текущие входные величины"""
+        return {name: self._values[name] for name in self.graph.inputs if name in self._values}
+
+    @property
+    def dirty(self):
+        """Узлы, ожидающие пересчета"""
+        return frozenset(self._dirty)
+
+    def _refresh(self, names):
+        """Пересчитать устаревшие узлы, от которых зависят names"""
+        pending = set()
+        stack = [name for name in names if name in self._dirty]
+        while stack:
+            name = stack.pop()
+            if name in pending:
+                continue
+            pending.add(name)
+            stack.extend(dep for dep in self.graph.dependencies(name) if dep in self._dirty)
+
+        if pending:
+            self._values.update(self.graph.evaluate(
+                {name: value for name, value in self._values.items() if name not in pending},
+                [name for name in self.graph.nodes if name in pending]))
+            self._dirty -= pending
+            self.last_recomputed = len(pending)
+
+def _same_value(old, new):
+    """Сравнение скаляров и массивов входных величин"""
+    if old is new:
+        return True
+    if isinstance(old, np.ndarray) or isinstance(new, np.ndarray):
+        return np.shape(old) == np.shape(new) and bool(np.array_equal(old, new))
+    return old == new
+
+def _where(condition, if_true, if_false):
+    """np.where с быстрым путем для скалярных условий"""
+    if isinstance(condition, (bool, np.bool_)):
+        return if_true if condition else if_false
+    return np.where(condition, if_true, if_false)
+
+def _safe_divide(numerator, denominator, condition):
+    """Поэлементное деление, равное 0 там, где condition ложно"""
+    if isinstance(condition, (bool, np.bool_)):
+        return numerator / denominator if condition else 0.0
+    numerator, denominator, condition = np.broadcast_arrays(numerator, denominator, condition)
+    result = np.zeros(numerator.shape, dtype=np.result_type(numerator, denominator, float))
+    np.divide(numerator, denominator, out=result, where=condition)
+    return result
+
+# =============================================================================
+# ФИНАНСОВАЯ МОДЕЛЬ
+# =============================================================================
+
+FINANCIAL_MODEL = ModelGraph('financial_model')
+node = FINANCIAL_MODEL.node
+
+@node('is_sale')
+def sale_mode(is_sale):
+    """Вариант А (продажа + подписка)"""
+    if isinstance(is_sale, np.ndarray):
+        return is_sale.astype(bool)
+    return bool(is_sale)
+
+@node('hotels_count', 'success_rate')
+def effective_hotels(hotels_count, success_rate):
+    return hotels_count * (success_rate / 100)
+
+# Цены оборудования (как в calculate_equipment_prices)
+
+@node('equipment_cost_rub', 'cost_multiplier')
+def adjusted_cost_rub(equipment_cost_rub, cost_multiplier):
+    return equipment_cost_rub * cost_multiplier
+
+@node('adjusted_cost_rub', 'intellectual_value_rub')
+def total_cost_rub(adjusted_cost_rub, intellectual_value_rub):
+    return adjusted_cost_rub + intellectual_value_rub
+
+@node('total_cost_rub', 'shiwa_margin')
+def selling_price_rub(total_cost_rub, shiwa_margin):
+    return total_cost_rub * (1 + shiwa_margin)
+
+@node('total_cost_rub', 'assembly_fee_rate')
+def assembly_fee_rub(total_cost_rub, assembly_fee_rate):
+    return total_cost_rub * assembly_fee_rate
+
+@node('adjusted_cost_rub', 'rub_to_usd_rate')
+def equipment_adjusted_cost_usd(adjusted_cost_rub, rub_to_usd_rate):
+    return adjusted_cost_rub / rub_to_usd_rate
+
+@node('selling_price_rub', 'rub_to_usd_rate')
+def equipment_selling_price_usd(selling_price_rub, rub_to_usd_rate):
+    return selling_price_rub / rub_to_usd_rate
+
+@node('assembly_fee_rub', 'rub_to_usd_rate')
+def equipment_assembly_fee_usd(assembly_fee_rub, rub_to_usd_rate):
+    return assembly_fee_rub / rub_to_usd_rate
+
+@node('equipment_selling_price_usd', 'etecsa_markup_percent')
+def hotel_price_usd(equipment_selling_price_usd, etecsa_markup_percent):
+    return equipment_selling_price_usd * (1 + etecsa_markup_percent / 100)
+
+# SHIWA NETWORK
+
+@node('effective_hotels', 'equipment_selling_price_usd')
+def shiwa_equipment_revenue(effective_hotels, equipment_selling_price_usd):
+    return effective_hotels * equipment_selling_price_usd
+
+@node('sale_mode', 'effective_hotels', 'shiwa_subscription', 'monthly_fee', 'shiwa_share')
+def shiwa_subscription_revenue(sale_mode, effective_hotels, shiwa_subscription, monthly_fee, shiwa_share):
+    return _where(sale_mode,
+                    effective_hotels * shiwa_subscription * 12,
+                    effective_hotels * monthly_fee * shiwa_share * 12)
+
+@node('sale_mode', 'shiwa_equipment_revenue', 'shiwa_subscription_revenue')
+def shiwa_total_revenue(sale_mode, shiwa_equipment_revenue, shiwa_subscription_revenue):
+    # При аренде нет дохода от продажи оборудования
+    return _where(sale_mode, shiwa_equipment_revenue + shiwa_subscription_revenue, shiwa_subscription_revenue)
+
+@node('shiwa_costs_rub', 'rub_to_usd_rate')
+def shiwa_fixed_costs_usd(shiwa_costs_rub, rub_to_usd_rate):
+    return shiwa_costs_rub / rub_to_usd_rate
+
+@node('sale_mode', 'equipment_adjusted_cost_usd', 'hotels_count')
+def shiwa_equipment_costs(sale_mode, equipment_adjusted_cost_usd, hotels_count):
+    return _where(sale_mode, equipment_adjusted_cost_usd * hotels_count, 0)
+
+@node('shiwa_fixed_costs_usd', 'shiwa_equipment_costs', 'cost_factor')
+def shiwa_total_costs(shiwa_fixed_costs_usd, shiwa_equipment_costs, cost_factor):
+    return (shiwa_fixed_costs_usd + shiwa_equipment_costs) * cost_factor
+
+@node('shiwa_total_revenue', 'shiwa_total_costs')
+def shiwa_net_profit(shiwa_total_revenue, shiwa_total_costs):
+    return shiwa_total_revenue - shiwa_total_costs
+
+@node('shiwa_net_profit', 'shiwa_total_revenue')
+def shiwa_profit_margin(shiwa_net_profit, shiwa_total_revenue):
+    return _safe_divide(shiwa_net_profit, shiwa_total_revenue, shiwa_total_revenue > 0) * 100
+
+@node('shiwa_net_profit', 'shiwa_total_costs')
+def shiwa_roi(shiwa_net_profit, shiwa_total_costs):
+    return _safe_divide(shiwa_net_profit, shiwa_total_costs, shiwa_total_costs > 0) * 100
+
+@node('shiwa_net_profit')
+def shiwa_monthly_profit(shiwa_net_profit):
+    return shiwa_net_profit / 12
+
+@node('shiwa_total_costs', 'shiwa_monthly_profit')
+def payback_months(shiwa_total_costs, shiwa_monthly_profit):
+    """Окупаемость в месяцах (NaN, если прибыль не положительная)"""
+    positive = shiwa_monthly_profit > 0
+    return _where(positive, _safe_divide(shiwa_total_costs, shiwa_monthly_profit, positive), np.nan)
+
+# ETECSA
+
+@node('sale_mode', 'effective_hotels', 'hotel_price_usd', 'equipment_selling_price_usd')
+def etecsa_equipment_profit(sale_mode, effective_hotels, hotel_price_usd, equipment_selling_price_usd):
+    return _where(sale_mode, effective_hotels * (hotel_price_usd - equipment_selling_price_usd), 0)
+
+@node('sale_mode', 'effective_hotels', 'etecsa_subscription', 'monthly_fee', 'etecsa_share')
+def etecsa_subscription_revenue(sale_mode, effective_hotels, etecsa_subscription, monthly_fee, etecsa_share):
+    return _where(sale_mode,
+                    effective_hotels * etecsa_subscription * 12,
+                    effective_hotels * monthly_fee * etecsa_share * 12)
+
+@node('sale_mode', 'effective_hotels', 'equipment_assembly_fee_usd')
+def etecsa_assembly_fee_revenue(sale_mode, effective_hotels, equipment_assembly_fee_usd):
+    return _where(sale_mode, effective_hotels * equipment_assembly_fee_usd, 0)
+
+@node('etecsa_equipment_profit', 'etecsa_subscription_revenue', 'etecsa_assembly_fee_revenue')
+def etecsa_total_revenue(etecsa_equipment_profit, etecsa_subscription_revenue, etecsa_assembly_fee_revenue):
+    return etecsa_equipment_profit + etecsa_subscription_revenue + etecsa_assembly_fee_revenue
+
+@node('etecsa_fixed_costs', 'etecsa_assembly_support', 'cost_factor')
+def etecsa_operational_costs(etecsa_fixed_costs, etecsa_assembly_support, cost_factor):
+    return (etecsa_fixed_costs + etecsa_assembly_support) * cost_factor
+
+@node('etecsa_total_revenue', 'etecsa_operational_costs')
+def etecsa_net_profit(etecsa_total_revenue, etecsa_operational_costs):
+    return etecsa_total_revenue - etecsa_operational_costs
+
+# Отели
+
+@node('monthly_fee')
+def hotels_annual_cost(monthly_fee):
+    return monthly_fee * 12
+
+@node('hotel_annual_benefit')
+def hotels_total_benefit(hotel_annual_benefit):
+    return hotel_annual_benefit
+
+@node('hotels_total_benefit', 'hotels_annual_cost')
+def hotels_roi(hotels_total_benefit, hotels_annual_cost):
+    # ROI только если выгода превышает затраты
+    return _safe_divide(hotels_total_benefit - hotels_annual_cost, hotels_annual_cost,
+                        hotels_total_benefit > hotels_annual_cost) * 100
+
+del node
@@ -0,0 +1,130 @@
+"""
+Моделирование Монте-Карло для бизнес-модели проекта QUANTUM
+Входные параметры задаются распределениями, расчет ведется пакетами на всех ядрах;
+вместо случайных чисел можно использовать квазислучайные выборки (sampling.py).
+Пакеты сворачиваются в потоковую статистику (streaming_stats.py), поэтому
+объем памяти не зависит от количества испытаний
+"""
+
+import time
+import numpy as np
+from batch_calculator import BATCH_INPUTS, batch_inputs_from_config, calculate_batch
+from distributions import default_distributions
+from parallel import imap_chunks, split_range
+from sampling import SAMPLERS, make_sampler, sample_inputs
+from random_streams import RandomStreams, chunk_generator
+from streaming_stats import DEFAULT_RELATIVE_ACCURACY, new_statistics
+
+# Показатели, для которых собирается статистика
+MONTE_CARLO_METRICS = ('shiwa_net_profit', 'etecsa_net_profit', 'shiwa_roi', 'payback_months')
+
+# Процентили по умолчанию
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+def _simulate_chunk(task):
+    """
+    Рассчитать один пакет испытаний [start, stop) (выполняется в рабочем процессе)
+
+    Возвращает не значения, а частичную статистику по каждому показателю.
+    """
+    distributions, base_inputs, seed_sequence, sampler, (start, stop), metrics, statistics_options = task
+
+    inputs = dict(base_inputs)
+    if sampler is None:
+        rng = chunk_generator(seed_sequence)
+        for name, distribution in distributions.items():
+            inputs[name] = distribution.sample(rng, stop - start)
+    else:
+        inputs.update(sample_inputs(distributions, sampler, start, stop))
+
+    columns = calculate_batch(inputs)
+    statistics = new_statistics(metrics, **statistics_options)
+    for metric in metrics:
+        statistics[metric].update(columns[metric])
+    return statistics
+
+def run_monte_carlo(distributions=None, n_draws=1_000_000, base_inputs=None, seed=None,
+                    workers=None, chunk_size=500_000, percentiles=DEFAULT_PERCENTILES,
+                    bins=50, metrics=MONTE_CARLO_METRICS, method='random', histogram_ranges=None,
+                    relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+    """
+    Запустить моделирование Монте-Карло
+
+    Args:
+        distributions: словарь {входной параметр: распределение}
+                       (по умолчанию UNCERTAINTY_RANGES из parameters.py для base_inputs)
+        n_draws: количество испытаний
+        base_inputs: фиксированные входные параметры (по умолчанию базовая конфигурация)
+        seed: зерно генератора случайных чисел (результат не зависит от workers)
+        workers: количество процессов (None - все ядра)
+        chunk_size: размер пакета одного задания
+        percentiles: рассчитываемые процентили (оценки скетча с относительной точностью relative_accuracy)
+        bins: количество интервалов гистограммы
+        metrics: показатели из SUMMARY_COLUMNS
+        method: 'random' - псевдослучайные числа, 'lhs', 'halton' или 'sobol' -
+                латинский гиперкуб и квазислучайные выборки из sampling.py
+        histogram_ranges: {показатель: (минимум, максимум)} - гистограммы с фиксированными
+                          интервалами; по умолчанию гистограмма строится по скетчу на [min, max]
+        relative_accuracy: относительная точность процентилей
+
+    Returns:
+        dict: статистика по каждому показателю и производительность расчета
+    """
+    if base_inputs is None:
+        base_inputs = batch_inputs_from_config()
+    if distributions is None:
+        distributions = default_distributions(base_inputs)
+    unknown = set(distributions) - set(BATCH_INPUTS)
+    if unknown:
+        raise ValueError(f"Неизвестные входные параметры: {sorted(unknown)}")
+    if method != 'random' and method not in SAMPLERS:
+        raise ValueError(f"Неизвестный метод выборки: {method}")
+
+    start = time.perf_counter()
+
+    chunks = split_range(n_draws, chunk_size)
+    streams = RandomStreams(seed)
+    sampler = None if method == 'random' else make_sampler(method, len(distributions), n_draws, streams.named('sampler'))
+    statistics_options = {'bins': bins, 'histogram_ranges': histogram_ranges, 'relative_accuracy': relative_accuracy}
+    tasks = [(distributions, base_inputs, chunk_seed, sampler, chunk, metrics, statistics_options)
+             for chunk_seed, chunk in zip(streams.chunks(len(chunks)), chunks)]
+
+    # Частичная статистика объединяется по мере готовности в порядке заданий
+    statistics = new_statistics(metrics, **statistics_options)
+    for partial in imap_chunks(_simulate_chunk, tasks, workers):
+        for metric in metrics:
+            statistics[metric].merge(partial[metric])
+
+    elapsed = time.perf_counter() - start
+
+    return {
+        'n_draws': n_draws,
+        'method': method,
+        'seed': streams.entropy,
+        'distributions': {name: repr(distribution) for name, distribution in distributions.items()},
+        'metrics': {metric: statistics[metric].summary(percentiles) for metric in metrics},
+        'elapsed_seconds': elapsed,
+        'draws_per_second': n_draws / elapsed if elapsed > 0 else float('inf')
+    }
+
+def print_monte_carlo_report(result):
+    """Вывести результаты моделирования"""
+    print(f"=== МОДЕЛИРОВАНИЕ МОНТЕ-КАРЛО ({result['n_draws']:,} испытаний, выборка {result['method']}) ===")
+    for name, distribution in result['distributions'].items():
+        print(f"  {name}: {distribution}")
+    print()
+
+    for metric, stats in result['metrics'].items():
+        print(f"{metric}:")
+        if 'percentiles' not in stats:
+            print("  нет допустимых значений")
+            continue
+        print(f"  Среднее: {stats['mean']:,.1f} (σ = {stats['std']:,.1f})")
+        print("  " + ", ".join(f"{p.upper()}: {v:,.1f}" for p, v in stats['percentiles'].items()))
+        if stats['valid_share'] < 1:
+            print(f"  Доля допустимых значений: {stats['valid_share']:.1%}")
+    print()
+    print(f"Время расчета: {result['elapsed_seconds']:.2f} с ({result['draws_per_second']:,.0f} испытаний/с)")
+
+if __name__ == "__main__":
+    print_monte_carlo_report(run_monte_carlo(seed=42))
@@ -0,0 +1,170 @@
+"""
+Оптимизация условий сделки проекта QUANTUM
+Подбор абонентской платы, доли SHIWA в подписке, типа оборудования и варианта сборки
+для максимизации выбранного показателя при ограничениях на другие показатели
+"""
+
+import time
+import itertools
+import numpy as np
+from parameters import *
+from batch_calculator import SUMMARY_COLUMNS, stack_config_inputs, calculate_batch
+from random_streams import RandomStreams
+
+# Непрерывные параметры сделки и границы поиска по умолчанию
+DEAL_BOUNDS = {
+    'monthly_fee': (MONTHLY_FEE_USD * 0.5, MONTHLY_FEE_USD * 2),
+    'shiwa_share': (0.0, 1.0),
+}
+
+def _violation(columns, constraints):
+    """Суммарное относительное нарушение ограничений (0 - допустимое решение)"""
+    violation = 0.0
+    for output, (minimum, maximum) in constraints.items():
+        values = np.nan_to_num(columns[output], nan=-np.inf if minimum is not None else np.inf)
+        if minimum is not None:
+            violation = violation + np.maximum(minimum - values, 0) / max(abs(minimum), 1.0)
+        if maximum is not None:
+            violation = violation + np.maximum(values - maximum, 0) / max(abs(maximum), 1.0)
+    return violation
+
+def optimize_deal(objective='shiwa_roi', constraints=None, scenario='baseline', variant='B',
+                  equipment_types=None, assembly_options=None, bounds=None, maximize=True,
+                  population=2000, iterations=25, elite_fraction=0.1, seed=None, progress=None):
+    """
+    Найти условия сделки, оптимальные по показателю objective
+
+    Для каждого сочетания типа оборудования и варианта сборки непрерывные
+    параметры ищутся методом перекрестной энтропии; кандидаты всех сочетаний
+    рассчитываются одним пакетом на каждой итерации.
+
+    Args:
+        objective: оптимизируемый показатель из SUMMARY_COLUMNS
+        constraints: {показатель: (минимум, максимум)}, None - нет границы,
+                     например {'hotels_roi': (50, None), 'etecsa_net_profit': (0, None)}
+        scenario, variant: сценарий и модель монетизации
+        equipment_types, assembly_options: рассматриваемые варианты (по умолчанию все)
+        bounds: границы непрерывных параметров (по умолчанию DEAL_BOUNDS)
+        maximize: True - максимизация, False - минимизация
+        population: кандидатов на одно сочетание за итерацию
+        iterations: количество итераций
+        elite_fraction: доля лучших кандидатов для обновления распределения
+        seed: зерно генератора случайных чисел
+        progress: функция progress(готово итераций, всего итераций), вызывается после каждой итерации
+
+    Returns:
+        dict: лучшее решение ('parameters', 'value', 'outputs', 'feasible'),
+              лучшие решения по сочетаниям ('options'), 'evaluations', 'elapsed_seconds'
+    """
+    constraints = dict(constraints or {})
+    unknown = ({objective} | set(constraints)) - set(SUMMARY_COLUMNS)
+    if unknown:
+        raise ValueError(f"Неизвестные показатели: {sorted(unknown)}")
+    bounds = dict(DEAL_BOUNDS, **(bounds or {}))
+    equipment_types = list(equipment_types or EQUIPMENT_TYPES)
+    assembly_options = list(assembly_options or ASSEMBLY_OPTIONS)
+
+    start = time.perf_counter()
+    streams = RandomStreams(seed)
+    rng = streams.generator('candidates')
+
+    options = list(itertools.product(equipment_types, assembly_options))
+    option_inputs = stack_config_inputs([
+        {'scenario': scenario, 'variant': variant, 'equipment_type': equipment_type, 'assembly_option': assembly_option}
+        for equipment_type, assembly_option in options
+    ])
+    option_index = np.repeat(np.arange(len(options)), population)
+    inputs = {name: values[option_index] for name, values in option_inputs.items()}
+
+    names = list(bounds)
+    low = np.array([bounds[name][0] for name in names], dtype=float)
+    high = np.array([bounds[name][1] for name in names], dtype=float)
+    n_elite = max(2, int(population * elite_fraction))
+
+    # Распределение кандидатов для каждого сочетания: сначала равномерное
+    mean = np.tile((low + high) / 2, (len(options), 1))
+    std = np.tile((high - low) / 2, (len(options), 1))
+    best = [None] * len(options)
+    sign = 1.0 if maximize else -1.0
+
+    for iteration in range(iterations):
+        if iteration == 0:
+            candidates = rng.uniform(low, high, size=(len(options), population, len(names)))
+        else:
+            candidates = rng.normal(mean[:, None, :], std[:, None, :], size=(len(options), population, len(names)))
+            candidates = np.clip(candidates, low, high)
+        flat = candidates.reshape(-1, len(names))
+
+        for column, name in enumerate(names):
+            inputs[name] = flat[:, column]
+        if 'shiwa_share' in bounds:
+            inputs['etecsa_share'] = 1 - inputs['shiwa_share']
+        columns = calculate_batch(inputs)
+
+        # Меньшее нарушение ограничений лучше; при равном нарушении - по показателю
+        score = np.nan_to_num(sign * columns[objective], nan=-np.inf).reshape(len(options), population)
+        violation = (_violation(columns, constraints) * np.ones(len(flat))).reshape(len(options), population)
+
+        for option in range(len(options)):
+            order = np.lexsort((-score[option], violation[option]))
+            elite = candidates[option, order[:n_elite]]
+            mean[option] = elite.mean(axis=0)
+            std[option] = np.maximum(elite.std(axis=0), (high - low) * 1e-6)
+
+            top = order[0]
+            key = (-violation[option, top], score[option, top])
+            if best[option] is None or key > best[option]['key']:
+                best[option] = {
+                    'key': key,
+                    'parameters': dict(zip(names, candidates[option, top].tolist())),
+                    'outputs': {name: float(columns[name][option * population + top]) for name in SUMMARY_COLUMNS}
+                }
+        if progress is not None:
+            progress(iteration + 1, iterations)
+
+    results = []
+    for (equipment_type, assembly_option), option_best in zip(options, best):
+        parameters = dict(option_best['parameters'], equipment_type=equipment_type, assembly_option=assembly_option)
+        if 'shiwa_share' in parameters:
+            parameters['etecsa_share'] = 1 - parameters['shiwa_share']
+        results.append({
+            'parameters': parameters,
+            'value': option_best['outputs'][objective],
+            'feasible': bool(option_best['key'][0] == 0),
+            'outputs': option_best['outputs'],
+            'key': option_best['key']
+        })
+    results.sort(key=lambda result: result.pop('key'), reverse=True)
+
+    return dict(results[0],
+                objective=objective,
+                constraints=constraints,
+                options=results,
+                seed=streams.entropy,
+                evaluations=len(options) * population * iterations,
+                elapsed_seconds=time.perf_counter() - start)
+
+def print_optimization_report(result):
+    """Вывести лучшие условия сделки"""
+    print(f"=== ОПТИМИЗАЦИЯ УСЛОВИЙ СДЕЛКИ: {result['objective']} ===")
+    for output, (minimum, maximum) in result['constraints'].items():
+        print(f"  Ограничение: {minimum if minimum is not None else '-∞'} ≤ {output} ≤ {maximum if maximum is not None else '+∞'}")
+    print()
+    status = "допустимо" if result['feasible'] else "ограничения не выполнены"
+    print(f"Лучшее значение: {result['value']:,.2f} ({status})")
+    for name, value in result['parameters'].items():
+        print(f"  {name}: {value:,.3f}" if isinstance(value, float) else f"  {name}: {value}")
+    print()
+    print("По вариантам оборудования и сборки:")
+    for option in result['options']:
+        parameters = option['parameters']
+        print(f"  {parameters['equipment_type']}/{parameters['assembly_option']}: {option['value']:,.2f}"
+              f"{'' if option['feasible'] else ' (недопустимо)'}")
+    print(f"\nРассчитано {result['evaluations']:,} кандидатов за {result['elapsed_seconds']:.2f} с")
+
+if __name__ == "__main__":
+    print_optimization_report(optimize_deal(
+        'shiwa_roi',
+        constraints={'hotels_roi': (20, None), 'etecsa_net_profit': (50_000, None)},
+        seed=42
+    ))
@@ -0,0 +1,68 @@
+"""
+Параллельное выполнение пакетных расчетов на пуле процессов
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+def resolve_workers(workers=None):
+    """Количество рабочих процессов (None - все доступные ядра)"""
+    if workers is None:
+        try:
+            return max(1, len(os.sched_getaffinity(0)))
+        except AttributeError:
+            return os.cpu_count() or 1
+    return max(1, int(workers))
+
+def thread_safe_context():
+    """
+    Способ запуска процессов для пула, создаваемого не из главного потока
+
+    fork копирует процесс вместе с блокировками, захваченными другими потоками
+    (например, потоками веб-сервера), и дочерний процесс может зависнуть;
+    forkserver и spawn запускают рабочие процессы с чистым интерпретатором.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+def map_chunks(function, tasks, workers=None, mp_context=None):
+    """
+    Выполнить function для каждого задания из tasks
+
+    Результаты возвращаются в порядке заданий независимо от количества процессов.
+    При одном процессе или одном задании пул не создается.
+
+    Args:
+        function: функция уровня модуля (должна сериализоваться pickle)
+        tasks: список аргументов - по одному на задание
+        workers: количество процессов (None - все ядра)
+        mp_context: контекст multiprocessing для пула (None - способ запуска по умолчанию;
+                    из фоновых потоков - thread_safe_context())
+
+    Returns:
+        list: результаты function(task)
+    """
+    return list(imap_chunks(function, tasks, workers, mp_context))
+
+def imap_chunks(function, tasks, workers=None, mp_context=None):
+    """
+    То же, что map_chunks, но результаты выдаются по мере готовности (в порядке заданий)
+
+    Позволяет сразу обрабатывать и освобождать результаты, не держа в памяти все сразу.
+    """
+    tasks = list(tasks)
+    workers = min(resolve_workers(workers), len(tasks)) if tasks else 1
+
+    if workers <= 1:
+        for task in tasks:
+            yield function(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+        yield from executor.map(function, tasks)
+
+def split_range(total, chunk_size):
+    """Разбить диапазон [0, total) на отрезки (start, stop) длиной не более chunk_size"""
+    chunk_size = max(1, int(chunk_size))
+    return [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
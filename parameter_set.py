@@ -0,0 +1,110 @@
+"""
+Неизменяемые наборы параметров бизнес-модели
+Позволяют разделять таблицы параметров между калькуляторами и потоками
+без копирования и использовать их как ключи кэша
+"""
+
+from collections.abc import Mapping, MutableMapping
+
+class ParameterSet(Mapping):
+    """Неизменяемый хешируемый набор параметров"""
+
+    __slots__ = ('_data', '_hash')
+
+    def __init__(self, data=(), **kwargs):
+        self._data = dict(data, **kwargs)
+        self._hash = None
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __setitem__(self, key, value):
+        raise TypeError("ParameterSet неизменяем: используйте replace() или overrides калькулятора")
+
+    def __delitem__(self, key):
+        raise TypeError("ParameterSet неизменяем: используйте replace() или overrides калькулятора")
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(frozenset(self._data.items()))
+        return self._hash
+
+    def __eq__(self, other):
+        if isinstance(other, ParameterSet):
+            return self._data == other._data
+        return Mapping.__eq__(self, other)
+
+    def __reduce__(self):
+        return (ParameterSet, (self._data,))
+
+    def __repr__(self):
+        return f"ParameterSet({self._data!r})"
+
+    def replace(self, **overrides):
+        """Новый набор с заменой отдельных параметров (исходный не изменяется)"""
+        if all(key in self._data and self._data[key] == value for key, value in overrides.items()):
+            return self
+        return ParameterSet(self._data, **overrides)
+
+    def to_dict(self):
+        """Изменяемая копия параметров"""
+        return dict(self._data)
+
+class ParameterOverrides(MutableMapping):
+    """
+    Параметры калькулятора с копированием при записи
+
+    Чтение идет из общего неизменяемого ParameterSet, запись сохраняется
+    только в локальном слое этого калькулятора и не влияет на другие.
+    """
+
+    __slots__ = ('_base', '_local', '_frozen')
+
+    def __init__(self, base, overrides=None):
+        self._base = base
+        self._local = dict(overrides) if overrides else None
+        self._frozen = None
+
+    def __getitem__(self, key):
+        if self._local is not None and key in self._local:
+            return self._local[key]
+        return self._base[key]
+
+    def __setitem__(self, key, value):
+        if self._local is None:
+            self._local = {}
+        self._local[key] = value
+        self._frozen = None
+
+    def __delitem__(self, key):
+        raise TypeError("Параметры сценария нельзя удалять")
+
+    def __iter__(self):
+        yield from self._base
+        if self._local:
+            yield from (key for key in self._local if key not in self._base)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"ParameterOverrides({self._base!r}, {self._local!r})"
+
+    @property
+    def overrides(self):
+        """Локально измененные параметры"""
+        return dict(self._local) if self._local else {}
+
+    def freeze(self):
+        """Неизменяемый снимок параметров (без копирования, если изменений нет)"""
+        if not self._local:
+            return self._base
+        if self._frozen is None:
+            self._frozen = self._base.replace(**self._local)
+        return self._frozen
@@ -3,6 +3,9 @@
 Все основные параметры проекта собраны в одном месте для удобного изменения
 """
 
+import copy
+from parameter_set import ParameterSet
+
 # =============================================================================
 # ОСНОВНЫЕ ПАРАМЕТРЫ ПРОЕКТА
 # =============================================================================
@@ -13,6 +16,13 @@ HOTELS_COUNT = 50
 # Абонентская плата в месяц (USD) - общая для отеля
 MONTHLY_FEE_USD = 500
 
+# Тарифы абонентской платы для реестра отелей (USD/месяц)
+FEE_TIERS = {
+    'economy': 400,
+    'standard': MONTHLY_FEE_USD,
+    'premium': 600,
+}
+
 # Подписка SHIWA за ПО и поддержку (USD/месяц на отель)
 SHIWA_SUBSCRIPTION_USD = 20
 
@@ -171,6 +181,14 @@ PROFIT_IMPROVEMENTS = {
     'security': 15.0,  # Повышение безопасности
 }
 
+# Консервативная оценка экономии отеля (USD в год на отель)
+HOTEL_BILLING_SAVINGS_USD = 1000  # Экономия от снижения ошибок в биллинге
+HOTEL_EFFICIENCY_SAVINGS_USD = 5000  # Экономия от повышения эффективности персонала
+HOTEL_DOWNTIME_SAVINGS_USD = 1200  # Экономия от сокращения простоя систем
+
+# Количество номеров типового отеля (экономия отеля пропорциональна числу номеров)
+TYPICAL_HOTEL_ROOMS = 150
+
 # =============================================================================
 # СЦЕНАРИИ РАЗВИТИЯ
 # =============================================================================
@@ -224,34 +242,79 @@ CALCULATION_PERIOD_MONTHS = 12
 # Период окупаемости (месяцы)
 PAYBACK_PERIOD_MONTHS = 6
 
+# Горизонт помесячного денежного потока (месяцы)
+CASH_FLOW_HORIZON_MONTHS = 36
+
+# Срок подключения отелей (месяцы); 1 - все отели подключаются в первый месяц, как в годовой модели
+HOTEL_ROLLOUT_MONTHS = 1
+
+# Ставка дисконтирования (% годовых) для NPV и дисконтированной окупаемости
+DISCOUNT_RATE_PERCENT = 15
+
+# =============================================================================
+# НЕОПРЕДЕЛЕННОСТЬ ПАРАМЕТРОВ
+# =============================================================================
+
+# Диапазоны (минимум, наиболее вероятное, максимум) для вероятностного анализа
+UNCERTAINTY_RANGES = {
+    'hotels_count': (30, HOTELS_COUNT, 75),  # От пессимистичного до оптимистичного сценария
+    'success_rate': (80, 95, 100),  # % успешного внедрения
+    'monthly_fee': (MONTHLY_FEE_USD * 0.8, MONTHLY_FEE_USD, MONTHLY_FEE_USD * 1.1),
+    'rub_to_usd_rate': (70, RUB_TO_USD_RATE, 100),  # Валютный риск
+    'equipment_cost_rub': (80000, EQUIPMENT_TYPES['mini']['cost_rub'], 120000),
+    'shiwa_costs_rub': (3500000, PROJECT_FOT_RUB + OFFICE_EXPENSES_RUB + BUSINESS_TRIPS_RUB + DELIVERY_EXPENSES_RUB, 5500000),  # Годовые затраты SHIWA
+    'etecsa_fixed_costs': (30000, ETECSA_OPERATIONAL_COSTS_USD, 60000),  # Операционные затраты ETECSA (USD в год)
+}
+
+# Параметры, диапазон которых задан для базовой конфигурации (мини-оборудование):
+# при другой базовой конфигурации диапазон масштабируется к ее значению параметра
+SCALED_UNCERTAINTY_INPUTS = ('equipment_cost_rub',)
+
 # =============================================================================
 # ФУНКЦИИ ДЛЯ РАСЧЕТА
 # =============================================================================
 
+# Неизменяемые снимки таблиц: калькуляторы разделяют их без копирования.
+# Снимок пересоздается, когда таблица изменена в памяти, поэтому таблицы модуля
+# остаются источником значений (как и для parameter_tables_fingerprint)
+_snapshots = {}  # id таблицы -> (копия значений таблицы, ParameterSet)
+
+def _snapshot(table):
+    """Неизменяемый снимок таблицы, актуальный для ее текущих значений"""
+    cached = _snapshots.get(id(table))
+    if cached is None or cached[0] != table:
+        cached = (copy.deepcopy(table), ParameterSet(table))
+        _snapshots[id(table)] = cached
+    return cached[1]
+
 def get_scenario_params(scenario_name):
-    """Получить параметры сценария по имени"""
-    scenarios = {
-        'baseline': BASELINE_SCENARIO,
-        'optimistic': OPTIMISTIC_SCENARIO,
-        'pessimistic': PESSIMISTIC_SCENARIO
-    }
-    return scenarios.get(scenario_name, BASELINE_SCENARIO)
+    """
+    Получить параметры сценария по имени (неизменяемый ParameterSet)
+
+    Возвращается снимок текущих значений BASELINE_SCENARIO и других таблиц:
+    изменение таблицы в памяти учитывается в следующих расчетах, а уже созданные
+    калькуляторы сохраняют прежний снимок. Параметры отдельного расчета
+    задаются через overrides калькулятора.
+    """
+    scenarios = {'baseline': BASELINE_SCENARIO, 'optimistic': OPTIMISTIC_SCENARIO, 'pessimistic': PESSIMISTIC_SCENARIO}
+    return _snapshot(scenarios.get(scenario_name, BASELINE_SCENARIO))
 
 def get_variant_params(variant_name):
-    """Получить параметры модели монетизации по имени"""
-    variants = {
-        'A': VARIANT_A,
-        'B': VARIANT_B
-    }
-    return variants.get(variant_name, VARIANT_B)
+    """Получить параметры модели монетизации по имени (снимок текущих значений, см. get_scenario_params)"""
+    return _snapshot({'A': VARIANT_A, 'B': VARIANT_B}.get(variant_name, VARIANT_B))
 
-def calculate_equipment_prices(equipment_type=DEFAULT_EQUIPMENT_TYPE, assembly_option=DEFAULT_ASSEMBLY_OPTION):
-    """Рассчитать цены оборудования с учетом типа и варианта сборки"""
+def calculate_equipment_prices(equipment_type=DEFAULT_EQUIPMENT_TYPE, assembly_option=DEFAULT_ASSEMBLY_OPTION,
+                               cost_rub=None, rub_to_usd_rate=RUB_TO_USD_RATE):
+    """
+    Рассчитать цены оборудования с учетом типа и варианта сборки
+    
+    cost_rub заменяет себестоимость типа оборудования, rub_to_usd_rate - курс пересчета в доллары
+    """
     eq_type = EQUIPMENT_TYPES.get(equipment_type, EQUIPMENT_TYPES[DEFAULT_EQUIPMENT_TYPE])
     assembly = ASSEMBLY_OPTIONS.get(assembly_option, ASSEMBLY_OPTIONS[DEFAULT_ASSEMBLY_OPTION])
     
     # Базовая себестоимость
-    base_cost_rub = eq_type['cost_rub']
+    base_cost_rub = eq_type['cost_rub'] if cost_rub is None else cost_rub
     
     # Применяем множитель себестоимости в зависимости от варианта сборки
     adjusted_cost_rub = base_cost_rub * assembly['cost_multiplier']
@@ -287,20 +350,20 @@ def calculate_equipment_prices(equipment_type=DEFAULT_EQUIPMENT_TYPE, assembly_o
         'selling_price_rub': selling_price_rub,
         'hotel_price_rub': hotel_price_rub,
         'assembly_fee_rub': assembly_fee_rub,
-        'base_cost_usd': base_cost_rub / RUB_TO_USD_RATE,
-        'adjusted_cost_usd': adjusted_cost_rub / RUB_TO_USD_RATE,
-        'total_cost_usd': total_cost_rub / RUB_TO_USD_RATE,
-        'selling_price_usd': selling_price_rub / RUB_TO_USD_RATE,
-        'hotel_price_usd': hotel_price_rub / RUB_TO_USD_RATE,
-        'assembly_fee_usd': assembly_fee_rub / RUB_TO_USD_RATE,
+        'base_cost_usd': base_cost_rub / rub_to_usd_rate,
+        'adjusted_cost_usd': adjusted_cost_rub / rub_to_usd_rate,
+        'total_cost_usd': total_cost_rub / rub_to_usd_rate,
+        'selling_price_usd': selling_price_rub / rub_to_usd_rate,
+        'hotel_price_usd': hotel_price_rub / rub_to_usd_rate,
+        'assembly_fee_usd': assembly_fee_rub / rub_to_usd_rate,
         'shiwa_margin': shiwa_margin,
         'delivery_time': assembly['delivery_time'],
         'complexity_factor': eq_type['complexity_factor']
     }
 
 def get_local_assembly_variant(variant_key=DEFAULT_LOCAL_ASSEMBLY_VARIANT):
-    """Получить параметры варианта локальной сборки"""
-    return LOCAL_ASSEMBLY_VARIANTS.get(variant_key, LOCAL_ASSEMBLY_VARIANTS[DEFAULT_LOCAL_ASSEMBLY_VARIANT])
+    """Получить параметры варианта локальной сборки (снимок текущих значений, см. get_scenario_params)"""
+    return _snapshot(LOCAL_ASSEMBLY_VARIANTS.get(variant_key, LOCAL_ASSEMBLY_VARIANTS[DEFAULT_LOCAL_ASSEMBLY_VARIANT]))
 
 def get_equipment_type_info(equipment_type=DEFAULT_EQUIPMENT_TYPE):
     """Получить информацию о типе оборудования"""
@@ -310,13 +373,23 @@ def get_assembly_option_info(assembly_option=DEFAULT_ASSEMBLY_OPTION):
     """Получить информацию о варианте сборки"""
     return ASSEMBLY_OPTIONS.get(assembly_option, ASSEMBLY_OPTIONS[DEFAULT_ASSEMBLY_OPTION])
 
-def calculate_total_costs():
-    """Рассчитать общие затраты SHIWA NETWORK"""
+def calculate_total_costs(rub_to_usd_rate=RUB_TO_USD_RATE):
+    """Рассчитать общие затраты SHIWA NETWORK (в долларах по курсу rub_to_usd_rate)"""
     return {
-        'project_fot_usd': PROJECT_FOT_RUB / RUB_TO_USD_RATE,
-        'office_expenses_usd': OFFICE_EXPENSES_RUB / RUB_TO_USD_RATE,
-        'business_trips_usd': BUSINESS_TRIPS_RUB / RUB_TO_USD_RATE,
-        'delivery_expenses_usd': DELIVERY_EXPENSES_RUB / RUB_TO_USD_RATE,
+        'project_fot_usd': PROJECT_FOT_RUB / rub_to_usd_rate,
+        'office_expenses_usd': OFFICE_EXPENSES_RUB / rub_to_usd_rate,
+        'business_trips_usd': BUSINESS_TRIPS_RUB / rub_to_usd_rate,
+        'delivery_expenses_usd': DELIVERY_EXPENSES_RUB / rub_to_usd_rate,
         'total_costs_usd': (PROJECT_FOT_RUB + OFFICE_EXPENSES_RUB + 
-                           BUSINESS_TRIPS_RUB + DELIVERY_EXPENSES_RUB) / RUB_TO_USD_RATE
+                           BUSINESS_TRIPS_RUB + DELIVERY_EXPENSES_RUB) / rub_to_usd_rate
     }
+
+def parameter_tables_fingerprint():
+    """
+    Отпечаток текущих значений таблиц и констант модуля (для сброса кэшей)
+
+    Меняется при любом изменении таблиц в памяти, например EQUIPMENT_TYPES['mini']['cost_rub'].
+    """
+    import hashlib
+    tables = [(name, value) for name, value in sorted(globals().items()) if name.isupper()]
+    return hashlib.sha1(repr(tables).encode('utf-8')).hexdigest()
@@ -0,0 +1,394 @@
+"""
+Портфель разнородных отелей проекта QUANTUM
+Каждый отель - строка структурированного массива NumPy со своей абонентской платой,
+типом оборудования, вариантом сборки, месяцем подключения и размером;
+вклад отелей рассчитывается по графу FINANCIAL_MODEL одним пакетом,
+а итоги по группам - векторизованными группировками (np.bincount)
+"""
+
+import numpy as np
+from parameters import *
+from model_graph import FINANCIAL_MODEL
+from batch_calculator import batch_inputs_from_config, stack_config_inputs
+from cashflow import payback_month
+
+# Строка портфеля (22 байта на отель)
+HOTEL_DTYPE = np.dtype([
+    ('region', np.uint16),          # Номер страны или региона
+    ('monthly_fee', np.float64),    # Абонентская плата (USD/месяц)
+    ('equipment_type', np.uint8),   # Номер в EQUIPMENT_TYPE_CODES
+    ('assembly_option', np.uint8),  # Номер в ASSEMBLY_OPTION_CODES
+    ('go_live_month', np.int16),    # Месяц подключения (с 1)
+    ('size', np.float32),           # Размер относительно типового отеля (множитель выгоды отеля)
+    ('success_rate', np.float32),   # % успешного внедрения
+], align=False)
+
+EQUIPMENT_TYPE_CODES = tuple(EQUIPMENT_TYPES)
+ASSEMBLY_OPTION_CODES = tuple(ASSEMBLY_OPTIONS)
+
+# Поля, по которым можно группировать итоги
+PORTFOLIO_GROUPS = ('region', 'equipment_type', 'assembly_option', 'go_live_month')
+
+# Входные параметры, зависящие от типа оборудования и варианта сборки отеля
+_OPTION_INPUTS = ('equipment_cost_rub', 'cost_multiplier', 'shiwa_margin', 'assembly_fee_rate')
+
+# Годовой вклад одного отеля (узлы графа при hotels_count = 1 и нулевых постоянных затратах)
+HOTEL_NODES = (
+    'effective_hotels',
+    'shiwa_equipment_revenue',
+    'shiwa_subscription_revenue',
+    'shiwa_total_revenue',
+    'shiwa_equipment_costs',
+    'shiwa_total_costs',
+    'etecsa_equipment_profit',
+    'etecsa_subscription_revenue',
+    'etecsa_assembly_fee_revenue',
+    'etecsa_total_revenue',
+    'hotels_annual_cost',
+    'hotels_total_benefit',
+    'hotel_price_usd',
+    'sale_mode',
+)
+
+# Показатели итогов портфеля, рассчитываемые графом по суммам вкладов
+_TOTAL_OUTPUTS = ('shiwa_net_profit', 'shiwa_profit_margin', 'shiwa_roi', 'shiwa_monthly_profit',
+                  'payback_months', 'etecsa_net_profit', 'hotels_roi')
+
+def _codes(values, names, field):
+    """Номера значений в names (допускаются имена и номера)"""
+    values = np.asarray(values)
+    if values.dtype.kind not in 'US':
+        codes = values.astype(np.int64)
+    else:
+        unique, inverse = np.unique(values, return_inverse=True)
+        unknown = set(unique.tolist()) - set(names)
+        if unknown:
+            raise ValueError(f"Неизвестные значения {field}: {sorted(unknown)}")
+        codes = np.array([names.index(name) for name in unique.tolist()])[inverse].reshape(values.shape)
+    if np.any((codes < 0) | (codes >= len(names))):
+        raise ValueError(f"Номер {field} вне диапазона 0...{len(names) - 1}")
+    return codes
+
+def make_portfolio(count, region=0, monthly_fee=MONTHLY_FEE_USD, equipment_type=DEFAULT_EQUIPMENT_TYPE,
+                   assembly_option='shiwa_assembled', go_live_month=1, size=1.0,
+                   success_rate=BASELINE_SCENARIO['success_rate']):
+    """
+    Создать портфель из count отелей
+
+    Каждый параметр - скаляр (одинаковый для всех отелей) или массив длиной count;
+    тип оборудования и вариант сборки задаются именами или номерами.
+
+    Returns:
+        np.ndarray: структурированный массив HOTEL_DTYPE
+    """
+    hotels = np.empty(count, dtype=HOTEL_DTYPE)
+    hotels['region'] = region
+    hotels['monthly_fee'] = monthly_fee
+    hotels['equipment_type'] = _codes(equipment_type, EQUIPMENT_TYPE_CODES, 'equipment_type')
+    hotels['assembly_option'] = _codes(assembly_option, ASSEMBLY_OPTION_CODES, 'assembly_option')
+    hotels['go_live_month'] = go_live_month
+    hotels['size'] = size
+    hotels['success_rate'] = success_rate
+    if np.any(hotels['go_live_month'] < 1):
+        raise ValueError("Месяц подключения должен быть не меньше 1")
+    return hotels
+
+def portfolio_from_config(scenario='baseline', equipment_type=DEFAULT_EQUIPMENT_TYPE,
+                          assembly_option='shiwa_assembled', rollout_months=HOTEL_ROLLOUT_MONTHS, region=0):
+    """
+    Однородный портфель сценария: hotels_count одинаковых отелей,
+    равномерно подключаемых за rollout_months месяцев
+    """
+    scenario_params = get_scenario_params(scenario)
+    count = int(round(scenario_params['hotels_count']))
+    go_live = np.arange(count) * rollout_months // max(count, 1) + 1
+    return make_portfolio(count, region, scenario_params['monthly_fee'], equipment_type, assembly_option,
+                          go_live, 1.0, scenario_params['success_rate'])
+
+def _portfolio_inputs(hotels, config):
+    """Входные параметры графа для каждого отеля и постоянные затраты портфеля"""
+    per_hotel = {'equipment_type', 'assembly_option', 'hotels_count', 'monthly_fee', 'success_rate'} & set(config)
+    if per_hotel:
+        raise ValueError(f"Параметры задаются для каждого отеля в портфеле: {sorted(per_hotel)}")
+    inputs = batch_inputs_from_config(**config)
+    overrides = {name: value for name, value in config.items() if name in inputs}
+    base_config = {name: value for name, value in config.items() if name not in inputs}
+
+    # Параметры всех сочетаний тип оборудования × вариант сборки (с учетом переопределений)
+    options = stack_config_inputs([
+        dict(base_config, equipment_type=equipment_type, assembly_option=assembly_option, **overrides)
+        for equipment_type in EQUIPMENT_TYPE_CODES for assembly_option in ASSEMBLY_OPTION_CODES
+    ])
+    option = hotels['equipment_type'].astype(np.intp) * len(ASSEMBLY_OPTION_CODES) + hotels['assembly_option']
+
+    values = dict(inputs)
+    values.update({name: options[name][option] for name in _OPTION_INPUTS})
+    values.update(
+        hotels_count=1.0,
+        success_rate=hotels['success_rate'].astype(float),
+        monthly_fee=hotels['monthly_fee'],
+        hotel_annual_benefit=inputs['hotel_annual_benefit'] * hotels['size'].astype(float),
+        # Постоянные затраты учитываются один раз на портфель
+        shiwa_costs_rub=0.0,
+        etecsa_fixed_costs=0.0,
+        etecsa_assembly_support=0.0,
+    )
+
+    # Поддержка локальной сборки нужна, если хотя бы один отель использует сборку ETECSA
+    used = np.bincount(option, minlength=len(options['etecsa_assembly_support'])) > 0
+    fixed = FINANCIAL_MODEL.evaluate(
+        dict(inputs, hotels_count=0.0,
+             etecsa_assembly_support=float(options['etecsa_assembly_support'][used].max(initial=0.0))),
+        ['shiwa_total_costs', 'etecsa_operational_costs'])
+    return values, {'shiwa_fixed_costs': float(fixed['shiwa_total_costs']),
+                    'etecsa_fixed_costs': float(fixed['etecsa_operational_costs'])}
+
+def hotel_contributions(hotels, **config):
+    """
+    Годовой вклад каждого отеля без постоянных затрат (столбцы HOTEL_NODES)
+
+    Args:
+        hotels: структурированный массив HOTEL_DTYPE
+        **config: конфигурация batch_inputs_from_config (scenario, variant, assembly_variant
+                  и переопределения входных параметров)
+
+    Returns:
+        tuple: (столбцы вклада длиной len(hotels), постоянные затраты портфеля)
+    """
+    values, fixed = _portfolio_inputs(hotels, config)
+    results = FINANCIAL_MODEL.evaluate(values, HOTEL_NODES)
+    columns = {name: np.broadcast_to(np.asarray(results[name], dtype=float), hotels.shape) for name in HOTEL_NODES}
+    return columns, fixed
+
+def _dense_index(codes):
+    """Номера различных значений целочисленного массива по возрастанию (без сортировки)"""
+    present = np.bincount(codes) > 0
+    return np.flatnonzero(present), (np.cumsum(present) - 1)[codes]
+
+def _group_index(hotels, by):
+    """Ключи групп и номер группы каждого отеля"""
+    fields = [by] if isinstance(by, str) else list(by)
+    unknown = set(fields) - set(PORTFOLIO_GROUPS)
+    if unknown:
+        raise ValueError(f"Неизвестные поля группировки: {sorted(unknown)}")
+
+    # Составной ключ групп - номер в решетке значений всех полей
+    codes = [hotels[field].astype(np.intp) for field in fields]
+    sizes = [int(code.max(initial=0)) + 1 for code in codes]
+    keys, group = _dense_index(np.ravel_multi_index(codes, sizes) if codes[0].size else np.zeros(0, np.intp))
+
+    labels = []
+    for key in zip(*np.unravel_index(keys, sizes)):
+        label = {}
+        for field, value in zip(fields, key):
+            value = int(value)
+            if field == 'equipment_type':
+                value = EQUIPMENT_TYPE_CODES[value]
+            elif field == 'assembly_option':
+                value = ASSEMBLY_OPTION_CODES[value]
+            label[field] = value
+        labels.append(label)
+    return labels, group
+
+# Суммы вкладов отелей, из которых складываются итоги портфеля
+_SUMMED_NODES = ('effective_hotels', 'shiwa_equipment_revenue', 'shiwa_subscription_revenue', 'shiwa_total_revenue',
+                 'shiwa_equipment_costs', 'shiwa_total_costs', 'etecsa_equipment_profit',
+                 'etecsa_subscription_revenue', 'etecsa_assembly_fee_revenue', 'etecsa_total_revenue',
+                 'hotels_annual_cost', 'hotels_total_benefit')
+
+# Итоги групп: имя -> узел вклада отеля
+_GROUP_SUMS = {
+    'effective_hotels': 'effective_hotels',
+    'shiwa_revenue': 'shiwa_total_revenue',
+    'shiwa_variable_costs': 'shiwa_total_costs',
+    'etecsa_revenue': 'etecsa_total_revenue',
+    'hotels_annual_cost': 'hotels_annual_cost',
+    'hotels_total_benefit': 'hotels_total_benefit',
+}
+
+def portfolio_sums(hotels, by=None, **config):
+    """
+    Суммы вкладов отелей - объединяемый промежуточный результат calculate_portfolio
+
+    Суммы частей портфеля (например, пакетов большого реестра) объединяются
+    merge_portfolio_sums, итоги рассчитываются portfolio_totals.
+    """
+    columns, fixed = hotel_contributions(hotels, **config)
+    sums = {
+        'hotels': len(hotels),
+        'sums': {name: float(columns[name].sum()) for name in _SUMMED_NODES},
+        'fixed': fixed,
+        'groups': None,
+    }
+    if by is not None:
+        labels, group = _group_index(hotels, by)
+        counts = np.bincount(group, minlength=len(labels))
+        group_sums = {name: np.bincount(group, weights=columns[node], minlength=len(labels))
+                      for name, node in _GROUP_SUMS.items()}
+        sums['groups'] = {
+            tuple(label.items()): dict({name: values[index].item() for name, values in group_sums.items()},
+                                       hotels=int(counts[index]))
+            for index, label in enumerate(labels)
+        }
+    return sums
+
+def merge_portfolio_sums(first, second):
+    """Объединить суммы двух частей портфеля"""
+    merged = {
+        'hotels': first['hotels'] + second['hotels'],
+        'sums': {name: first['sums'][name] + second['sums'][name] for name in _SUMMED_NODES},
+        # Постоянные затраты общие; поддержка сборки ETECSA - если она нужна хотя бы одной части
+        'fixed': {name: max(first['fixed'][name], second['fixed'][name]) for name in first['fixed']},
+        'groups': None,
+    }
+    if first['groups'] is not None:
+        groups = {key: dict(values) for key, values in first['groups'].items()}
+        for key, values in second['groups'].items():
+            if key in groups:
+                groups[key] = {name: groups[key][name] + value for name, value in values.items()}
+            else:
+                groups[key] = dict(values)
+        merged['groups'] = groups
+    return merged
+
+def portfolio_totals(sums):
+    """Итоги портфеля по суммам вкладов (формат calculate_portfolio)"""
+    count = sums['hotels']
+    totals = dict(sums['sums'])
+    totals['shiwa_total_costs'] += sums['fixed']['shiwa_fixed_costs']
+    totals['etecsa_operational_costs'] = sums['fixed']['etecsa_fixed_costs']
+    totals['hotels_annual_cost'] = totals['hotels_annual_cost'] / count if count else 0.0
+    totals['hotels_total_benefit'] = totals['hotels_total_benefit'] / count if count else 0.0
+
+    # Отношения (ROI, окупаемость) - теми же узлами графа по суммам вкладов
+    derived = FINANCIAL_MODEL.evaluate(
+        {name: totals[name] for name in ('shiwa_total_revenue', 'shiwa_total_costs', 'etecsa_total_revenue',
+                                         'etecsa_operational_costs', 'hotels_annual_cost', 'hotels_total_benefit')},
+        _TOTAL_OUTPUTS)
+    totals.update({name: float(derived[name]) for name in _TOTAL_OUTPUTS})
+
+    result = {'hotels': count, 'totals': totals}
+    if sums['groups'] is not None:
+        result['groups'] = []
+        for key in sorted(sums['groups']):
+            group = dict(key, hotels=sums['groups'][key]['hotels'])
+            group.update({name: value for name, value in sums['groups'][key].items() if name != 'hotels'})
+            group['shiwa_contribution'] = group['shiwa_revenue'] - group['shiwa_variable_costs']
+            result['groups'].append(group)
+    return result
+
+def calculate_portfolio(hotels, by=None, **config):
+    """
+    Годовые итоги портфеля в установившемся режиме
+
+    Для однородного портфеля из N отелей итоги совпадают с calculate_batch
+    при hotels_count = N; hotels_annual_cost и hotels_total_benefit - средние на отель.
+
+    Args:
+        hotels: структурированный массив HOTEL_DTYPE
+        by: поле или список полей из PORTFOLIO_GROUPS для итогов по группам
+        **config: конфигурация batch_inputs_from_config (scenario, variant, assembly_variant, ...)
+
+    Returns:
+        dict: 'hotels', 'totals' (показатели портфеля) и при заданном by - 'groups':
+              список групп с выручкой и переменными затратами участников
+              (постоянные затраты по группам не распределяются)
+    """
+    return portfolio_totals(portfolio_sums(hotels, by, **config))
+
+def portfolio_cash_flows(hotels, horizon_months=CASH_FLOW_HORIZON_MONTHS, by=None, **config):
+    """
+    Помесячный поток портфеля с учетом месяца подключения каждого отеля
+
+    Разовые доходы и затраты на оборудование приходятся на месяц подключения отеля,
+    подписка - на каждый месяц начиная с него; постоянные затраты - на каждый месяц.
+    Поток отелей - сумма по всем отелям портфеля.
+
+    Args:
+        hotels: структурированный массив HOTEL_DTYPE
+        horizon_months: горизонт расчета (месяцы)
+        by: поле или список полей из PORTFOLIO_GROUPS для рядов выручки по группам
+        **config: конфигурация batch_inputs_from_config
+
+    Returns:
+        dict: 'months', 'active_hotels' и для shiwa, etecsa, hotel ряды *_revenue (у отелей *_benefit),
+              *_costs, *_net, *_cumulative и *_payback_month (как cash_flows_from_values);
+              при заданном by - 'groups' (ключи групп) и ряды 'group_*' формы (группы, месяцы)
+    """
+    columns, fixed = hotel_contributions(hotels, **config)
+    period = CALCULATION_PERIOD_MONTHS
+    month = hotels['go_live_month'].astype(np.intp) - 1
+    inside = month < horizon_months
+
+    if by is None:
+        labels, group, n_groups = None, np.zeros(len(hotels), dtype=np.intp), 1
+    else:
+        labels, group = _group_index(hotels, by)
+        n_groups = len(labels)
+    key = (group * horizon_months + month)[inside]
+
+    def by_month(values, recurring):
+        """Сумма по месяцам подключения; для ежемесячных величин - накопленная с месяца подключения"""
+        series = np.bincount(key, weights=np.broadcast_to(values, hotels.shape)[inside],
+                             minlength=n_groups * horizon_months).reshape(n_groups, horizon_months)
+        return np.cumsum(series, axis=-1) if recurring else series
+
+    sale_mode = columns['sale_mode'] > 0
+    shiwa_one_off = columns['shiwa_total_revenue'] - columns['shiwa_subscription_revenue']
+    etecsa_one_off = columns['etecsa_total_revenue'] - columns['etecsa_subscription_revenue']
+
+    group_series = {
+        'active_hotels': by_month(1.0, True),
+        'shiwa_revenue': by_month(shiwa_one_off, False) + by_month(columns['shiwa_subscription_revenue'] / period, True),
+        'shiwa_variable_costs': by_month(columns['shiwa_total_costs'], False),
+        'etecsa_revenue': by_month(etecsa_one_off, False) + by_month(columns['etecsa_subscription_revenue'] / period, True),
+        'hotel_benefit': by_month(columns['hotels_total_benefit'] / period, True),
+        'hotel_costs': (by_month(np.where(sale_mode, columns['hotel_price_usd'], 0.0), False)
+                        + by_month(columns['hotels_annual_cost'] / 12, True)),
+    }
+    series = {name: values.sum(axis=0) for name, values in group_series.items()}
+
+    flows = {'months': np.arange(1, horizon_months + 1), 'active_hotels': series['active_hotels']}
+    for party, income, costs in (
+            ('shiwa', series['shiwa_revenue'], fixed['shiwa_fixed_costs'] / period + series['shiwa_variable_costs']),
+            ('etecsa', series['etecsa_revenue'], np.full(horizon_months, fixed['etecsa_fixed_costs'] / period)),
+            ('hotel', series['hotel_benefit'], series['hotel_costs'])):
+        net = income - costs
+        cumulative = np.cumsum(net)
+        flows[f'{party}_benefit' if party == 'hotel' else f'{party}_revenue'] = income
+        flows[f'{party}_costs'] = costs
+        flows[f'{party}_net'] = net
+        flows[f'{party}_cumulative'] = cumulative
+        flows[f'{party}_payback_month'] = float(payback_month(cumulative))
+
+    if by is not None:
+        flows['groups'] = labels
+        flows.update({f'group_{name}': values for name, values in group_series.items()})
+    return flows
+
+def print_portfolio_report(result):
+    """Вывести итоги портфеля и групп"""
+    totals = result['totals']
+    print(f"=== ПОРТФЕЛЬ ({result['hotels']:,} отелей, успешно {totals['effective_hotels']:,.1f}) ===")
+    print(f"SHIWA: выручка ${totals['shiwa_total_revenue']:,.0f}, прибыль ${totals['shiwa_net_profit']:,.0f}, "
+          f"ROI {totals['shiwa_roi']:.1f}%")
+    print(f"ETECSA: выручка ${totals['etecsa_total_revenue']:,.0f}, прибыль ${totals['etecsa_net_profit']:,.0f}")
+    print(f"Отели: ROI {totals['hotels_roi']:.1f}%")
+    for group in result.get('groups', []):
+        label = ', '.join(f"{field}={group[field]}" for field in group if field in PORTFOLIO_GROUPS)
+        print(f"  {label}: {group['hotels']:,} отелей, вклад SHIWA ${group['shiwa_contribution']:,.0f}, "
+              f"выручка ETECSA ${group['etecsa_revenue']:,.0f}")
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(42)
+    count = 100_000
+    portfolio = make_portfolio(
+        count,
+        region=rng.integers(0, 5, count),
+        monthly_fee=rng.choice([400, 500, 600], count),
+        equipment_type=rng.choice(EQUIPMENT_TYPE_CODES, count, p=[0.8, 0.2]),
+        assembly_option=rng.choice(ASSEMBLY_OPTION_CODES, count),
+        go_live_month=rng.integers(1, 25, count),
+        size=rng.lognormal(0, 0.3, count),
+    )
+    print_portfolio_report(calculate_portfolio(portfolio, by='region', variant='A'))
@@ -0,0 +1,57 @@
+"""
+Воспроизводимые независимые потоки случайных чисел для параллельных расчетов
+Поток каждого пакета задается зерном запуска и номером пакета (а не номером
+рабочего процесса), поэтому результат при одном зерне побитово совпадает
+при любом количестве процессов
+"""
+
+import zlib
+import numpy as np
+
+# Первый элемент ключа именованных потоков; ключи пакетов состоят из одного номера
+# и поэтому никогда не совпадают с ключами именованных потоков
+_NAMED_STREAM = 0xFFFFFFFF
+
+class RandomStreams:
+    """
+    Дерево потоков случайных чисел одного запуска
+
+    chunk(i) - поток пакета i (совпадает с SeedSequence(seed).spawn(n)[i]),
+    named('bootstrap') - отдельный поток для вспомогательных задач.
+    Если зерно не задано, оно выбирается случайно и доступно в entropy,
+    так что любой запуск можно повторить.
+    """
+
+    def __init__(self, seed=None):
+        if isinstance(seed, RandomStreams):
+            seed = seed.root
+        self.root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+    @property
+    def entropy(self):
+        """Зерно запуска (для повторения расчета)"""
+        return self.root.entropy
+
+    def _child(self, *key):
+        return np.random.SeedSequence(self.root.entropy, spawn_key=self.root.spawn_key + key,
+                                      pool_size=self.root.pool_size)
+
+    def chunk(self, index):
+        """SeedSequence пакета с номером index"""
+        return self._child(int(index))
+
+    def chunks(self, count):
+        """SeedSequence пакетов 0 ... count - 1"""
+        return [self.chunk(index) for index in range(count)]
+
+    def named(self, name):
+        """SeedSequence именованного потока (например, 'sampler' или 'bootstrap')"""
+        return self._child(_NAMED_STREAM, zlib.crc32(name.encode('utf-8')))
+
+    def generator(self, name):
+        """Генератор numpy для именованного потока"""
+        return np.random.default_rng(self.named(name))
+
+def chunk_generator(seed_sequence):
+    """Генератор numpy для потока пакета (в рабочем процессе)"""
+    return np.random.default_rng(seed_sequence)
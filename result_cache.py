@@ -0,0 +1,362 @@
+"""
+Кэш результатов расчета на диске, общий для процессов и перезапусков
+Ключ записи - хеш канонического представления полного набора параметров
+и версии модели (model_fingerprint), поэтому одинаковые конфигурации из
+веб-приложения, анализаторов и скриптов проверки рассчитываются один раз,
+а изменение модели делает старые записи недостижимыми.
+Записи пишутся атомарно (временный файл + os.replace), лишние записи
+удаляются по давности использования при превышении размера кэша.
+Кэш по умолчанию (default_cache) включается переменной окружения QUANTUM_CACHE_DIR;
+без нее расчеты выполняются напрямую и ничего не пишут на диск.
+MemoryCache - кэш в памяти процесса (LRU и время жизни) для ответов веб-API
+"""
+
+import os
+import json
+import math
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+from result_store import model_fingerprint
+
+try:
+    import fcntl
+except ImportError:  # Windows: очистка кэша без межпроцессной блокировки
+    fcntl = None
+
+# Переменная окружения с каталогом общего кэша (не задана или пуста - кэш отключен)
+CACHE_DIR_ENV = 'QUANTUM_CACHE_DIR'
+
+# Каталог ResultCache() по умолчанию (например, QUANTUM_CACHE_DIR=~/.cache/quantum_results)
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                                 'quantum_results')
+
+# Наибольший размер кэша по умолчанию (байты)
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# После очистки кэш занимает не больше этой доли наибольшего размера
+CACHE_LOW_WATERMARK = 0.9
+
+# Очистка запускается, когда процесс записал эту долю наибольшего размера
+CACHE_EVICTION_CHECK = 0.05
+
+def _canonical(value):
+    """Каноническое JSON-представление значения для хеширования"""
+    if isinstance(value, (bool, np.bool_)) or value is None or isinstance(value, str):
+        return bool(value) if isinstance(value, np.bool_) else value
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        value = float(value)
+        if math.isnan(value) or math.isinf(value):
+            return repr(value)
+        # Равные числа дают одинаковый ключ (75 и 75.0, 0.0 и -0.0)
+        return value + 0.0
+    if isinstance(value, np.ndarray):
+        return [_canonical(item) for item in value.tolist()]
+    if hasattr(value, 'items'):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_canonical(item) for item in value]
+        return sorted(items, key=json.dumps) if isinstance(value, (set, frozenset)) else items
+    raise TypeError(f"Значение нельзя использовать в ключе кэша: {type(value).__name__}")
+
+def params_hash(kind, params, model_version=None):
+    """Ключ записи: sha256 вида расчета, параметров и версии модели"""
+    payload = json.dumps({'kind': kind, 'params': _canonical(params), 'model': model_version or model_fingerprint()},
+                         sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _json_default(value):
+    """Типы numpy в JSON"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Значение нельзя сохранить в кэше: {type(value).__name__}")
+
+class ResultCache:
+    """
+    Кэш результатов в каталоге: одна запись - один JSON-файл <ключ[:2]>/<ключ>.json
+
+    Читатели не блокируются: запись появляется целиком благодаря os.replace,
+    а удаленная между проверкой и чтением запись считается промахом.
+    При чтении время изменения файла обновляется, поэтому очистка удаляет
+    давно не использованные записи (LRU); одновременно кэш очищает
+    только один процесс (блокировка fcntl файла .lock).
+    Один экземпляр можно использовать из нескольких потоков.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES, model_version=None):
+        self.directory = os.fspath(directory)
+        self.max_bytes = int(max_bytes)
+        self.model_version = model_version or model_fingerprint()
+        os.makedirs(self.directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._written = 0
+        self._lock = threading.Lock()  # счетчики при обращении из нескольких потоков
+
+    def key(self, kind, params):
+        return params_hash(kind, params, self.model_version)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f'{key}.json')
+
+    def get(self, kind, params, default=None):
+        """Сохраненный результат или default"""
+        path = self._path(self.key(kind, params))
+        try:
+            with open(path, encoding='utf-8') as file:
+                value = json.load(file)['value']
+        except (FileNotFoundError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return default
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, kind, params, value):
+        """Сохранить результат (значение должно сериализоваться в JSON)"""
+        key = self.key(kind, params)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({'kind': kind, 'value': value}, ensure_ascii=False, default=_json_default).encode('utf-8')
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        with self._lock:
+            self.writes += 1
+            self._written += len(data)
+            check = self._written >= self.max_bytes * CACHE_EVICTION_CHECK
+            if check:
+                self._written = 0
+        if check:
+            self.evict()
+        # Значение возвращается в том виде, в каком его прочитает get
+        return json.loads(data)['value']
+
+    def get_or_compute(self, kind, params, compute):
+        """Результат из кэша или compute() с сохранением в кэш"""
+        missing = object()
+        value = self.get(kind, params, missing)
+        if value is missing:
+            value = self.put(kind, params, compute())
+        return value
+
+    def _entries(self):
+        """(время использования, размер, путь) всех записей"""
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self, max_bytes=None):
+        """
+        Удалить давно не использованные записи, если кэш больше max_bytes
+
+        Returns:
+            int: количество удаленных записей (0, если очистку выполняет другой процесс)
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return 0
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= max_bytes:
+                return 0
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= max_bytes * CACHE_LOW_WATERMARK:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+    def clear(self):
+        """Удалить все записи"""
+        return self.evict(max_bytes=0)
+
+    def stats(self):
+        """Счетчики этого процесса и размер кэша на диске"""
+        entries = self._entries()
+        requests = self.hits + self.misses
+        return {
+            'directory': self.directory,
+            'model_version': self.model_version,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else 0.0,
+            'writes': self.writes,
+            'evictions': self.evictions,
+        }
+
+class MemoryCache:
+    """
+    Кэш в памяти процесса с вытеснением по давности использования (LRU) и временем жизни
+
+    Записи действительны для версии данных version (например, отпечатка таблиц
+    параметров): обращение с другой версией очищает кэш. Потокобезопасен.
+    """
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = int(max_entries)
+        self.ttl = ttl
+        self.version = None
+        self._entries = OrderedDict()  # ключ -> (время истечения, значение)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key, version=None, default=None):
+        """Значение по ключу или default (просроченные записи удаляются)"""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, version=None):
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Счетчики попаданий, промахов и вытеснений"""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def default_cache():
+    """
+    Общий кэш процесса в каталоге QUANTUM_CACHE_DIR
+
+    Кэш включается явно: библиотечный код и тесты без этой переменной
+    не пишут на диск.
+
+    Returns:
+        ResultCache или None, если QUANTUM_CACHE_DIR не задан или пуст
+    """
+    global _default_cache
+    directory = os.environ.get(CACHE_DIR_ENV)
+    if not directory:
+        return None
+    directory = os.path.expanduser(directory)
+    with _default_cache_lock:
+        if _default_cache is None or _default_cache.directory != directory:
+            _default_cache = ResultCache(directory)
+        return _default_cache
+
+def calculator_params(calculator):
+    """Полный набор параметров BusinessCalculator, от которого зависят его результаты"""
+    return {
+        'config': {
+            'scenario': calculator.scenario,
+            'variant': calculator.variant,
+            'equipment_type': calculator.equipment_type,
+            'assembly_option': calculator.assembly_option,
+            'assembly_variant': calculator.assembly_variant,
+        },
+        'scenario_params': dict(calculator.scenario_params),
+        'variant_params': dict(calculator.variant_params),
+        'equipment_prices': calculator.equipment_prices,
+        'total_costs': calculator.total_costs,
+        'local_assembly_params': calculator.local_assembly_params,
+        'inputs': calculator.model_inputs(),
+    }
+
+def cached_financial_summary(calculator, cache=None):
+    """
+    Финансовая сводка и окупаемость калькулятора через кэш
+
+    Args:
+        calculator: BusinessCalculator
+        cache: ResultCache (по умолчанию default_cache(); если кэш не включен - прямой расчет)
+
+    Returns:
+        tuple: (generate_financial_summary(), calculate_payback_period())
+    """
+    cache = cache or default_cache()
+    compute = lambda: [calculator.generate_financial_summary(), calculator.calculate_payback_period()]
+    if cache is None:
+        return tuple(compute())
+    return tuple(cache.get_or_compute('financial_summary', calculator_params(calculator), compute))
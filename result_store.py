@@ -0,0 +1,223 @@
+"""
+Столбцовое хранилище результатов больших расчетов на диске
+Каталог хранилища: заголовок meta.json (имена и типы параметров и показателей,
+версия модели, количество строк) и по одному двоичному файлу на колонку.
+Строки только дописываются; колонки открываются через memmap лениво,
+поэтому открытие хранилища любого размера занимает миллисекунды,
+а срезы читаются с диска без загрузки всего файла
+"""
+
+import os
+import json
+import time
+import hashlib
+import numpy as np
+
+# Версия формата хранилища
+STORE_FORMAT_VERSION = 1
+
+# Имя файла заголовка в каталоге хранилища
+STORE_META_FILE = 'meta.json'
+
+# Файлы, от которых зависят результаты модели (для версии модели):
+# все модули проекта, которые импортируют business_calculator и batch_calculator
+MODEL_SOURCE_FILES = ('parameters.py', 'parameter_set.py', 'business_calculator.py', 'model_graph.py',
+                      'batch_calculator.py', 'cashflow.py', 'investment_metrics.py')
+
+def model_fingerprint(files=MODEL_SOURCE_FILES, directory=None):
+    """Версия модели: хеш исходных файлов, определяющих результаты расчета (по умолчанию - рядом с модулем)"""
+    digest = hashlib.sha256()
+    directory = directory or os.path.dirname(os.path.abspath(__file__))
+    for name in files:
+        digest.update(name.encode('utf-8') + b'\0')
+        with open(os.path.join(directory, name), 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+def _column_spec(spec):
+    """Описание колонки: тип numpy или список категорий (хранятся номера)"""
+    if isinstance(spec, (list, tuple)):
+        categories = [str(value) for value in spec]
+        dtype = np.min_scalar_type(max(len(categories) - 1, 0))
+        return {'dtype': np.dtype(dtype).str, 'categories': categories}
+    return {'dtype': np.dtype(spec).str}
+
+def _write_meta(path, meta):
+    """Записать заголовок атомарно (через временный файл)"""
+    temporary = os.path.join(path, STORE_META_FILE + '.tmp')
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(meta, file, ensure_ascii=False, indent=2)
+    os.replace(temporary, os.path.join(path, STORE_META_FILE))
+
+class ResultStore:
+    """
+    Хранилище результатов, открытое для чтения и дописывания
+
+    store['shiwa_net_profit'] - колонка (memmap, только чтение) длиной len(store),
+    store.read(start, stop) - срез всех колонок, store.append({...}) - дописать строки.
+    Количество строк фиксируется в заголовке после записи данных, поэтому
+    прерванная запись не портит хранилище: недописанный хвост отбрасывается.
+    Одновременная запись из нескольких процессов не поддерживается.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        with open(os.path.join(self.path, STORE_META_FILE), encoding='utf-8') as file:
+            self.meta = json.load(file)
+        if self.meta.get('format_version') != STORE_FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия формата хранилища: {self.meta.get('format_version')}")
+        self.params = list(self.meta['params'])
+        self.metrics = list(self.meta['metrics'])
+        self.columns = {**self.meta['params'], **self.meta['metrics']}
+        self._maps = {}
+
+    def __len__(self):
+        return self.meta['rows']
+
+    @property
+    def model_version(self):
+        return self.meta['model_version']
+
+    @property
+    def attributes(self):
+        """Произвольные сведения о расчете, записанные при создании"""
+        return self.meta['attributes']
+
+    def is_current(self):
+        """Рассчитано ли хранилище текущей версией модели"""
+        return self.model_version == model_fingerprint()
+
+    def categories(self, name):
+        """Категории колонки (None для числовых колонок)"""
+        return self.columns[name].get('categories')
+
+    def _file(self, name):
+        return os.path.join(self.path, f'{name}.bin')
+
+    def __getitem__(self, name):
+        if name not in self.columns:
+            raise KeyError(name)
+        rows = len(self)
+        cached = self._maps.get(name)
+        if cached is None or len(cached) != rows:
+            dtype = np.dtype(self.columns[name]['dtype'])
+            if rows == 0:
+                cached = np.empty(0, dtype=dtype)
+            else:
+                cached = np.memmap(self._file(name), dtype=dtype, mode='r', shape=(rows,))
+            self._maps[name] = cached
+        return cached
+
+    def read(self, start=0, stop=None, columns=None, decode=False):
+        """
+        Прочитать строки [start, stop) в память
+
+        Args:
+            columns: имена колонок (по умолчанию все)
+            decode: заменить номера категорий их значениями
+
+        Returns:
+            dict: имя колонки -> массив
+        """
+        result = {}
+        for name in columns or self.columns:
+            values = np.array(self[name][start:stop])
+            categories = self.categories(name)
+            if decode and categories is not None:
+                values = np.array(categories, dtype=object)[values]
+            result[name] = values
+        return result
+
+    def append(self, columns):
+        """
+        Дописать строки
+
+        Args:
+            columns: {имя колонки: массив}; нужны все колонки хранилища одинаковой длины,
+                     категориальные колонки принимают значения или их номера
+
+        Returns:
+            int: количество строк после записи
+        """
+        missing = set(self.columns) - set(columns)
+        unknown = set(columns) - set(self.columns)
+        if missing or unknown:
+            raise ValueError(f"Колонки не совпадают со схемой хранилища: "
+                             f"нет {sorted(missing)}, лишние {sorted(unknown)}")
+
+        arrays = {}
+        for name, spec in self.columns.items():
+            values = np.asarray(columns[name]).ravel()
+            if spec.get('categories') is not None and values.dtype.kind in 'UOS':
+                codes = {value: code for code, value in enumerate(spec['categories'])}
+                try:
+                    values = np.array([codes[str(value)] for value in values])
+                except KeyError as e:
+                    raise ValueError(f"Неизвестное значение колонки {name}: {e.args[0]}")
+            elif spec.get('categories') is not None and np.any((values < 0) | (values >= len(spec['categories']))):
+                raise ValueError(f"Номер категории колонки {name} вне диапазона")
+            arrays[name] = values.astype(spec['dtype'])
+        counts = {len(values) for values in arrays.values()}
+        if len(counts) != 1:
+            raise ValueError("Колонки должны иметь одинаковую длину")
+
+        rows = len(self)
+        for name, values in arrays.items():
+            # Запись с конца зафиксированных строк: хвост прерванной записи перезаписывается
+            with open(self._file(name), 'r+b') as file:
+                file.seek(rows * values.itemsize)
+                file.write(values.tobytes())
+                file.truncate()
+
+        self.meta['rows'] = rows + counts.pop()
+        self.meta['updated'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        _write_meta(self.path, self.meta)
+        return len(self)
+
+def create_store(path, params, metrics, attributes=None, model_version=None, overwrite=False):
+    """
+    Создать пустое хранилище результатов
+
+    Args:
+        path: каталог хранилища (создается)
+        params: {имя параметра: тип numpy или список категорий}
+        metrics: имена показателей (float64) или {имя показателя: тип numpy}
+        attributes: произвольные сведения о расчете (сериализуемые в JSON)
+        model_version: версия модели (по умолчанию model_fingerprint())
+        overwrite: заменить существующее хранилище
+
+    Returns:
+        ResultStore
+    """
+    path = os.fspath(path)
+    if not isinstance(metrics, dict):
+        metrics = {name: 'float64' for name in metrics}
+    overlap = set(params) & set(metrics)
+    if overlap:
+        raise ValueError(f"Имена параметров и показателей совпадают: {sorted(overlap)}")
+
+    if os.path.exists(os.path.join(path, STORE_META_FILE)):
+        if not overwrite:
+            raise FileExistsError(f"Хранилище уже существует: {path}")
+        os.remove(os.path.join(path, STORE_META_FILE))
+    os.makedirs(path, exist_ok=True)
+
+    meta = {
+        'format_version': STORE_FORMAT_VERSION,
+        'model_version': model_version or model_fingerprint(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'updated': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'rows': 0,
+        'params': {name: _column_spec(spec) for name, spec in params.items()},
+        'metrics': {name: _column_spec(spec) for name, spec in metrics.items()},
+        'attributes': attributes or {},
+    }
+    for name in list(meta['params']) + list(meta['metrics']):
+        open(os.path.join(path, f'{name}.bin'), 'wb').close()
+    # Заголовок пишется последним: хранилище без заголовка не открывается
+    _write_meta(path, meta)
+    return ResultStore(path)
+
+def open_store(path):
+    """Открыть существующее хранилище (данные не читаются до обращения к колонкам)"""
+    return ResultStore(path)
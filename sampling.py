@@ -0,0 +1,289 @@
+"""
+Квазислучайные выборки и латинский гиперкуб для исследования сценариев
+Точки единичного гиперкуба переводятся во входные параметры обратными функциями
+распределений; любую часть выборки [start, stop) можно получить независимо,
+поэтому выборки из 10^8 точек генерируются пакетами при постоянном объеме памяти
+"""
+
+import math
+import numpy as np
+
+# Направляющие числа Соболя (S. Joe, F. Y. Kuo, new-joe-kuo-6.21201) для измерений 2...21:
+# (степень s, коэффициенты a примитивного многочлена, начальные m_1 ... m_s)
+SOBOL_DIRECTIONS = (
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)),
+    (6, 16, (1, 3, 1, 13, 27, 49)),
+    (6, 19, (1, 1, 1, 15, 7, 5)),
+    (6, 22, (1, 3, 1, 15, 13, 25)),
+    (6, 25, (1, 1, 5, 5, 19, 61)),
+    (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+    (7, 4, (1, 3, 7, 13, 13, 15, 69)),
+)
+
+# Разрядность точек последовательности Соболя (до 2^32 точек)
+SOBOL_BITS = 32
+
+def _mix(z):
+    """Перемешивание 64-битных целых (финализатор SplitMix64)"""
+    z = np.asarray(z, dtype=np.uint64)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+def _primes(count):
+    """Первые count простых чисел"""
+    primes = []
+    candidate = 2
+    while len(primes) < count:
+        if all(candidate % p for p in primes if p * p <= candidate):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+class Sampler:
+    """
+    Базовый класс выборки из n точек единичного гиперкуба размерности dimensions
+
+    Точка с номером i зависит только от i и зерна, поэтому результат
+    не зависит от разбиения выборки на пакеты и количества процессов.
+    """
+
+    def __init__(self, dimensions, n, seed=None):
+        if dimensions < 1:
+            raise ValueError("Размерность должна быть положительной")
+        if n < 1:
+            raise ValueError("Количество точек должно быть положительным")
+        self.dimensions = int(dimensions)
+        self.n = int(n)
+        self._rng = np.random.default_rng(seed)
+
+    def points(self, start=0, stop=None):
+        """Точки с номерами [start, stop): массив формы (stop - start, dimensions) из [0, 1)"""
+        stop = self.n if stop is None else stop
+        if not 0 <= start <= stop <= self.n:
+            raise ValueError(f"Отрезок [{start}, {stop}) вне выборки из {self.n} точек")
+        return self._points(start, stop)
+
+    def _points(self, start, stop):
+        raise NotImplementedError
+
+    def chunks(self, chunk_size):
+        """Выдавать выборку пакетами (start, stop, точки)"""
+        for start in range(0, self.n, chunk_size):
+            stop = min(start + chunk_size, self.n)
+            yield start, stop, self._points(start, stop)
+
+class LatinHypercube(Sampler):
+    """
+    Латинский гиперкуб: по каждому измерению ровно одна точка в каждом из n интервалов
+
+    Перестановка интервалов не хранится: номер интервала точки i вычисляется
+    сетью Фейстеля с ключами измерения (с отбрасыванием значений ≥ n).
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, dimensions, n, seed=None):
+        super().__init__(dimensions, n, seed)
+        # Сеть работает на [0, 2^bits), bits - минимальная разрядность номеров точек,
+        # поэтому за пределы [0, n) попадает меньше половины значений
+        self._bits = max(2, (self.n - 1).bit_length())
+        self._keys = self._rng.integers(0, 2 ** 64, size=(self.dimensions, self.ROUNDS + 1),
+                                        dtype=np.uint64, endpoint=False)
+
+    def _feistel(self, x, keys):
+        """Несбалансированная сеть Фейстеля: биекция на [0, 2^bits)"""
+        left_bits, right_bits = self._bits // 2, self._bits - self._bits // 2
+        left, right = x >> np.uint64(right_bits), x & np.uint64((1 << right_bits) - 1)
+        for key in keys[:self.ROUNDS]:
+            # Раундовая функция: умножение на нечетную константу и сдвиг
+            mixed = (right ^ key) * np.uint64(0x9E3779B97F4A7C15)
+            left, right = right, left ^ (mixed >> np.uint64(64 - left_bits))
+            left_bits, right_bits = right_bits, left_bits
+        return (left << np.uint64(right_bits)) | right
+
+    def _permute(self, index, keys):
+        """Псевдослучайная перестановка [0, n), заданная ключами (с отбрасыванием значений ≥ n)"""
+        result = self._feistel(index, keys)
+        outside = np.flatnonzero(result >= np.uint64(self.n))
+        while len(outside):
+            values = self._feistel(result[outside], keys)
+            result[outside] = values
+            outside = outside[values >= np.uint64(self.n)]
+        return result
+
+    def _points(self, start, stop):
+        index = np.arange(start, stop, dtype=np.uint64)
+        result = np.empty((stop - start, self.dimensions))
+        for dimension, keys in enumerate(self._keys):
+            stratum = self._permute(index, keys)
+            # Положение точки внутри интервала - 53-битное число из хэша номера
+            jitter = (_mix(index ^ keys[-1]) >> np.uint64(11)).astype(float) * 2.0 ** -53
+            result[:, dimension] = (stratum.astype(float) + jitter) / self.n
+        return result
+
+class Halton(Sampler):
+    """
+    Последовательность Холтона по простым основаниям со случайными перестановками цифр
+
+    Для каждого измерения и каждого разряда используется своя случайная
+    перестановка цифр, что устраняет корреляцию старших измерений.
+    """
+
+    def __init__(self, dimensions, n, seed=None):
+        super().__init__(dimensions, n, seed)
+        self.bases = _primes(self.dimensions)
+        self._levels = []
+        for base in self.bases:
+            # Разряды номера точки и разряды, влияющие только на точность double
+            digits = max(1, math.ceil(math.log(self.n) / math.log(base) + 1e-12))
+            precision = math.ceil(53 / math.log2(base))
+            permutations = np.array([self._rng.permutation(base) for _ in range(max(digits, precision))])
+            tail = sum(permutations[level, 0] * float(base) ** -(level + 1)
+                       for level in range(digits, len(permutations)))
+            self._levels.append((digits, permutations[:digits], tail))
+
+    def _points(self, start, stop):
+        index = np.arange(start, stop, dtype=np.int64)
+        result = np.empty((stop - start, self.dimensions))
+        for dimension, (base, (digits, permutations, tail)) in enumerate(zip(self.bases, self._levels)):
+            value = np.zeros(stop - start)
+            remainder = index.copy()
+            for level in range(digits):
+                remainder, digit = np.divmod(remainder, base)
+                value += permutations[level][digit] * float(base) ** -(level + 1)
+            result[:, dimension] = value + tail
+        return result
+
+class SobolSequence(Sampler):
+    """
+    Последовательность Соболя (порядок кода Грея) со скремблированием
+
+    Скремблирование: случайное линейное преобразование направляющих чисел
+    (нижняя треугольная двоичная матрица) и цифровой сдвиг.
+    Первые 2^m точек по каждому измерению равномерно стратифицированы.
+    """
+
+    def __init__(self, dimensions, n, seed=None, scramble=True):
+        super().__init__(dimensions, n, seed)
+        if self.dimensions > len(SOBOL_DIRECTIONS) + 1:
+            raise ValueError(f"Последовательность Соболя поддерживает до {len(SOBOL_DIRECTIONS) + 1} измерений")
+        if self.n > 2 ** SOBOL_BITS:
+            raise ValueError(f"Последовательность Соболя поддерживает до 2^{SOBOL_BITS} точек")
+
+        directions = self._directions()
+        if scramble:
+            directions, shift = self._scramble(directions)
+        else:
+            shift = np.zeros(self.dimensions, dtype=np.uint64)
+        self._directions_table = directions
+        self._shift = shift
+
+    def _directions(self):
+        """Направляющие числа V[измерение, разряд] как SOBOL_BITS-битные целые"""
+        bits = SOBOL_BITS
+        table = np.zeros((self.dimensions, bits), dtype=np.uint64)
+        # Первое измерение - последовательность ван дер Корпута
+        table[0] = [1 << (bits - 1 - b) for b in range(bits)]
+        for dimension in range(1, self.dimensions):
+            degree, coefficients, initial = SOBOL_DIRECTIONS[dimension - 1]
+            v = [m << (bits - 1 - b) for b, m in enumerate(initial)]
+            for b in range(degree, bits):
+                value = v[b - degree] ^ (v[b - degree] >> degree)
+                for k in range(1, degree):
+                    if (coefficients >> (degree - 1 - k)) & 1:
+                        value ^= v[b - k]
+                v.append(value)
+            table[dimension] = v[:bits]
+        return table
+
+    def _scramble(self, directions):
+        """Случайное линейное скремблирование и цифровой сдвиг"""
+        bits = SOBOL_BITS
+        scrambled = np.zeros_like(directions)
+        for dimension in range(self.dimensions):
+            # Строка r матрицы: единица на диагонали и случайные биты старше нее
+            rows = []
+            for r in range(bits):
+                upper = int(self._rng.integers(0, 1 << r)) if r else 0
+                rows.append(((upper << (bits - r)) | (1 << (bits - 1 - r))) & ((1 << bits) - 1))
+            for b in range(bits):
+                v = int(directions[dimension, b])
+                value = 0
+                for r, row in enumerate(rows):
+                    if bin(v & row).count('1') & 1:
+                        value |= 1 << (bits - 1 - r)
+                scrambled[dimension, b] = value
+        shift = self._rng.integers(0, 2 ** bits, size=self.dimensions, dtype=np.uint64)
+        return scrambled, shift
+
+    def _point_at(self, index):
+        """Точка с номером index в порядке кода Грея (целые координаты)"""
+        gray = index ^ (index >> 1)
+        value = self._shift.copy()
+        for b in range(SOBOL_BITS):
+            if (gray >> b) & 1:
+                value ^= self._directions_table[:, b]
+        return value
+
+    def _points(self, start, stop):
+        if stop == start:
+            return np.empty((0, self.dimensions))
+        # Соседние точки в порядке кода Грея отличаются одним направляющим числом:
+        # x[i] = x[i - 1] ^ V[число младших нулей i]
+        index = np.arange(start + 1, stop, dtype=np.int64)
+        lowest_bit = np.log2((index & -index).astype(float)).astype(np.int64)
+        steps = np.empty((stop - start, self.dimensions), dtype=np.uint64)
+        steps[0] = self._point_at(start)
+        steps[1:] = self._directions_table[:, lowest_bit].T
+        values = np.bitwise_xor.accumulate(steps, axis=0)
+        return values.astype(float) * 2.0 ** -SOBOL_BITS
+
+# Методы выборки по имени
+SAMPLERS = {
+    'lhs': LatinHypercube,
+    'halton': Halton,
+    'sobol': SobolSequence,
+}
+
+def make_sampler(method, dimensions, n, seed=None):
+    """Создать выборку по имени метода из SAMPLERS"""
+    if method not in SAMPLERS:
+        raise ValueError(f"Неизвестный метод выборки: {method}")
+    return SAMPLERS[method](dimensions, n, seed)
+
+def sample_inputs(distributions, sampler, start=0, stop=None, offset=0):
+    """
+    Входные параметры для точек [start, stop) выборки
+
+    Столбцы offset ... offset + len(distributions) - 1 точек переводятся
+    во входные параметры обратными функциями распределений.
+    """
+    points = sampler.points(start, stop)
+    return {name: distribution.ppf(points[:, offset + column])
+            for column, (name, distribution) in enumerate(distributions.items())}
+
+def iter_samples(distributions, n, method='sobol', seed=None, chunk_size=1_000_000):
+    """
+    Выдавать входные параметры выборки из n точек пакетами не более chunk_size
+
+    Пример:
+        for inputs in iter_samples(range_distributions(), 10**8, 'lhs', seed=1):
+            columns = calculate_batch(dict(base_inputs, **inputs))
+    """
+    sampler = make_sampler(method, len(distributions), n, seed)
+    for start in range(0, n, chunk_size):
+        yield sample_inputs(distributions, sampler, start, min(start + chunk_size, n))
@@ -7,6 +7,10 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 from business_calculator import BusinessCalculator, compare_scenarios, create_summary_table
+from batch_calculator import batch_inputs_from_config
+from goal_seek import break_even_analysis
+from sensitivity import scan_parameter
+from result_cache import cached_financial_summary
 import json
 
 class ScenarioAnalyzer:
@@ -53,27 +57,16 @@ class ScenarioAnalyzer:
         print(f"Сценарий: {scenario}, Вариант: {variant}")
         print()
         
-        sensitivity_results = []
+        # Все значения параметра рассчитываются одним пакетом
+        columns = scan_parameter(parameter, values, batch_inputs_from_config(scenario, variant))
         
-        for value in values:
-            # Создаем временный калькулятор с измененным параметром
-            calc = BusinessCalculator(scenario, variant)
-            
-            # Изменяем параметр (упрощенная версия)
-            if parameter == 'monthly_fee':
-                calc.scenario_params['monthly_fee'] = value
-            elif parameter == 'hotels_count':
-                calc.scenario_params['hotels_count'] = value
-            elif parameter == 'equipment_cost':
-                calc.equipment_prices['cost_price_usd'] = value
-                calc.equipment_prices['selling_price_usd'] = value + calc.equipment_prices['intellectual_value_rub'] / calc.total_costs['project_fot_usd'] * calc.equipment_prices['cost_price_usd']
-            
-            summary = calc.generate_financial_summary()
+        sensitivity_results = []
+        for index, value in enumerate(values):
             sensitivity_results.append({
                 'value': value,
-                'shiwa_profit': summary['shiwa']['net_profit'],
-                'shiwa_roi': summary['shiwa']['roi'],
-                'etecsa_profit': summary['etecsa']['net_profit']
+                'shiwa_profit': columns['shiwa_net_profit'][index],
+                'shiwa_roi': columns['shiwa_roi'][index],
+                'etecsa_profit': columns['etecsa_net_profit'][index]
             })
         
         # Создаем DataFrame для анализа
@@ -90,9 +83,8 @@ class ScenarioAnalyzer:
         what_if_scenarios = []
         
         # Сценарий 1: Увеличение количества отелей на 25%
-        calc1 = BusinessCalculator('baseline', 'B')
-        calc1.scenario_params['hotels_count'] = 62  # 50 * 1.25
-        summary1 = calc1.generate_financial_summary()
+        calc1 = BusinessCalculator('baseline', 'B', overrides={'hotels_count': 62})  # 50 * 1.25
+        summary1, _ = cached_financial_summary(calc1)
         what_if_scenarios.append({
             'name': 'Увеличение отелей на 25%',
             'shiwa_profit': summary1['shiwa']['net_profit'],
@@ -101,9 +93,8 @@ class ScenarioAnalyzer:
         })
         
         # Сценарий 2: Снижение абонентской платы на 20%
-        calc2 = BusinessCalculator('baseline', 'B')
-        calc2.scenario_params['monthly_fee'] = 400  # 500 * 0.8
-        summary2 = calc2.generate_financial_summary()
+        calc2 = BusinessCalculator('baseline', 'B', overrides={'monthly_fee': 400})  # 500 * 0.8
+        summary2, _ = cached_financial_summary(calc2)
         what_if_scenarios.append({
             'name': 'Снижение платы на 20%',
             'shiwa_profit': summary2['shiwa']['net_profit'],
@@ -114,7 +105,7 @@ class ScenarioAnalyzer:
         # Сценарий 3: Увеличение затрат на 30%
         calc3 = BusinessCalculator('baseline', 'B')
         calc3.total_costs['total_costs_usd'] *= 1.3
-        summary3 = calc3.generate_financial_summary()
+        summary3, _ = cached_financial_summary(calc3)
         what_if_scenarios.append({
             'name': 'Увеличение затрат на 30%',
             'shiwa_profit': summary3['shiwa']['net_profit'],
@@ -123,10 +114,8 @@ class ScenarioAnalyzer:
         })
         
         # Сценарий 4: Комбинация: больше отелей, но меньше плата
-        calc4 = BusinessCalculator('baseline', 'B')
-        calc4.scenario_params['hotels_count'] = 75
-        calc4.scenario_params['monthly_fee'] = 400
-        summary4 = calc4.generate_financial_summary()
+        calc4 = BusinessCalculator('baseline', 'B', overrides={'hotels_count': 75, 'monthly_fee': 400})
+        summary4, _ = cached_financial_summary(calc4)
         what_if_scenarios.append({
             'name': '75 отелей по $400',
             'shiwa_profit': summary4['shiwa']['net_profit'],
@@ -150,39 +139,29 @@ class ScenarioAnalyzer:
             print(f"  Прибыль ETECSA: ${scenario['etecsa_profit']:,.0f}")
             print()
     
-    def calculate_break_even_analysis(self):
-        """Анализ точки безубыточности"""
+    def calculate_break_even_analysis(self, scenario='baseline', variant='B', equipment_type='mini',
+                                      assembly_option='shiwa_assembled', assembly_variant='80_20'):
+        """Анализ точки безубыточности по количеству отелей для заданной конфигурации"""
         print("=== АНАЛИЗ ТОЧКИ БЕЗУБЫТОЧНОСТИ ===")
         print()
         
-        # Для SHIWA NETWORK
-        calc = BusinessCalculator('baseline', 'B')
-        monthly_costs = calc.total_costs['total_costs_usd'] / 12
-        monthly_revenue_per_hotel = 500 * 0.8  # 80% от абонентской платы
-        
-        breakeven_hotels = monthly_costs / monthly_revenue_per_hotel
-        
-        print(f"SHIWA NETWORK:")
-        print(f"  Ежемесячные затраты: ${monthly_costs:,.0f}")
-        print(f"  Доход с отеля в месяц: ${monthly_revenue_per_hotel}")
-        print(f"  Точка безубыточности: {breakeven_hotels:.1f} отелей")
-        print()
-        
-        # Для ETECSA
-        etecsas_monthly_costs = ETECSA_OPERATIONAL_COSTS_USD / 12
-        etecsas_monthly_revenue_per_hotel = 500 * 0.2  # 20% от абонентской платы
-        
-        etecsas_breakeven_hotels = etecsas_monthly_costs / etecsas_monthly_revenue_per_hotel
-        
-        print(f"ETECSA:")
-        print(f"  Ежемесячные затраты: ${etecsas_monthly_costs:,.0f}")
-        print(f"  Доход с отеля в месяц: ${etecsas_monthly_revenue_per_hotel}")
-        print(f"  Точка безубыточности: {etecsas_breakeven_hotels:.1f} отелей")
-        print()
+        analysis = break_even_analysis(scenario=scenario, variant=variant, equipment_type=equipment_type,
+                                       assembly_option=assembly_option, assembly_variant=assembly_variant)
+        
+        for party, title in (('shiwa', 'SHIWA NETWORK'), ('etecsa', 'ETECSA')):
+            data = analysis[party]
+            print(f"{title}:")
+            print(f"  Ежемесячные затраты: ${data['monthly_costs']:,.0f}")
+            print(f"  Доход с отеля в месяц: ${data['monthly_revenue_per_hotel']:,.0f}")
+            if np.isnan(data['breakeven_hotels']):
+                print(f"  Точка безубыточности не достигается")
+            else:
+                print(f"  Точка безубыточности: {data['breakeven_hotels']:.1f} отелей")
+            print()
         
         return {
-            'shiwa_breakeven': breakeven_hotels,
-            'etecsa_breakeven': etecsas_breakeven_hotels
+            'shiwa_breakeven': analysis['shiwa']['breakeven_hotels'],
+            'etecsa_breakeven': analysis['etecsa']['breakeven_hotels']
         }
     
     def export_results_to_json(self, filename='scenario_analysis_results.json'):
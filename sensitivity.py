@@ -0,0 +1,157 @@
+"""
+Анализ чувствительности бизнес-модели проекта QUANTUM
+Производные и эластичности всех показателей по всем входным параметрам
+за один проход по графу (метод комплексного шага) и диаграмма «торнадо»
+"""
+
+import numpy as np
+from parameters import *
+from model_graph import FINANCIAL_MODEL
+from batch_calculator import BATCH_INPUTS, SUMMARY_COLUMNS, batch_inputs_from_config, calculate_batch
+
+# Входные параметры, по которым берутся производные (кроме признака варианта)
+DERIVATIVE_INPUTS = tuple(name for name in BATCH_INPUTS if name != 'is_sale')
+
+# Шаг комплексного дифференцирования: производная точна до машинной точности
+COMPLEX_STEP = 1e-20
+
+def parameter_inputs(parameter, values, inputs=None):
+    """
+    Входные массивы для перебора значений одного параметра
+
+    Кроме имен из BATCH_INPUTS поддерживается 'equipment_cost' - себестоимость
+    оборудования в USD (пересчитывается в equipment_cost_rub по курсу).
+    """
+    inputs = dict(batch_inputs_from_config() if inputs is None else inputs)
+    values = np.asarray(values, dtype=float)
+    if parameter == 'equipment_cost':
+        inputs['equipment_cost_rub'] = values * inputs['rub_to_usd_rate']
+    elif parameter in BATCH_INPUTS:
+        inputs[parameter] = values
+    else:
+        raise ValueError(f"Неизвестный параметр: {parameter}")
+    return inputs
+
+def scan_parameter(parameter, values, inputs=None):
+    """Показатели SUMMARY_COLUMNS для всех значений параметра одним пакетным расчетом"""
+    return calculate_batch(parameter_inputs(parameter, values, inputs))
+
+def derivatives(inputs=None, outputs=SUMMARY_COLUMNS, wrt=DERIVATIVE_INPUTS):
+    """
+    Производные и эластичности показателей по входным параметрам
+
+    Граф рассчитывается один раз для пакета из len(wrt) строк: в строке i
+    к параметру wrt[i] добавлен мнимый шаг, и Im(показатель) / шаг дает
+    производную без ошибки вычитания близких чисел.
+
+    Args:
+        inputs: скалярные входные параметры (по умолчанию базовая конфигурация)
+        outputs: показатели модели
+        wrt: параметры, по которым берутся производные
+
+    Returns:
+        dict: 'inputs', 'values' (показатель -> значение),
+              'derivatives' и 'elasticities' (показатель -> {параметр -> значение});
+              эластичность - процент изменения показателя при изменении параметра на 1%
+    """
+    inputs = dict(batch_inputs_from_config() if inputs is None else inputs)
+    unknown = set(wrt) - set(DERIVATIVE_INPUTS)
+    if unknown:
+        raise ValueError(f"Неизвестные входные параметры: {sorted(unknown)}")
+
+    perturbed = {name: inputs[name] for name in BATCH_INPUTS}
+    for row, name in enumerate(wrt):
+        column = np.full(len(wrt), inputs[name], dtype=complex)
+        column[row] += 1j * COMPLEX_STEP
+        perturbed[name] = column
+
+    with np.errstate(all='ignore'):
+        results = FINANCIAL_MODEL.evaluate(perturbed, outputs)
+
+    values, result_derivatives, elasticities = {}, {}, {}
+    for output in outputs:
+        column = np.broadcast_to(results[output], (len(wrt),))
+        value = float(column[0].real) if len(wrt) else float('nan')
+        gradient = column.imag / COMPLEX_STEP
+        values[output] = value
+        result_derivatives[output] = dict(zip(wrt, gradient.tolist()))
+        elasticities[output] = {
+            name: (derivative * float(inputs[name]) / value) if value and np.isfinite(value) else float('nan')
+            for name, derivative in zip(wrt, gradient.tolist())
+        }
+
+    return {
+        'inputs': {name: inputs[name] for name in wrt},
+        'values': values,
+        'derivatives': result_derivatives,
+        'elasticities': elasticities
+    }
+
+def tornado(output='shiwa_net_profit', inputs=None, ranges=None, relative_change=0.1):
+    """
+    Диаграмма «торнадо»: размах показателя при изменении каждого параметра
+
+    Все крайние значения рассчитываются одним пакетом из 2 × число параметров строк;
+    линейная оценка по производным приводится для сравнения.
+
+    Args:
+        output: показатель модели
+        inputs: скалярные входные параметры (по умолчанию базовая конфигурация)
+        ranges: {параметр: (минимум, максимум)}; по умолчанию ±relative_change
+                от базового значения для всех ненулевых параметров
+        relative_change: относительное изменение для диапазонов по умолчанию
+
+    Returns:
+        list: строки, упорядоченные по убыванию размаха
+    """
+    inputs = dict(batch_inputs_from_config() if inputs is None else inputs)
+    if ranges is None:
+        ranges = {name: (inputs[name] * (1 - relative_change), inputs[name] * (1 + relative_change))
+                  for name in DERIVATIVE_INPUTS if inputs[name]}
+    names = list(ranges)
+
+    sensitivity = derivatives(inputs, [output], names)
+    base = sensitivity['values'][output]
+
+    # Строка 2i - нижняя граница параметра i, строка 2i + 1 - верхняя
+    batch = {name: np.full(2 * len(names), float(inputs[name])) for name in DERIVATIVE_INPUTS}
+    batch['is_sale'] = inputs['is_sale']
+    for index, name in enumerate(names):
+        batch[name][2 * index], batch[name][2 * index + 1] = ranges[name]
+    with np.errstate(all='ignore'):
+        extremes = calculate_batch(batch)[output]
+
+    rows = []
+    for index, name in enumerate(names):
+        low, high = ranges[name]
+        output_low, output_high = float(extremes[2 * index]), float(extremes[2 * index + 1])
+        derivative = sensitivity['derivatives'][output][name]
+        rows.append({
+            'parameter': name,
+            'base_value': float(inputs[name]),
+            'low': float(low),
+            'high': float(high),
+            'output_low': output_low,
+            'output_high': output_high,
+            'swing': abs(output_high - output_low),
+            'linear_swing': abs(derivative * (high - low)),
+            'derivative': derivative,
+            'elasticity': sensitivity['elasticities'][output][name]
+        })
+
+    rows.sort(key=lambda row: -np.nan_to_num(row['swing'], nan=-1))
+    return {'output': output, 'base_value': base, 'rows': rows}
+
+def print_tornado(result, width=40, limit=10):
+    """Вывести диаграмму «торнадо» в консоль"""
+    print(f"=== ДИАГРАММА ТОРНАДО: {result['output']} (база {result['base_value']:,.0f}) ===")
+    rows = [row for row in result['rows'] if row['swing'] > 0][:limit]
+    largest = max((row['swing'] for row in rows), default=0) or 1
+    for row in rows:
+        bar = '█' * max(1, int(round(width * row['swing'] / largest)))
+        print(f"{row['parameter']:<26} {bar} {row['swing']:,.0f} (эластичность {row['elasticity']:+.2f})")
+
+if __name__ == "__main__":
+    print_tornado(tornado('shiwa_net_profit'))
+    print()
+    print_tornado(tornado('etecsa_net_profit', inputs=batch_inputs_from_config('baseline', 'A')))
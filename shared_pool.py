@@ -0,0 +1,307 @@
+"""
+Пул рабочих процессов с входными и выходными массивами в общей памяти
+Входные массивы копируются в сегменты multiprocessing.shared_memory один раз,
+задания передают только имена сегментов и границы отрезка, а рабочие процессы
+записывают результаты прямо в общий выходной буфер - массивы не сериализуются
+pickle ни при отправке заданий, ни при возврате результатов
+"""
+
+import time
+import weakref
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from batch_calculator import BATCH_INPUTS, SUMMARY_COLUMNS, batch_inputs_from_config, calculate_batch
+from parallel import resolve_workers, split_range
+
+# Строк в одном задании по умолчанию
+DEFAULT_SHARED_CHUNK = 100_000
+
+# Снимать ли подключенные сегменты с учета resource_tracker рабочего процесса
+# (нужно, если у процесса собственный resource_tracker, то есть при запуске не через fork)
+_untrack_segments = False
+
+# Сегменты, подключенные в рабочем процессе: имя -> SharedMemory
+_attached = {}
+
+def _release(segments):
+    """Закрыть и удалить сегменты (вызывается и при сборке мусора владельца)"""
+    for segment in segments.values():
+        try:
+            segment.close()
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+    segments.clear()
+
+class SharedArrays:
+    """
+    Набор именованных одномерных массивов NumPy в сегментах общей памяти
+
+    Владелец создает массивы через reserve/put и удаляет сегменты в close
+    (или при выходе из with); spec() - описание для attach_arrays в рабочих процессах.
+    reserve повторно использует сегмент, если его размера хватает, поэтому
+    набор можно держать между расчетами как рабочую область.
+    Если close не вызван, сегменты удаляются при сборке мусора или выходе из процесса.
+    """
+
+    def __init__(self):
+        self.arrays = {}
+        self._segments = {}
+        self._finalizer = weakref.finalize(self, _release, self._segments)
+
+    def reserve(self, name, size, dtype=float):
+        """
+        Массив не менее чем из size элементов в общей памяти (значения не инициализируются)
+
+        Если сегмента не хватает, он заменяется новым, и прежние массивы с этим именем
+        использовать больше нельзя.
+
+        Returns:
+            np.ndarray: первые size элементов массива
+        """
+        dtype = np.dtype(dtype)
+        size = int(size)
+        array = self.arrays.get(name)
+        if array is None or array.dtype != dtype or len(array) < size:
+            self._free(name)
+            segment = shared_memory.SharedMemory(create=True, size=max(1, size * dtype.itemsize))
+            self._segments[name] = segment
+            self.arrays[name] = np.ndarray(size, dtype=dtype, buffer=segment.buf)
+        return self.arrays[name][:size]
+
+    def put(self, name, values):
+        """Скопировать одномерный массив в общую память"""
+        values = np.asarray(values)
+        array = self.reserve(name, len(values), values.dtype)
+        array[...] = values
+        return array
+
+    def _free(self, name):
+        self.arrays.pop(name, None)
+        segment = self._segments.pop(name, None)
+        if segment is not None:
+            segment.close()
+            segment.unlink()
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def spec(self, names=None):
+        """Описание массивов для attach_arrays: имя -> (сегмент, длина, тип)"""
+        return {name: (self._segments[name].name, len(self.arrays[name]), self.arrays[name].dtype.str)
+                for name in (self.arrays if names is None else names)}
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.arrays.values())
+
+    def close(self):
+        """Удалить сегменты; массивы набора после этого недоступны"""
+        self.arrays.clear()
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def attach_arrays(spec):
+    """
+    Массивы по SharedArrays.spec() в рабочем процессе
+
+    Подключения сегментов сохраняются между заданиями (повторное отображение
+    каждый раз заново вызывало бы ошибки страниц при записи); сегменты,
+    которых нет в spec (прежние рабочие области), закрываются.
+    """
+    names = {segment_name for segment_name, _, _ in spec.values()}
+    for segment_name in set(_attached) - names:
+        _attached.pop(segment_name).close()
+    arrays = {}
+    for name, (segment_name, size, dtype) in spec.items():
+        segment = _attached.get(segment_name)
+        if segment is None:
+            segment = shared_memory.SharedMemory(name=segment_name)
+            if _untrack_segments:
+                resource_tracker.unregister(segment._name, 'shared_memory')
+            _attached[segment_name] = segment
+        arrays[name] = np.ndarray(size, dtype=dtype, buffer=segment.buf)
+    return arrays
+
+def _init_worker(untrack_segments):
+    global _untrack_segments
+    _untrack_segments = untrack_segments
+
+def _shared_chunk(task):
+    """Рассчитать строки [start, stop) и записать их в общий выходной буфер"""
+    spec, scalars, columns, size, start, stop = task
+    arrays = attach_arrays(spec)
+    output = arrays.pop('results')[:len(columns) * size].reshape(len(columns), size)
+    values = dict(scalars, **{name: array[start:stop] for name, array in arrays.items()})
+    results = calculate_batch(values)
+    for row, name in enumerate(columns):
+        output[row, start:stop] = results[name]
+    return stop - start
+
+def _pickled_chunk(task):
+    """То же, что _shared_chunk, но входы и результаты передаются через pickle (для сравнения)"""
+    values, columns = task
+    results = calculate_batch(values)
+    return {name: results[name] for name in columns}
+
+class SharedMemoryPool:
+    """
+    Пул процессов для пакетного расчета с обменом данными через общую память
+
+    Процессы и рабочая область в общей памяти создаются один раз и используются
+    всеми вызовами calculate_batch; close (или выход из with) останавливает
+    процессы и удаляет сегменты. При одном процессе расчет выполняется
+    в текущем процессе без пула и без общей памяти.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = resolve_workers(workers)
+        self._executor = None
+        self._workspace = None
+        if self.workers > 1:
+            context = multiprocessing.get_context()
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker,
+                                                 initargs=(context.get_start_method() != 'fork',))
+            self._workspace = SharedArrays()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._workspace is not None:
+            self._workspace.close()
+            self._workspace = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def calculate_batch(self, inputs=None, columns=SUMMARY_COLUMNS, chunk_size=DEFAULT_SHARED_CHUNK, **arrays):
+        """
+        То же, что batch_calculator.calculate_batch, с разбиением на задания по процессам
+
+        Args:
+            inputs: словарь входных параметров (по умолчанию базовая конфигурация)
+            columns: рассчитываемые показатели из SUMMARY_COLUMNS
+            chunk_size: строк в одном задании
+            **arrays: массивы или скаляры, заменяющие отдельные входные параметры
+
+        Returns:
+            dict: показатель -> массив формы входных массивов
+        """
+        values = dict(batch_inputs_from_config() if inputs is None else inputs)
+        values.update(arrays)
+        missing = set(BATCH_INPUTS) - set(values)
+        if missing:
+            raise ValueError(f"Не заданы входные параметры: {sorted(missing)}")
+        unknown = set(columns) - set(SUMMARY_COLUMNS)
+        if unknown:
+            raise ValueError(f"Неизвестные показатели: {sorted(unknown)}")
+
+        shape = np.broadcast_shapes(*(np.shape(values[name]) for name in BATCH_INPUTS))
+        size = int(np.prod(shape))
+        columns = tuple(columns)
+        scalars = {name: values[name] for name in BATCH_INPUTS if np.ndim(values[name]) == 0}
+        vectors = [name for name in BATCH_INPUTS if name not in scalars]
+
+        if self._executor is None:
+            flat = dict(scalars, **{name: np.broadcast_to(values[name], shape).ravel() for name in vectors})
+            output = np.empty((len(columns), size))
+            for start, stop in split_range(size, chunk_size):
+                results = calculate_batch({name: value[start:stop] if name in vectors else value
+                                           for name, value in flat.items()})
+                for row, name in enumerate(columns):
+                    output[row, start:stop] = results[name]
+            return {name: output[row].reshape(shape) for row, name in enumerate(columns)}
+
+        workspace = self._workspace
+        for name in vectors:
+            values[name] = np.broadcast_to(values[name], shape).ravel()
+            workspace.reserve(name, size, values[name].dtype)[...] = values[name]
+        output = workspace.reserve('results', len(columns) * size).reshape(len(columns), size)
+        spec = workspace.spec(vectors + ['results'])
+        tasks = [(spec, scalars, columns, size, start, stop) for start, stop in split_range(size, chunk_size)]
+        for _ in self._executor.map(_shared_chunk, tasks):
+            pass
+        # Рабочая область используется следующими вызовами, поэтому результат копируется
+        return {name: output[row].reshape(shape).copy() for row, name in enumerate(columns)}
+
+    def calculate_batch_pickled(self, inputs, columns=SUMMARY_COLUMNS, chunk_size=DEFAULT_SHARED_CHUNK):
+        """Тот же расчет с передачей отрезков массивов через pickle (для сравнения)"""
+        values = dict(inputs)
+        shape = np.broadcast_shapes(*(np.shape(values[name]) for name in BATCH_INPUTS))
+        size = int(np.prod(shape))
+        flat = {name: np.broadcast_to(value, shape).ravel() if np.ndim(value) else value
+                for name, value in values.items() if name in BATCH_INPUTS}
+        tasks = [({name: value[start:stop] if np.ndim(value) else value for name, value in flat.items()}, tuple(columns))
+                 for start, stop in split_range(size, chunk_size)]
+        mapper = self._executor.map if self._executor is not None else map
+        output = {name: np.empty(size) for name in columns}
+        for (start, stop), partial in zip(split_range(size, chunk_size), mapper(_pickled_chunk, tasks)):
+            for name in columns:
+                output[name][start:stop] = partial[name]
+        return {name: array.reshape(shape) for name, array in output.items()}
+
+def calculate_batch_shared(inputs=None, workers=None, columns=SUMMARY_COLUMNS, chunk_size=DEFAULT_SHARED_CHUNK,
+                           **arrays):
+    """Пакетный расчет на временном пуле SharedMemoryPool (см. SharedMemoryPool.calculate_batch)"""
+    with SharedMemoryPool(workers) as pool:
+        return pool.calculate_batch(inputs, columns, chunk_size, **arrays)
+
+def benchmark_transfer(size=2_000_000, workers=None, chunk_size=DEFAULT_SHARED_CHUNK, repeats=3, seed=0):
+    """
+    Сравнить передачу массивов через общую память и через pickle на одном пуле
+
+    Все входные параметры - случайные массивы длиной size (худший случай для pickle);
+    каждый способ выполняется repeats раз, сравнивается лучшее время.
+
+    Returns:
+        dict: 'rows', 'workers', 'shared_seconds', 'pickled_seconds', 'speedup', 'transferred_bytes'
+    """
+    rng = np.random.default_rng(seed)
+    inputs = batch_inputs_from_config()
+    for name in ('hotels_count', 'monthly_fee', 'success_rate', 'rub_to_usd_rate', 'cost_multiplier',
+                 'shiwa_costs_rub', 'etecsa_fixed_costs', 'hotel_annual_benefit'):
+        inputs[name] = inputs[name] * rng.uniform(0.5, 1.5, size)
+
+    def best_time(function):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = function(inputs, chunk_size=chunk_size)
+            times.append(time.perf_counter() - start)
+        return result, min(times)
+
+    # Сравнивается передача данных, поэтому пул создается и на одном ядре
+    with SharedMemoryPool(workers or max(2, resolve_workers())) as pool:
+        shared, shared_seconds = best_time(pool.calculate_batch)
+        pickled, pickled_seconds = best_time(pool.calculate_batch_pickled)
+
+    for name in SUMMARY_COLUMNS:
+        assert np.array_equal(shared[name], pickled[name], equal_nan=True)
+    vectors = [name for name in BATCH_INPUTS if np.ndim(inputs[name])]
+    return {
+        'rows': size,
+        'workers': pool.workers,
+        'shared_seconds': shared_seconds,
+        'pickled_seconds': pickled_seconds,
+        'speedup': pickled_seconds / shared_seconds,
+        'transferred_bytes': size * 8 * (len(vectors) + len(SUMMARY_COLUMNS)),
+    }
+
+if __name__ == "__main__":
+    result = benchmark_transfer()
+    print(f"=== ОБЩАЯ ПАМЯТЬ ПРОТИВ PICKLE ({result['rows']:,} строк, {result['workers']} процессов) ===")
+    print(f"Объем входов и результатов: {result['transferred_bytes'] / 1e6:,.0f} МБ")
+    print(f"Общая память: {result['shared_seconds']:.2f} с")
+    print(f"Pickle: {result['pickled_seconds']:.2f} с")
+    print(f"Ускорение: {result['speedup']:.2f}x")
@@ -0,0 +1,195 @@
+"""
+Глобальный анализ чувствительности (индексы Соболя) для бизнес-модели проекта QUANTUM
+Индексы первого порядка и полные индексы с доверительными интервалами;
+N × (k + 2) расчетов модели выполняются пакетами на всех ядрах
+"""
+
+import time
+import numpy as np
+from batch_calculator import BATCH_INPUTS, batch_inputs_from_config, calculate_batch
+from distributions import default_distributions
+from parallel import map_chunks, split_range
+from sampling import SAMPLERS, make_sampler
+from random_streams import RandomStreams, chunk_generator
+
+# Показатели, для которых рассчитываются индексы
+SOBOL_METRICS = ('shiwa_net_profit', 'payback_months')
+
+# Наибольший размер блока бутстрэп-весов (выборок × строк), примерно 16 МБ
+BOOTSTRAP_BLOCK_ELEMENTS = 2 * 1024 * 1024
+
+def _sobol_chunk(task):
+    """
+    Рассчитать f(A), f(B) и f(AB_i) для одного пакета строк (выполняется в рабочем процессе)
+
+    AB_i - матрица A, в которой столбец i взят из B. При квазислучайной выборке
+    A и B - первые и последние k координат точек выборки размерности 2k.
+    """
+    distributions, base_inputs, seed_sequence, sampler, (start, stop), metrics = task
+    names = list(distributions)
+    k = len(names)
+    size = stop - start
+
+    if sampler is None:
+        u = chunk_generator(seed_sequence).random((2, k, size))
+    else:
+        u = sampler.points(start, stop).T.reshape(2, k, size)
+    a = {name: distributions[name].ppf(u[0, i]) for i, name in enumerate(names)}
+    b = {name: distributions[name].ppf(u[1, i]) for i, name in enumerate(names)}
+
+    # Все k + 2 матрицы рассчитываются одним пакетом: блоки A, B, AB_1 ... AB_k
+    inputs = dict(base_inputs)
+    for i, name in enumerate(names):
+        blocks = [a[name], b[name]] + [b[name] if j == i else a[name] for j in range(k)]
+        inputs[name] = np.concatenate(blocks)
+    columns = calculate_batch(inputs)
+
+    return {metric: columns[metric].reshape(k + 2, size) for metric in metrics}
+
+def _metric_indices(values, names, n_bootstrap, confidence, rng):
+    """
+    Индексы и бутстрэп-интервалы для одного показателя
+
+    Индексы первого порядка - оценка Saltelli 2010, полные индексы - оценка Jansen.
+    Память - O(k × N) для слагаемых оценок и не больше BOOTSTRAP_BLOCK_ELEMENTS для весов.
+    """
+    # Строки с NaN (например, окупаемость не достигнута) исключаются
+    valid = np.all(np.isfinite(values), axis=0)
+    if not valid.all():
+        values = values[:, valid]
+    n = values.shape[1]
+    if n < 2:
+        return {'valid_share': float(valid.mean()), 'indices': {}}
+
+    # Центрирование не меняет индексы, но резко снижает дисперсию оценки первого порядка;
+    # разности f_ABi - f_A от него не зависят, поэтому центрируются только f_A и f_B
+    center = values[:2].mean()
+    f_a, f_b = values[0] - center, values[1] - center
+    k = len(values) - 2
+    with np.errstate(all='ignore'):
+        # Слагаемые оценок по строкам: f_B (f_ABi - f_A), (f_A - f_ABi)² / 2 и моменты f_A, f_B;
+        # заполняются построчно, без временных массивов размера k × N
+        terms = np.empty((2 * k + 4, n))
+        for i, f_ab in enumerate(values[2:]):
+            np.subtract(f_ab, values[0], out=terms[i])
+            terms[i] *= f_b
+            np.subtract(values[0], f_ab, out=terms[k + i])
+            np.square(terms[k + i], out=terms[k + i])
+            terms[k + i] *= 0.5
+        terms[2 * k], terms[2 * k + 1] = f_a, f_b
+        np.square(f_a, out=terms[2 * k + 2])
+        np.square(f_b, out=terms[2 * k + 3])
+
+        variance = np.concatenate([f_a, f_b]).var()
+        first = terms[:k].mean(axis=1) / variance
+        total = terms[k:2 * k].mean(axis=1) / variance
+
+        # Бутстрэп по строкам через веса: каждая выборка - число повторов строки,
+        # средние блока выборок считаются одним матричным произведением;
+        # блоки ограничивают память весов при любом N
+        means = np.empty((n_bootstrap, len(terms)))
+        block = max(1, BOOTSTRAP_BLOCK_ELEMENTS // n)
+        for start in range(0, n_bootstrap, block):
+            stop = min(start + block, n_bootstrap)
+            weights = np.empty((stop - start, n))
+            for row in weights:
+                row[:] = np.bincount(rng.integers(0, n, n), minlength=n)
+            weights /= n
+            means[start:stop] = weights @ terms.T
+        mean = (means[:, 2 * k] + means[:, 2 * k + 1]) / 2
+        boot_variance = (means[:, 2 * k + 2] + means[:, 2 * k + 3]) / 2 - mean ** 2
+        boot_first = (means[:, :k] / boot_variance[:, None]).T
+        boot_total = (means[:, k:2 * k] / boot_variance[:, None]).T
+
+    alpha = (1 - confidence) / 2 * 100
+    first_ci = np.nanpercentile(boot_first, [alpha, 100 - alpha], axis=-1)
+    total_ci = np.nanpercentile(boot_total, [alpha, 100 - alpha], axis=-1)
+
+    indices = {}
+    for i, name in enumerate(names):
+        indices[name] = {
+            'first_order': float(first[i]),
+            'first_order_ci': [float(first_ci[0, i]), float(first_ci[1, i])],
+            'total': float(total[i]),
+            'total_ci': [float(total_ci[0, i]), float(total_ci[1, i])]
+        }
+    return {'valid_share': float(valid.mean()), 'indices': indices}
+
+def run_sobol(distributions=None, n_samples=100_000, base_inputs=None, seed=None, workers=None,
+              chunk_size=20_000, metrics=SOBOL_METRICS, n_bootstrap=200, confidence=0.95, method='random'):
+    """
+    Рассчитать индексы Соболя
+
+    Args:
+        distributions: словарь {входной параметр: распределение}
+                       (по умолчанию UNCERTAINTY_RANGES из parameters.py для base_inputs)
+        n_samples: количество базовых строк N (всего N × (k + 2) расчетов)
+        base_inputs: фиксированные входные параметры (по умолчанию базовая конфигурация)
+        seed: зерно генератора случайных чисел (результат не зависит от workers)
+        workers: количество процессов (None - все ядра)
+        chunk_size: строк N в одном задании
+        metrics: показатели из SUMMARY_COLUMNS
+        n_bootstrap: количество бутстрэп-выборок для доверительных интервалов
+        confidence: уровень доверия интервалов
+        method: 'random' или метод выборки из sampling.py ('lhs', 'halton', 'sobol')
+
+    Returns:
+        dict: по каждому показателю - индексы параметров
+              {'first_order', 'first_order_ci', 'total', 'total_ci'} и доля допустимых строк
+    """
+    if base_inputs is None:
+        base_inputs = batch_inputs_from_config()
+    if distributions is None:
+        distributions = default_distributions(base_inputs)
+    unknown = set(distributions) - set(BATCH_INPUTS)
+    if unknown:
+        raise ValueError(f"Неизвестные входные параметры: {sorted(unknown)}")
+    if method != 'random' and method not in SAMPLERS:
+        raise ValueError(f"Неизвестный метод выборки: {method}")
+    names = list(distributions)
+
+    start = time.perf_counter()
+
+    chunks = split_range(n_samples, chunk_size)
+    streams = RandomStreams(seed)
+    sampler = None if method == 'random' else make_sampler(method, 2 * len(names), n_samples, streams.named('sampler'))
+    tasks = [(distributions, base_inputs, chunk_seed, sampler, chunk, metrics)
+             for chunk_seed, chunk in zip(streams.chunks(len(chunks)), chunks)]
+    partial_results = map_chunks(_sobol_chunk, tasks, workers)
+
+    bootstrap_rng = streams.generator('bootstrap')
+    results = {}
+    for metric in metrics:
+        values = np.concatenate([partial[metric] for partial in partial_results], axis=1)
+        results[metric] = _metric_indices(values, names, n_bootstrap, confidence, bootstrap_rng)
+
+    elapsed = time.perf_counter() - start
+    evaluations = n_samples * (len(names) + 2)
+
+    return {
+        'n_samples': n_samples,
+        'method': method,
+        'seed': streams.entropy,
+        'evaluations': evaluations,
+        'distributions': {name: repr(distribution) for name, distribution in distributions.items()},
+        'metrics': results,
+        'elapsed_seconds': elapsed,
+        'evaluations_per_second': evaluations / elapsed if elapsed > 0 else float('inf')
+    }
+
+def print_sobol_report(result):
+    """Вывести индексы Соболя, упорядоченные по полному индексу"""
+    print(f"=== ИНДЕКСЫ СОБОЛЯ (N = {result['n_samples']:,}, {result['evaluations']:,} расчетов) ===")
+    for metric, data in result['metrics'].items():
+        print(f"\n{metric}:")
+        if data['valid_share'] < 1:
+            print(f"  Доля допустимых строк: {data['valid_share']:.1%}")
+        ranked = sorted(data['indices'].items(), key=lambda item: -item[1]['total'])
+        for name, index in ranked:
+            print(f"  {name:<22} S1 = {index['first_order']:6.3f} "
+                  f"[{index['first_order_ci'][0]:6.3f}; {index['first_order_ci'][1]:6.3f}]  "
+                  f"ST = {index['total']:6.3f} [{index['total_ci'][0]:6.3f}; {index['total_ci'][1]:6.3f}]")
+    print(f"\nВремя расчета: {result['elapsed_seconds']:.2f} с ({result['evaluations_per_second']:,.0f} расчетов/с)")
+
+if __name__ == "__main__":
+    print_sobol_report(run_sobol(seed=42))
@@ -0,0 +1,297 @@
+"""
+Потоковая статистика для больших расчетов бизнес-модели
+Среднее и дисперсия (алгоритмы Уэлфорда и Чана), скетч квантилей с заданной
+относительной точностью и гистограммы с фиксированными интервалами;
+частичные результаты рабочих процессов объединяются без хранения значений
+"""
+
+import math
+import numpy as np
+
+# Относительная точность квантилей по умолчанию (0.1%)
+DEFAULT_RELATIVE_ACCURACY = 0.001
+
+# Наибольшее количество интервалов скетча для положительных и для отрицательных значений
+DEFAULT_MAX_BUCKETS = 32768
+
+# Значения по модулю меньше этого порога учитываются как нулевые
+SKETCH_MIN_VALUE = 1e-9
+
+class RunningMoments:
+    """Количество, среднее, дисперсия, минимум и максимум потока значений"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # сумма квадратов отклонений от среднего
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        """Добавить массив значений"""
+        values = np.asarray(values, dtype=float).ravel()
+        if len(values) == 0:
+            return self
+        batch = RunningMoments()
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        return self.merge(batch)
+
+    def merge(self, other):
+        """Объединить с другим накопителем (формула Чана для параллельных частей)"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        """Дисперсия генеральной совокупности"""
+        return self.m2 / self.count if self.count else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.count else math.nan
+
+class _Buckets:
+    """Счетчики логарифмических интервалов с плотным хранением от offset"""
+
+    def __init__(self, max_buckets):
+        self.max_buckets = max_buckets
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, indices, counts=None):
+        """Добавить значения с номерами интервалов indices (и весами counts)"""
+        if len(indices) == 0:
+            return
+        low, high = int(indices.min()), int(indices.max())
+        self._extend(low, high)
+        self.counts += np.bincount(indices - self.offset, weights=counts,
+                                   minlength=len(self.counts)).astype(np.int64)
+        self._collapse()
+
+    def merge(self, other):
+        nonzero = np.flatnonzero(other.counts)
+        if len(nonzero):
+            self.add(nonzero + other.offset, other.counts[nonzero])
+
+    def _extend(self, low, high):
+        if len(self.counts) == 0:
+            self.offset = low
+            self.counts = np.zeros(high - low + 1, dtype=np.int64)
+            return
+        new_low, new_high = min(low, self.offset), max(high, self.offset + len(self.counts) - 1)
+        if new_low == self.offset and new_high == self.offset + len(self.counts) - 1:
+            return
+        counts = np.zeros(new_high - new_low + 1, dtype=np.int64)
+        counts[self.offset - new_low:self.offset - new_low + len(self.counts)] = self.counts
+        self.offset, self.counts = new_low, counts
+
+    def _collapse(self):
+        """Объединить младшие интервалы, если их больше max_buckets (ограничение памяти)"""
+        excess = len(self.counts) - self.max_buckets
+        if excess > 0:
+            self.counts[excess] += self.counts[:excess].sum()
+            self.counts = self.counts[excess:].copy()
+            self.offset += excess
+
+class QuantileSketch:
+    """
+    Объединяемый скетч квантилей с относительной точностью (по схеме DDSketch)
+
+    Значение x попадает в интервал ceil(log_γ |x|), γ = (1 + α) / (1 - α);
+    любая оценка квантиля отличается от точного значения не более чем в (1 ± α) раз.
+    """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY, max_buckets=DEFAULT_MAX_BUCKETS):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("Относительная точность должна быть в интервале (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = _Buckets(max_buckets)
+        self.negative = _Buckets(max_buckets)
+        self.zero_count = 0
+        self.count = 0
+
+    def _index(self, magnitudes):
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    def _value(self, indices):
+        """Представитель интервала: середина в относительной мере"""
+        return 2 * np.exp(np.asarray(indices) * self._log_gamma) / (self.gamma + 1)
+
+    def update(self, values):
+        """Добавить массив конечных значений"""
+        values = np.asarray(values, dtype=float).ravel()
+        positive = values > SKETCH_MIN_VALUE
+        negative = values < -SKETCH_MIN_VALUE
+        self.positive.add(self._index(values[positive]))
+        self.negative.add(self._index(-values[negative]))
+        self.zero_count += int(len(values) - positive.sum() - negative.sum())
+        self.count += len(values)
+        return self
+
+    def merge(self, other):
+        """Объединить со скетчем той же точности"""
+        if other.gamma != self.gamma:
+            raise ValueError("Объединяемые скетчи должны иметь одинаковую точность")
+        self.positive.merge(other.positive)
+        self.negative.merge(other.negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def buckets(self):
+        """Значения-представители и количества по возрастанию значений"""
+        negative = np.flatnonzero(self.negative.counts)[::-1]
+        positive = np.flatnonzero(self.positive.counts)
+        values = np.concatenate([-self._value(negative + self.negative.offset), [0.0],
+                                 self._value(positive + self.positive.offset)])
+        counts = np.concatenate([self.negative.counts[negative], [self.zero_count],
+                                 self.positive.counts[positive]])
+        return values, counts
+
+    def quantiles(self, q):
+        """Оценки квантилей q (доли от 0 до 1)"""
+        q = np.asarray(q, dtype=float)
+        if self.count == 0:
+            return np.full(q.shape, np.nan)
+        values, counts = self.buckets()
+        cumulative = np.cumsum(counts)
+        rank = q * (self.count - 1)
+        return values[np.minimum(np.searchsorted(cumulative, rank, side='right'), len(values) - 1)]
+
+class FixedHistogram:
+    """Гистограмма с фиксированными интервалами на [low, high] и счетчиками выхода за границы"""
+
+    def __init__(self, low, high, bins=50):
+        if not high > low:
+            raise ValueError("Верхняя граница гистограммы должна быть больше нижней")
+        self.edges = np.linspace(low, high, bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        low, high = self.edges[0], self.edges[-1]
+        self.underflow += int((values < low).sum())
+        self.overflow += int((values > high).sum())
+        self.counts += np.histogram(values, bins=self.edges)[0]
+        return self
+
+    def merge(self, other):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Объединяемые гистограммы должны иметь одинаковые интервалы")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+class StreamingStatistics:
+    """
+    Потоковая статистика одного показателя: моменты, квантили и гистограмма
+
+    NaN и бесконечности (например, окупаемость не достигнута) не входят
+    в статистику, но учитываются в доле допустимых значений.
+    Если диапазон гистограммы не задан, она строится по скетчу на [min, max].
+    """
+
+    def __init__(self, bins=50, histogram_range=None, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.bins = bins
+        self.total = 0
+        self.moments = RunningMoments()
+        self.sketch = QuantileSketch(relative_accuracy)
+        self.histogram = FixedHistogram(*histogram_range, bins) if histogram_range is not None else None
+
+    def update(self, values):
+        """Добавить массив значений"""
+        values = np.asarray(values, dtype=float).ravel()
+        valid = values[np.isfinite(values)]
+        self.total += len(values)
+        self.moments.update(valid)
+        self.sketch.update(valid)
+        if self.histogram is not None:
+            self.histogram.update(valid)
+        return self
+
+    def merge(self, other):
+        """Объединить с частичным результатом (например, другого рабочего процесса)"""
+        self.total += other.total
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        if self.histogram is not None:
+            self.histogram.merge(other.histogram)
+        return self
+
+    def percentiles(self, percentiles):
+        """Оценки процентилей, ограниченные наблюдавшимися минимумом и максимумом"""
+        values = self.sketch.quantiles(np.asarray(percentiles, dtype=float) / 100)
+        return np.clip(values, self.moments.min, self.moments.max)
+
+    def histogram_counts(self):
+        """Границы и количества гистограммы"""
+        if self.histogram is not None:
+            return self.histogram.edges, self.histogram.counts
+        low, high = self.moments.min, self.moments.max
+        if high == low:
+            low, high = low - 0.5, high + 0.5
+        values, counts = self.sketch.buckets()
+        counts, edges = np.histogram(np.clip(values, low, high), bins=self.bins, range=(low, high), weights=counts)
+        return edges, counts.astype(np.int64)
+
+    def summary(self, percentiles=(5, 25, 50, 75, 95)):
+        """Статистика в формате отчетов моделирования"""
+        if self.moments.count == 0:
+            return {'valid_share': 0.0}
+        edges, counts = self.histogram_counts()
+        return {
+            'valid_share': self.moments.count / self.total,
+            'mean': self.moments.mean,
+            'std': self.moments.std,
+            'min': self.moments.min,
+            'max': self.moments.max,
+            'percentiles': {f'p{p}': float(v) for p, v in zip(percentiles, self.percentiles(percentiles))},
+            'histogram': {'edges': edges.tolist(), 'counts': counts.tolist()}
+        }
+
+def summarize_columns(batches, metrics, bins=50, histogram_ranges=None,
+                      relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+    """
+    Потоковая статистика по пакетам результатов calculate_batch
+
+    Args:
+        batches: итерируемые словари {показатель: массив}
+        metrics: показатели, по которым собирается статистика
+        bins: количество интервалов гистограмм
+        histogram_ranges: {показатель: (минимум, максимум)} для гистограмм с фиксированными интервалами
+        relative_accuracy: относительная точность квантилей
+
+    Returns:
+        dict: показатель -> StreamingStatistics
+    """
+    statistics = new_statistics(metrics, bins, histogram_ranges, relative_accuracy)
+    for columns in batches:
+        for metric in metrics:
+            statistics[metric].update(columns[metric])
+    return statistics
+
+def new_statistics(metrics, bins=50, histogram_ranges=None, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+    """Пустые накопители StreamingStatistics для показателей metrics"""
+    histogram_ranges = histogram_ranges or {}
+    return {metric: StreamingStatistics(bins, histogram_ranges.get(metric), relative_accuracy) for metric in metrics}
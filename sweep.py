@@ -0,0 +1,188 @@
+"""
+Перебор всего пространства конфигураций проекта QUANTUM
+сценарий × вариант × тип оборудования × вариант сборки × распределение доходов × числовые сетки;
+расчет распределяется по пулу процессов, результат - столбцовый куб
+"""
+
+import time
+import itertools
+import numpy as np
+from parameters import *
+from batch_calculator import BATCH_INPUTS, SUMMARY_COLUMNS, stack_config_inputs, calculate_batch
+from parallel import imap_chunks, split_range, resolve_workers
+from result_store import create_store, open_store
+
+# Категориальные измерения куба (в порядке осей) и их значения по умолчанию
+SWEEP_CATEGORIES = {
+    'scenario': ('baseline', 'optimistic', 'pessimistic'),
+    'variant': ('A', 'B'),
+    'equipment_type': tuple(EQUIPMENT_TYPES),
+    'assembly_option': tuple(ASSEMBLY_OPTIONS),
+    'assembly_variant': tuple(LOCAL_ASSEMBLY_VARIANTS),
+}
+
+def validate_categories(categories):
+    """
+    Проверить категориальные измерения: только оси и значения из SWEEP_CATEGORIES
+
+    Raises:
+        ValueError: неизвестная ось или значение (иначе расчет молча взял бы значение по умолчанию)
+    """
+    unknown = set(categories) - set(SWEEP_CATEGORIES)
+    if unknown:
+        raise ValueError(f"Неизвестные категориальные измерения: {sorted(unknown)}")
+    for name, values in categories.items():
+        unknown = [value for value in values if value not in SWEEP_CATEGORIES[name]]
+        if unknown:
+            raise ValueError(f"Неизвестные значения {name}: {unknown} (допустимы {list(SWEEP_CATEGORIES[name])})")
+
+def _combination_inputs(categories):
+    """Входные параметры для всех сочетаний категорий (массивы длиной число сочетаний)"""
+    names = list(categories)
+    configs = [dict(zip(names, values)) for values in itertools.product(*categories.values())]
+    inputs = stack_config_inputs(configs)
+    # Параметры, одинаковые для всех сочетаний, остаются скалярами
+    return {name: values[0] if np.all(values == values[0]) else values for name, values in inputs.items()}
+
+def _sweep_chunk(task):
+    """Рассчитать строки куба [start, stop) (выполняется в рабочем процессе)"""
+    start, stop, shape, combinations, grids, columns = task
+    n_categories = len(shape) - len(grids)
+
+    index = np.unravel_index(np.arange(start, stop), shape)
+    combination = np.ravel_multi_index(index[:n_categories], shape[:n_categories])
+
+    inputs = {}
+    for name, values in combinations.items():
+        inputs[name] = values[combination] if isinstance(values, np.ndarray) else values
+    for axis, (name, values) in enumerate(grids.items(), start=n_categories):
+        inputs[name] = values[index[axis]]
+
+    results = calculate_batch(inputs)
+    return {name: results[name] for name in columns}
+
+def run_sweep(grids=None, categories=None, columns=SUMMARY_COLUMNS, workers=None, chunk_size=250_000, store=None,
+              progress=None, mp_context=None):
+    """
+    Рассчитать показатели для декартова произведения всех измерений
+
+    Args:
+        grids: числовые сетки {входной параметр из BATCH_INPUTS: значения},
+               например {'hotels_count': range(10, 101), 'monthly_fee': [400, 500, 600]}
+        categories: категориальные измерения (по умолчанию SWEEP_CATEGORIES);
+                    можно передать подмножество значений, например {'variant': ['B']}
+        columns: рассчитываемые показатели из SUMMARY_COLUMNS
+        workers: количество процессов (None - все ядра)
+        chunk_size: количество строк куба в одном задании
+        store: каталог хранилища результатов (result_store); если задан, строки куба
+               дописываются на диск по мере расчета, а колонки результата - memmap
+        progress: функция progress(готово строк, всего строк), вызывается после каждого задания;
+                  исключение в ней прерывает расчет (оставшиеся задания отменяются)
+        mp_context: контекст multiprocessing для пула процессов (см. parallel.imap_chunks)
+
+    Returns:
+        dict: 'dimensions' (имя оси -> значения), 'shape', 'columns' (показатель -> массив формы shape),
+              'rows', 'workers', 'elapsed_seconds', 'rows_per_second' (и 'store' - путь хранилища)
+    """
+    grids = {name: np.asarray(values) for name, values in (grids or {}).items()}
+    unknown = set(grids) - set(BATCH_INPUTS)
+    if unknown:
+        raise ValueError(f"Неизвестные входные параметры: {sorted(unknown)}")
+    unknown = set(columns) - set(SUMMARY_COLUMNS)
+    if unknown:
+        raise ValueError(f"Неизвестные показатели: {sorted(unknown)}")
+
+    validate_categories(categories or {})
+    categories = {name: tuple((categories or {}).get(name, default)) for name, default in SWEEP_CATEGORIES.items()}
+    dimensions = dict(categories, **{name: values.tolist() for name, values in grids.items()})
+    shape = tuple(len(values) for values in dimensions.values())
+    rows = int(np.prod(shape))
+    workers = resolve_workers(workers)
+
+    start = time.perf_counter()
+
+    combinations = _combination_inputs(categories)
+    tasks = [(chunk_start, chunk_stop, shape, combinations, grids, tuple(columns))
+             for chunk_start, chunk_stop in split_range(rows, chunk_size)]
+
+    if store is not None:
+        # Параметры строки: номера категорий и значения числовых сеток
+        params = dict(categories, **{name: values.dtype for name, values in grids.items()})
+        result_store = create_store(store, params, columns, overwrite=True,
+                                    attributes={'dimensions': dimensions, 'shape': shape})
+
+    # Результаты заданий сразу копируются в куб (или на диск), чтобы не держать их все в памяти
+    cube = {name: np.empty(shape) for name in columns} if store is None else None
+    for (chunk_start, chunk_stop, *_), partial in zip(tasks, imap_chunks(_sweep_chunk, tasks, workers, mp_context)):
+        if store is None:
+            for name in columns:
+                cube[name].reshape(-1)[chunk_start:chunk_stop] = partial[name]
+        else:
+            index = np.unravel_index(np.arange(chunk_start, chunk_stop), shape)
+            for axis, (name, values) in enumerate(dimensions.items()):
+                partial[name] = index[axis] if name in categories else grids[name][index[axis]]
+            result_store.append(partial)
+        if progress is not None:
+            progress(chunk_stop, rows)
+
+    elapsed = time.perf_counter() - start
+
+    if store is not None:
+        cube = {name: result_store[name].reshape(shape) for name in columns}
+
+    return {
+        'dimensions': dimensions,
+        'shape': shape,
+        'columns': cube,
+        'rows': rows,
+        'workers': min(workers, len(tasks)),
+        'elapsed_seconds': elapsed,
+        'rows_per_second': rows / elapsed if elapsed > 0 else float('inf'),
+        **({'store': store} if store is not None else {})
+    }
+
+def save_sweep(result, path):
+    """Сохранить куб в столбцовом формате .npz (оси - dim_<имя>, показатели - по имени)"""
+    arrays = {f'dim_{name}': np.asarray(values) for name, values in result['dimensions'].items()}
+    arrays.update(result['columns'])
+    np.savez(path, **arrays)
+
+def load_sweep(path):
+    """Загрузить куб, сохраненный save_sweep"""
+    with np.load(path) as data:
+        dimensions = {key[4:]: data[key].tolist() for key in data.files if key.startswith('dim_')}
+        columns = {key: data[key] for key in data.files if not key.startswith('dim_')}
+    shape = tuple(len(values) for values in dimensions.values())
+    return {'dimensions': dimensions, 'shape': shape, 'columns': columns, 'rows': int(np.prod(shape))}
+
+def open_sweep(path):
+    """Открыть куб из хранилища run_sweep(store=...) без чтения данных (колонки - memmap)"""
+    store = open_store(path)
+    dimensions = store.attributes['dimensions']
+    shape = tuple(store.attributes['shape'])
+    columns = {name: store[name].reshape(shape) for name in store.metrics}
+    return {'dimensions': dimensions, 'shape': shape, 'columns': columns, 'rows': len(store),
+            'model_version': store.model_version}
+
+def print_sweep_report(result, metric='shiwa_net_profit'):
+    """Вывести размер куба, производительность и лучшие конфигурации"""
+    print(f"=== ПЕРЕБОР КОНФИГУРАЦИЙ ({result['rows']:,} строк) ===")
+    for name, values in result['dimensions'].items():
+        print(f"  {name}: {len(values)} значений")
+    print(f"Время расчета: {result['elapsed_seconds']:.2f} с на {result['workers']} процессах "
+          f"({result['rows_per_second']:,.0f} строк/с)")
+    print()
+
+    values = result['columns'][metric]
+    print(f"Лучшие конфигурации по {metric}:")
+    for flat_index in np.argsort(values, axis=None)[::-1][:5]:
+        index = np.unravel_index(flat_index, result['shape'])
+        config = ", ".join(f"{name}={dimension[i]}" for (name, dimension), i in zip(result['dimensions'].items(), index))
+        print(f"  {values[index]:,.0f}: {config}")
+
+if __name__ == "__main__":
+    print_sweep_report(run_sweep(grids={
+        'hotels_count': np.arange(10, 201, 2),
+        'monthly_fee': np.linspace(300, 700, 21),
+        'rub_to_usd_rate': np.linspace(70, 100, 11),
+    }))
@@ -0,0 +1,84 @@
+"""
+Тест кэша ответов /api/calculate и ETag
+"""
+
+import os
+import tempfile
+import parameters
+from app import app, calculate_cache
+
+def _post(client, data, etag=None):
+    headers = {'If-None-Match': etag} if etag else {}
+    return client.post('/api/calculate', json=data, headers=headers)
+
+def test_calculate_cache_and_etag():
+    """Повторный запрос берется из кэша, неизменный ответ - 304, изменение таблиц сбрасывает кэш"""
+    print("=== ТЕСТ КЭША /api/calculate ===")
+
+    previous = os.environ.get('QUANTUM_CACHE_DIR')
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['QUANTUM_CACHE_DIR'] = directory
+        try:
+            calculate_cache.clear()
+            client = app.test_client()
+            data = {'scenario': 'baseline', 'variant': 'A', 'hotels_count': 50, 'monthly_fee': 500}
+
+            first = _post(client, data)
+            assert first.status_code == 200 and first.headers['X-Cache'] == 'MISS'
+            etag = first.headers['ETag']
+
+            # Порядок ключей и тип равных чисел не влияют на ключ кэша
+            second = _post(client, {'monthly_fee': 500.0, 'hotels_count': 50, 'variant': 'A', 'scenario': 'baseline'})
+            assert second.headers['X-Cache'] == 'HIT' and second.headers['ETag'] == etag
+            # Время ответа задается заново, остальные данные берутся из кэша
+            first_data, second_data = first.get_json()['data'], second.get_json()['data']
+            assert second_data.pop('timestamp') > first_data.pop('timestamp')
+            assert second_data == first_data
+
+            not_modified = _post(client, data, etag)
+            assert not_modified.status_code == 304 and not_modified.get_data() == b''
+            assert _post(client, dict(data, hotels_count=60), etag).status_code == 200
+
+            # Изменение таблицы параметров в памяти сбрасывает кэш
+            cost = parameters.EQUIPMENT_TYPES['mini']['cost_rub']
+            parameters.EQUIPMENT_TYPES['mini']['cost_rub'] = cost * 2
+            try:
+                changed = _post(client, data, etag)
+                assert changed.status_code == 200 and changed.headers['X-Cache'] == 'MISS'
+                assert changed.headers['ETag'] != etag
+                assert (changed.get_json()['data']['equipment_prices']['base_cost_rub'] ==
+                        first.get_json()['data']['equipment_prices']['base_cost_rub'] * 2)
+            finally:
+                parameters.EQUIPMENT_TYPES['mini']['cost_rub'] = cost
+
+            stats = client.get('/api/cache/stats').get_json()['data']
+            assert stats['calculate']['hits'] == 2 and stats['calculate']['misses'] == 3
+            assert stats['calculate']['invalidations'] == 1
+            assert stats['results']['directory'] == directory
+            print(f"Статистика: {stats['calculate']}")
+
+            assert _post(client, {'hotels_count': 'много'}).status_code == 400
+        finally:
+            if previous is None:
+                os.environ.pop('QUANTUM_CACHE_DIR', None)
+            else:
+                os.environ['QUANTUM_CACHE_DIR'] = previous
+            calculate_cache.clear()
+
+def test_memory_cache_ttl_and_lru():
+    """Просроченные и давно не использованные записи вытесняются"""
+    print("\n=== ТЕСТ LRU И ВРЕМЕНИ ЖИЗНИ ===")
+    from result_cache import MemoryCache
+
+    cache = MemoryCache(max_entries=2, ttl=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None and cache.get('a') == 1 and cache.evictions == 1
+
+    cache.ttl = -1
+    cache.put('d', 4)
+    assert cache.get('d') is None and cache.expirations == 1
+    assert cache.get('a', version='v2') is None and cache.invalidations == 1
+    print(f"Статистика: {cache.stats()}")
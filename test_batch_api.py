@@ -0,0 +1,56 @@
+"""
+Тест пакетного расчета /api/calculate/batch
+"""
+
+import numpy as np
+from app import app
+from business_calculator import BusinessCalculator
+
+def _summary(scenario, variant, **overrides):
+    return BusinessCalculator(scenario, variant, overrides=overrides).generate_financial_summary()
+
+def test_batch_configs():
+    """Список конфигураций рассчитывается за один запрос и совпадает с калькулятором"""
+    print("=== ТЕСТ СПИСКА КОНФИГУРАЦИЙ ===")
+
+    client = app.test_client()
+    configs = [{'scenario': scenario, 'variant': variant, 'hotels_count': hotels}
+               for scenario in ('baseline', 'pessimistic') for variant in ('A', 'B') for hotels in (5, 40, 120)]
+    response = client.post('/api/calculate/batch', json={'configs': configs})
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['rows'] == len(configs) and 'dimensions' not in data
+
+    for index, config in enumerate(configs):
+        summary = _summary(config['scenario'], config['variant'], hotels_count=config['hotels_count'])
+        assert np.isclose(data['columns']['shiwa_net_profit'][index], summary['shiwa']['net_profit'])
+        assert np.isclose(data['columns']['etecsa_net_profit'][index], summary['etecsa']['net_profit'])
+    # Недостижимая окупаемость передается как null
+    payback = data['columns']['payback_months']
+    assert all(value is None or np.isfinite(value) for value in payback)
+    print(f"{data['rows']} конфигураций за {data['elapsed_ms']:.1f} мс")
+
+def test_batch_grid():
+    """Сетка раскрывается в C-порядке осей запроса"""
+    print("\n=== ТЕСТ СЕТКИ ===")
+
+    client = app.test_client()
+    response = client.post('/api/calculate/batch', json={
+        'grid': {'monthly_fee': {'start': 400, 'stop': 600, 'num': 3}, 'variant': ['A', 'B']},
+        'base': {'scenario': 'optimistic', 'hotels_count': 60},
+        'columns': ['shiwa_net_profit']
+    })
+    data = response.get_json()['data']
+    assert data['dimensions'] == {'monthly_fee': [400.0, 500.0, 600.0], 'variant': ['A', 'B']}
+    assert list(data['columns']) == ['shiwa_net_profit'] and data['rows'] == 6
+
+    expected = [_summary('optimistic', variant, hotels_count=60, monthly_fee=fee)['shiwa']['net_profit']
+                for fee in (400.0, 500.0, 600.0) for variant in ('A', 'B')]
+    assert np.allclose(data['columns']['shiwa_net_profit'], expected)
+
+    for body in ({}, {'configs': []}, {'grid': {'hotel_count': [10]}}, {'configs': [{}], 'columns': ['profit']},
+                 {'grid': {'hotels_count': []}}, {'grid': {'variant': ['A', 'Z', 'B']}},
+                 {'grid': {'equipment_type': ['mini', 'bogus']}}, {'grid': {'hotels_count': [10]}, 'base': {'scenario': 'x'}}):
+        response = client.post('/api/calculate/batch', json=body)
+        assert response.status_code == 400
+        print(f"Ошибка: {response.get_json()['error']}")
@@ -0,0 +1,89 @@
+"""
+Тест векторизованного пакетного расчета
+"""
+
+import itertools
+import time
+import numpy as np
+from business_calculator import BusinessCalculator
+from batch_calculator import calculate_batch, batch_inputs_from_config, stack_config_inputs
+
+def _all_configs():
+    """Все комбинации сценариев, вариантов, оборудования и сборки"""
+    return [
+        {'scenario': s, 'variant': v, 'equipment_type': e, 'assembly_option': a, 'assembly_variant': av}
+        for s, v, e, a, av in itertools.product(
+            ['baseline', 'optimistic', 'pessimistic'], ['A', 'B'], ['mini', '1u_2u'],
+            ['shiwa_assembled', 'etecsa_assembly', 'mixed_approach'], ['80_20', '50_50'])
+    ]
+
+def test_batch_matches_calculator():
+    """Пакетный расчет совпадает с BusinessCalculator для всех конфигураций"""
+    print("=== ТЕСТ СОВПАДЕНИЯ ПАКЕТНОГО РАСЧЕТА ===")
+
+    configs = _all_configs()
+    columns = calculate_batch(stack_config_inputs(configs))
+
+    for i, config in enumerate(configs):
+        calc = BusinessCalculator(**config)
+        summary = calc.generate_financial_summary()
+        payback = calc.calculate_payback_period()
+
+        assert columns['effective_hotels'][i] == summary['effective_hotels']
+        assert columns['shiwa_total_revenue'][i] == summary['shiwa']['total_revenue']
+        assert columns['shiwa_total_costs'][i] == summary['shiwa']['total_costs']
+        assert columns['shiwa_net_profit'][i] == summary['shiwa']['net_profit']
+        assert columns['shiwa_roi'][i] == summary['shiwa']['roi']
+        assert columns['shiwa_profit_margin'][i] == summary['shiwa']['profit_margin']
+        assert columns['etecsa_equipment_profit'][i] == summary['etecsa']['equipment_profit']
+        assert columns['etecsa_subscription_revenue'][i] == summary['etecsa']['subscription_revenue']
+        assert columns['etecsa_operational_costs'][i] == summary['etecsa']['operational_costs']
+        assert columns['etecsa_net_profit'][i] == summary['etecsa']['net_profit']
+        assert columns['hotels_annual_cost'][i] == summary['hotels']['annual_cost']
+        assert columns['hotels_roi'][i] == summary['hotels']['roi']
+        if payback:
+            assert columns['payback_months'][i] == payback['payback_months']
+        else:
+            assert np.isnan(columns['payback_months'][i])
+
+    print(f"Проверено конфигураций: {len(configs)}")
+
+def test_batch_broadcasting():
+    """Скалярные параметры транслируются на форму массивов"""
+    print("\n=== ТЕСТ ТРАНСЛЯЦИИ МАССИВОВ ===")
+
+    hotels = np.arange(10, 110, 10)
+    columns = calculate_batch(hotels_count=hotels)
+
+    assert columns['shiwa_net_profit'].shape == hotels.shape
+    assert columns['hotels_total_benefit'].shape == hotels.shape
+    assert np.all(np.diff(columns['shiwa_net_profit']) > 0)
+
+    try:
+        batch_inputs_from_config(unknown_param=1)
+        assert False, "Ожидалась ошибка для неизвестного параметра"
+    except ValueError as e:
+        print(f"Ошибка для неизвестного параметра: {e}")
+
+def test_batch_performance():
+    """Расчет миллиона комбинаций за один вызов"""
+    print("\n=== ТЕСТ ПРОИЗВОДИТЕЛЬНОСТИ ===")
+
+    n = 1_000_000
+    rng = np.random.default_rng(0)
+    inputs = batch_inputs_from_config()
+    inputs['hotels_count'] = rng.uniform(10, 100, n)
+    inputs['monthly_fee'] = rng.uniform(300, 700, n)
+    inputs['rub_to_usd_rate'] = rng.uniform(70, 100, n)
+
+    start = time.perf_counter()
+    columns = calculate_batch(inputs)
+    elapsed = time.perf_counter() - start
+
+    assert columns['shiwa_net_profit'].shape == (n,)
+    print(f"Рассчитано {n:,} комбинаций за {elapsed:.3f} с")
+
+if __name__ == "__main__":
+    test_batch_matches_calculator()
+    test_batch_broadcasting()
+    test_batch_performance()
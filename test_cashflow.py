@@ -0,0 +1,81 @@
+"""
+Тест помесячного денежного потока
+"""
+
+import time
+import numpy as np
+from business_calculator import BusinessCalculator
+from cashflow import calculate_cash_flows, payback_month, rollout_profile
+from parameters import EQUIPMENT_TYPES, ASSEMBLY_OPTIONS, LOCAL_ASSEMBLY_VARIANTS
+
+def test_annual_parity():
+    """Накопленный поток за 12 месяцев равен годовой прибыли модели"""
+    print("=== ТЕСТ СОГЛАСОВАННОСТИ С ГОДОВОЙ МОДЕЛЬЮ ===")
+
+    for scenario in ['baseline', 'optimistic', 'pessimistic']:
+        for variant in ['A', 'B']:
+            for equipment_type in EQUIPMENT_TYPES:
+                for assembly_option in ASSEMBLY_OPTIONS:
+                    for assembly_variant in LOCAL_ASSEMBLY_VARIANTS:
+                        calc = BusinessCalculator(scenario, variant, equipment_type, assembly_option, assembly_variant)
+                        summary = calc.generate_financial_summary()
+                        flows = calc.calculate_monthly_cash_flow()
+
+                        assert np.isclose(flows['shiwa_cumulative'][11], summary['shiwa']['net_profit'])
+                        assert np.isclose(flows['etecsa_cumulative'][11], summary['etecsa']['net_profit'])
+                        assert np.isclose(flows['shiwa_revenue'][:12].sum(), summary['shiwa']['total_revenue'])
+    print("Годовые итоги совпадают для всех конфигураций")
+
+def test_payback_month():
+    """Месяц окупаемости - первый месяц, после которого накопленный поток неотрицателен"""
+    print("\n=== ТЕСТ МЕСЯЦА ОКУПАЕМОСТИ ===")
+
+    cumulative = np.array([
+        [-100, -50, 0, 50, 100],    # окупается в 3-м месяце
+        [10, -5, 20, 30, 40],       # временный минус во 2-м месяце
+        [-100, -90, -80, -70, -60], # не окупается
+        [5, 10, 15, 20, 25],        # сразу
+    ])
+    months = payback_month(cumulative)
+    assert np.array_equal(months, [3, 3, np.nan, 1], equal_nan=True)
+
+    active, new = rollout_profile(6, 3)
+    assert np.allclose(active, [1/3, 2/3, 1, 1, 1, 1])
+    assert np.isclose(new.sum(), 1)
+
+def test_rollout_delays_payback():
+    """Постепенное подключение отелей откладывает окупаемость"""
+    print("\n=== ТЕСТ ПОСТЕПЕННОГО ПОДКЛЮЧЕНИЯ ===")
+
+    calc = BusinessCalculator('baseline', 'B')
+    immediate = calc.calculate_monthly_cash_flow(horizon_months=60)
+    gradual = calc.calculate_monthly_cash_flow(horizon_months=60, rollout_months=24)
+    assert gradual['etecsa_payback_month'] > immediate['etecsa_payback_month']
+    print(f"ETECSA: {immediate['etecsa_payback_month']:.0f} -> {gradual['etecsa_payback_month']:.0f} мес.")
+
+    payback = calc.calculate_payback_period()
+    assert payback['payback_month'] == immediate['shiwa_payback_month']
+
+def test_batch_cash_flows_performance():
+    """10 000 сценариев на горизонте 120 месяцев"""
+    print("\n=== ТЕСТ ПРОИЗВОДИТЕЛЬНОСТИ ===")
+
+    n = 10_000
+    hotels = np.linspace(10, 100, n)
+    start = time.perf_counter()
+    flows = calculate_cash_flows(horizon_months=120, rollout_months=18, hotels_count=hotels)
+    elapsed = time.perf_counter() - start
+
+    assert flows['shiwa_cumulative'].shape == (n, 120)
+    assert flows['shiwa_payback_month'].shape == (n,)
+
+    single = calculate_cash_flows(horizon_months=120, rollout_months=18, hotels_count=hotels[-1])
+    assert np.allclose(flows['shiwa_cumulative'][-1], single['shiwa_cumulative'])
+    print(f"{n} сценариев x 120 месяцев за {elapsed:.3f} с")
+    assert elapsed < 2.0
+
+if __name__ == "__main__":
+    test_annual_parity()
+    test_payback_month()
+    test_rollout_delays_payback()
+    test_batch_cash_flows_performance()
@@ -0,0 +1,89 @@
+"""
+Тест обработки параллельных запросов: изоляция параметров запросов и потокобезопасность кэшей
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from app import app
+from batch_calculator import batch_inputs_from_config, calculate_batch
+from business_calculator import BusinessCalculator
+from check_concurrency import app_transport, run_stress, print_stress_report
+from parameters import BASELINE_SCENARIO, RUB_TO_USD_RATE
+from result_cache import ResultCache
+
+def test_parallel_clients_match_serial(monkeypatch):
+    """Ответы параллельных клиентов совпадают с последовательными"""
+    print("=== ТЕСТ ПАРАЛЛЕЛЬНЫХ КЛИЕНТОВ ===")
+
+    # Без общего кэша на диске каждый запрос рассчитывается заново
+    monkeypatch.delenv('QUANTUM_CACHE_DIR', raising=False)
+    result = run_stress(app_transport(app), clients=8, requests_count=120, seed=7)
+    print_stress_report(result)
+    assert result['mismatches'] == []
+    assert result['errors'] == []
+
+def test_request_overrides_are_isolated(monkeypatch):
+    """Параметры одного запроса не попадают в следующие запросы и общие таблицы"""
+    print("\n=== ТЕСТ ИЗОЛЯЦИИ ПАРАМЕТРОВ ===")
+
+    monkeypatch.delenv('QUANTUM_CACHE_DIR', raising=False)
+    client = app.test_client()
+    hotels_count = BASELINE_SCENARIO['hotels_count']
+    barrier = threading.Barrier(8)
+
+    def post(index):
+        barrier.wait()
+        body = {'scenario': 'baseline', 'variant': 'B', 'hotels_count': 1 + index, '_request': index}
+        return client.post('/api/calculate', json=body).get_json()['data']['summary']['hotels_count']
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert list(executor.map(post, range(8))) == [1 + index for index in range(8)]
+
+    summary = client.post('/api/calculate', json={'scenario': 'baseline', '_request': 'plain'}).get_json()['data']['summary']
+    assert summary['hotels_count'] == hotels_count == BASELINE_SCENARIO['hotels_count']
+
+    # Цена оборудования и курс из запроса - входные величины модели этого запроса
+    config = {'scenario': 'baseline', 'variant': 'A', 'equipment_type': '1u_2u', 'assembly_option': 'mixed_approach'}
+    plain = client.post('/api/calculate', json=config).get_json()['data']
+    assert plain['equipment_prices'] == BusinessCalculator('baseline', 'A', '1u_2u', 'mixed_approach').equipment_prices
+    for extra, overrides in (({'equipment_cost': 999}, {'equipment_cost_rub': 999 * RUB_TO_USD_RATE}),
+                             ({'exchange_rate': 90}, {'rub_to_usd_rate': 90}),
+                             ({'equipment_cost': 999, 'exchange_rate': 90},
+                              {'equipment_cost_rub': 999 * 90, 'rub_to_usd_rate': 90})):
+        custom = client.post('/api/calculate', json=dict(config, **extra)).get_json()['data']
+        expected = BusinessCalculator('baseline', 'A', '1u_2u', 'mixed_approach', overrides=overrides)
+        assert custom['summary'] == json.loads(json.dumps(expected.generate_financial_summary()))
+        assert custom['costs'] == expected.total_costs
+        for party in ('shiwa', 'etecsa'):
+            assert custom['summary'][party]['net_profit'] != plain['summary'][party]['net_profit']
+        assert custom['equipment_prices']['equipment_type'] == '1u_2u'
+        if 'equipment_cost' in extra:
+            assert np.isclose(custom['equipment_prices']['base_cost_usd'], 999)
+
+    # Тот же расчет пакетной моделью с теми же входными величинами
+    inputs = batch_inputs_from_config('baseline', 'A', '1u_2u', 'mixed_approach', equipment_cost_rub=999 * 90,
+                                      rub_to_usd_rate=90)
+    batch = calculate_batch({name: np.array([value]) for name, value in inputs.items()})
+    assert np.isclose(custom['summary']['shiwa']['net_profit'], batch['shiwa_net_profit'][0])
+    assert np.isclose(custom['summary']['etecsa']['net_profit'], batch['etecsa_net_profit'][0])
+    print(f"Отелей по умолчанию: {summary['hotels_count']}")
+
+def test_result_cache_threads(tmp_path):
+    """Счетчики кэша на диске точны при обращении из нескольких потоков"""
+    print("\n=== ТЕСТ КЭША ИЗ НЕСКОЛЬКИХ ПОТОКОВ ===")
+
+    cache = ResultCache(tmp_path / 'cache', model_version='test')
+
+    def work(index):
+        return cache.get_or_compute('square', {'x': index % 10}, lambda: (index % 10) ** 2)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        values = list(executor.map(work, range(400)))
+    assert values == [(index % 10) ** 2 for index in range(400)]
+
+    stats = cache.stats()
+    assert stats['hits'] + stats['misses'] == 400
+    assert stats['misses'] == stats['writes'] and stats['entries'] == 10
+    print(stats)
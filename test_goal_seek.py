@@ -0,0 +1,88 @@
+"""
+Тест подбора параметров и точки безубыточности
+"""
+
+import time
+import numpy as np
+import goal_seek as goal_seek_module
+from business_calculator import BusinessCalculator
+from batch_calculator import batch_inputs_from_config
+from goal_seek import goal_seek, break_even, break_even_analysis
+
+def test_break_even_closed_form():
+    """Безубыточность по отелям решается в явном виде и совпадает с прежней формулой"""
+    print("=== ТЕСТ ТОЧКИ БЕЗУБЫТОЧНОСТИ ===")
+
+    analysis = break_even_analysis(scenario='baseline', variant='B')
+    calc = BusinessCalculator('baseline', 'B')
+    assert np.isclose(analysis['shiwa']['breakeven_hotels'], calc.total_costs['total_costs_usd'] / 12 / (500 * 0.8))
+    assert np.isclose(analysis['etecsa']['breakeven_hotels'], 40000 / 12 / (500 * 0.2))
+
+    # ETECSA при распределении 50/50
+    hotels = break_even('etecsa', assembly_variant='50_50')
+    calc = BusinessCalculator('baseline', 'B', assembly_variant='50_50', overrides={'hotels_count': hotels})
+    assert abs(calc.generate_financial_summary()['etecsa']['net_profit']) < 1e-6
+    print(f"ETECSA 50/50: {hotels:.1f} отелей")
+
+    result = goal_seek('shiwa_net_profit', 0, 'hotels_count', 0, 1000)
+    assert result['method'] == 'linear'
+
+def test_fee_for_payback_target():
+    """Абонентская плата, при которой окупаемость равна N месяцам (нелинейная задача)"""
+    print("\n=== ТЕСТ ПОДБОРА АБОНЕНТСКОЙ ПЛАТЫ ===")
+
+    inputs = batch_inputs_from_config('pessimistic', 'B')
+    result = goal_seek('payback_months', 6, 'monthly_fee', 0, 5000, inputs=inputs)
+    assert result['method'] == 'bisection'
+
+    calc = BusinessCalculator('pessimistic', 'B', overrides={'monthly_fee': float(result['value'])})
+    assert np.isclose(calc.calculate_payback_period()['payback_months'], 6, atol=1e-6)
+    print(f"Плата для окупаемости за 6 месяцев: ${float(result['value']):,.2f}")
+
+def test_batched_goal_seek():
+    """Тысячи задач решаются одним вызовом"""
+    print("\n=== ТЕСТ ПАКЕТНОГО ПОДБОРА ===")
+
+    targets = np.linspace(1, 24, 5000)
+    start = time.perf_counter()
+    result = goal_seek('payback_months', targets, 'monthly_fee', 0, 5000)
+    elapsed = time.perf_counter() - start
+    print(f"{len(targets)} задач за {elapsed:.3f} с")
+
+    assert result['value'].shape == targets.shape
+    assert np.all(np.diff(result['value']) < 0)  # чем короче окупаемость, тем выше плата
+    for index in [0, 2500, 4999]:
+        calc = BusinessCalculator('baseline', 'B', overrides={'monthly_fee': float(result['value'][index])})
+        assert np.isclose(calc.calculate_payback_period()['payback_months'], targets[index], rtol=1e-6)
+
+def test_kinked_goal(monkeypatch):
+    """Излом между точками проверки линейности не дает ложного явного решения"""
+    print("\n=== ТЕСТ ПОКАЗАТЕЛЯ С ИЗЛОМОМ ===")
+
+    # Совпадает с хордой в точках 1/3 и 2/3 отрезка [0, 1], но с выступом max(0, ...) около 0.5
+    def prepare(output, variable, inputs, arrays):
+        return lambda x: np.asarray(x) - 0.5 + 2 * np.maximum(0, 0.1 - np.abs(np.asarray(x) - 0.5))
+    monkeypatch.setattr(goal_seek_module, '_prepare', prepare)
+
+    result = goal_seek('shiwa_net_profit', 0, 'hotels_count', 0, 1)
+    assert result['method'] == 'bisection'
+    assert np.isclose(result['value'], 1.3 / 3, atol=1e-8)  # не 0.5 - корень хорды
+    print(f"Корень: {float(result['value']):.6f}")
+
+def test_unreachable_goal():
+    """Недостижимая цель дает NaN"""
+    print("\n=== ТЕСТ НЕДОСТИЖИМОЙ ЦЕЛИ ===")
+
+    result = goal_seek('hotels_roi', 1000, 'monthly_fee', 100, 1000)
+    assert np.isnan(result['value'])
+    try:
+        goal_seek('shiwa_net_profit', 0, 'hotels_count', 0, 100, scenario='baseline')
+        assert False, "Ожидалась ошибка"
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+
+if __name__ == "__main__":
+    test_break_even_closed_form()
+    test_fee_for_payback_target()
+    test_batched_goal_seek()
+    test_unreachable_goal()
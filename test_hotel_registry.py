@@ -0,0 +1,77 @@
+"""
+Тест потоковой загрузки реестра отелей
+"""
+
+import os
+import tempfile
+import numpy as np
+from parameters import FEE_TIERS, MONTHLY_FEE_USD, TYPICAL_HOTEL_ROOMS, BASELINE_SCENARIO
+from hotel_registry import HotelRegistryReader, load_registry, calculate_registry, write_sample_registry
+from portfolio import calculate_portfolio
+
+def test_csv_and_jsonl_chunks():
+    """CSV и JSONL дают одинаковые отели; итоги по пакетам равны итогам всего реестра"""
+    print("=== ТЕСТ ЗАГРУЗКИ CSV И JSONL ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'hotels.csv')
+        jsonl_path = os.path.join(directory, 'hotels.jsonl')
+        write_sample_registry(csv_path, 25_000, seed=1, chunk_size=10_000)
+        write_sample_registry(jsonl_path, 25_000, seed=1, chunk_size=10_000)
+
+        hotels, regions = load_registry(csv_path, chunk_size=7_000)
+        json_hotels, json_regions = load_registry(jsonl_path, chunk_size=7_000)
+        assert len(hotels) == 25_000
+        assert np.array_equal(hotels, json_hotels) and regions == json_regions
+        assert set(np.unique(hotels['monthly_fee'])) == set(map(float, FEE_TIERS.values()))
+
+        reader = HotelRegistryReader(csv_path, chunk_size=7_000)
+        assert [len(chunk) for chunk in reader] == [7_000, 7_000, 7_000, 4_000]
+        assert reader.rows == 25_000 and reader.rows_per_second > 0
+
+        streamed = calculate_registry(csv_path, by='region', chunk_size=7_000, variant='A')
+        whole = calculate_portfolio(hotels, by='region', variant='A')
+        for name, value in whole['totals'].items():
+            assert np.isclose(streamed['totals'][name], value, rtol=1e-12, equal_nan=True), name
+        assert [group['region'] for group in streamed['groups']] == regions
+        assert [group['hotels'] for group in streamed['groups']] == [group['hotels'] for group in whole['groups']]
+        print(f"Загрузка: {streamed['load_rows_per_second']:,.0f} строк/с")
+
+def test_defaults_and_errors():
+    """Пропущенные колонки и значения заполняются значениями по умолчанию"""
+    print("\n=== ТЕСТ ЗНАЧЕНИЙ ПО УМОЛЧАНИЮ ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'hotels.csv')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write("name,region,rooms,fee_tier,monthly_fee,equipment_type\n"
+                       "A,Cuba,300,premium,,1u_2u\n"
+                       "B,,,,450,\n"
+                       "C,Mexico,75,economy,,mini\n")
+        hotels, regions = load_registry(path)
+        assert regions == ['Cuba', 'Mexico', 'unknown']
+        assert hotels['region'].tolist() == [0, 2, 1]
+        assert hotels['monthly_fee'].tolist() == [FEE_TIERS['premium'], 450, FEE_TIERS['economy']]
+        assert np.allclose(hotels['size'], [300 / TYPICAL_HOTEL_ROOMS, 1, 75 / TYPICAL_HOTEL_ROOMS])
+        assert hotels['equipment_type'].tolist() == [1, 0, 0]
+        assert hotels['go_live_month'].tolist() == [1, 1, 1]
+        assert np.allclose(hotels['success_rate'], BASELINE_SCENARIO['success_rate'])
+
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write("region,equipment_type\nCuba,maxi\n")
+        try:
+            load_registry(path)
+            assert False, "Ожидалась ошибка"
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+
+    try:
+        load_registry('hotels.xlsx')
+        assert False, "Ожидалась ошибка"
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+    assert MONTHLY_FEE_USD == FEE_TIERS['standard']
+
+if __name__ == "__main__":
+    test_csv_and_jsonl_chunks()
+    test_defaults_and_errors()
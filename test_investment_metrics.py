@@ -0,0 +1,88 @@
+"""
+Тест NPV, IRR и дисконтированной окупаемости
+"""
+
+import time
+import numpy as np
+from business_calculator import BusinessCalculator
+from investment_metrics import (npv, irr, monthly_rate, annual_percent, discounted_payback_month,
+                                calculate_investment_metrics, _bisect)
+
+def test_npv_irr_known_values():
+    """Известные значения NPV и IRR"""
+    print("=== ТЕСТ ИЗВЕСТНЫХ ЗНАЧЕНИЙ ===")
+
+    flows = np.array([
+        [-100, 110, 0],         # 10% в месяц
+        [-1000, 100, 100],      # корень x^2 + x - 10 = 0 для x = 1 / (1 + r)
+        [10, 20, 30],           # нет смены знака - IRR не существует
+    ], dtype=float)
+    rates = irr(flows)
+    assert np.isclose(rates[0], 0.1)
+    assert np.isclose(1 / (1 + rates[1]), (np.sqrt(41) - 1) / 2)
+    assert np.isnan(rates[2])
+
+    # При ставке, равной IRR, NPV равна нулю
+    assert np.allclose(npv(flows[:2], rates[:2]), 0, atol=1e-6)
+    assert np.isclose(npv([-100, 110], 0.0), 10)
+    assert np.isclose(annual_percent(monthly_rate(15)), 15)
+    print(f"IRR: {rates}")
+
+def test_bisection_fallback():
+    """Бисекция находит корень там, где итерации Ньютона расходятся"""
+    print("\n=== ТЕСТ БИСЕКЦИИ ===")
+
+    flows = np.array([[-100.0, 0, 0, 0, 0, 0, 0, 0, 0, 10000.0]])
+    expected = (10000 / 100) ** (1 / 9) - 1
+    result = np.full(1, np.nan)
+    _bisect(flows, np.array([0]), result, 1e-12, 200)
+    assert np.isclose(result[0], expected)
+    assert np.isclose(irr(flows, guess=0.9)[0], expected)
+
+def test_discounted_payback():
+    """Дисконтированная окупаемость не раньше обычной"""
+    print("\n=== ТЕСТ ДИСКОНТИРОВАННОЙ ОКУПАЕМОСТИ ===")
+
+    flows = np.array([-1000.0] + [100.0] * 23)
+    assert discounted_payback_month(flows, 0.0) == 11
+    assert discounted_payback_month(flows, monthly_rate(15)) > 11
+
+def test_summary_contains_investment_metrics():
+    """NPV, IRR и дисконтированная окупаемость в сводке для всех участников"""
+    print("\n=== ТЕСТ СВОДКИ ===")
+
+    summary = BusinessCalculator('pessimistic', 'A').generate_financial_summary()
+    for party in ['shiwa', 'etecsa', 'hotels']:
+        for key in ['npv', 'irr', 'discounted_payback_month']:
+            assert key in summary[party]
+        print(f"{party}: NPV ${summary[party]['npv']:,.0f}, IRR {summary[party]['irr']}")
+
+    # Отель в варианте А покупает оборудование и окупает его позже
+    assert summary['hotels']['irr'] is not None
+    assert summary['hotels']['discounted_payback_month'] > 1
+
+def test_batch_matches_rows():
+    """Пакетный расчет совпадает с расчетом по одному сценарию"""
+    print("\n=== ТЕСТ ПАКЕТНОГО РАСЧЕТА ===")
+
+    n = 10_000
+    hotels = np.linspace(10, 100, n)
+    start = time.perf_counter()
+    metrics = calculate_investment_metrics(horizon_months=120, rollout_months=18,
+                                           hotels_count=hotels, is_sale=True)
+    elapsed = time.perf_counter() - start
+    print(f"{n} сценариев x 120 месяцев за {elapsed:.3f} с")
+
+    for index in [0, n // 2, n - 1]:
+        single = calculate_investment_metrics(horizon_months=120, rollout_months=18,
+                                              hotels_count=hotels[index], is_sale=True)
+        for name, values in metrics.items():
+            assert np.allclose(values[index], single[name], equal_nan=True)
+    assert elapsed < 5.0
+
+if __name__ == "__main__":
+    test_npv_irr_known_values()
+    test_bisection_fallback()
+    test_discounted_payback()
+    test_summary_contains_investment_metrics()
+    test_batch_matches_rows()
@@ -0,0 +1,176 @@
+"""
+Тест очереди фоновых заданий (jobs.py) и методов /api/jobs
+"""
+
+import os
+import time
+import threading
+from jobs import JobQueue, JobQueueFull
+from app import app, job_queue
+
+def _wait(job, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not job.finished_state:
+        assert time.monotonic() < deadline, f"Задание не завершилось: {job.info()}"
+        time.sleep(0.01)
+    return job
+
+def test_job_queue():
+    """Ход выполнения, ошибки, отмена выполняемого и ожидающего задания"""
+    print("=== ТЕСТ ОЧЕРЕДИ ЗАДАНИЙ ===")
+
+    queue = JobQueue(workers=1, max_active=3)
+    started = threading.Event()
+
+    def count(params, progress):
+        for done in range(1, params['steps'] + 1):
+            progress(done, params['steps'])
+        return {'sum': sum(range(params['steps'] + 1))}
+
+    def block(params, progress):
+        started.set()
+        while True:
+            progress(0, 1)
+            time.sleep(0.005)
+
+    def fail(params, progress):
+        raise ValueError("нет данных")
+
+    job = _wait(queue.submit('count', count, {'steps': 5}))
+    assert job.state == 'done' and job.result == {'sum': 15}
+    assert job.info()['progress'] == {'done': 5, 'total': 5, 'fraction': 1.0}
+
+    job = _wait(queue.submit('fail', fail))
+    assert job.state == 'failed' and job.error == "нет данных" and job.result is None
+
+    # Единственный поток занят: второе задание ждет в очереди и отменяется сразу
+    running = queue.submit('block', block)
+    queued = queue.submit('count', count, {'steps': 1})
+    assert started.wait(5)
+    assert queue.cancel(queued.id).state == 'cancelled'
+    queue.submit('count', count, {'steps': 1})
+    queue.submit('count', count, {'steps': 1})
+    try:
+        queue.submit('count', count, {'steps': 1})
+        assert False, "очередь должна быть заполнена"
+    except JobQueueFull as e:
+        print(f"Очередь заполнена: {e}")
+
+    assert queue.cancel(running.id).cancel_requested
+    assert _wait(running).state == 'cancelled'
+    assert queue.cancel('missing') is None
+    queue.shutdown()
+    print(queue.stats())
+
+def test_job_results_are_discarded():
+    """Результаты удаляемых заданий передаются в on_discard"""
+    print("\n=== ТЕСТ ОСВОБОЖДЕНИЯ РЕЗУЛЬТАТОВ ===")
+
+    discarded = []
+    queue = JobQueue(workers=1, max_finished=1, on_discard=discarded.append)
+    release = threading.Event()
+
+    def finish_late(params, progress):
+        release.wait(5)
+        return params
+
+    # Отмена после расчета: результат не выдается и сразу освобождается
+    job = queue.submit('late', finish_late, {'name': 'cancelled'})
+    while job.state != 'running':
+        time.sleep(0.01)
+    queue.cancel(job.id)
+    release.set()
+    assert _wait(job).state == 'cancelled' and job.result is None
+    assert discarded == [{'name': 'cancelled'}]
+
+    # Лишнее завершенное задание удаляется вместе с результатом, остальные - при остановке
+    _wait(queue.submit('late', finish_late, {'name': 'first'}))
+    _wait(queue.submit('late', finish_late, {'name': 'second'}))
+    assert len(queue.list()) == 1
+    queue.shutdown()
+    assert discarded == [{'name': 'cancelled'}, {'name': 'first'}, {'name': 'second'}]
+    print(discarded)
+
+    # Долгое освобождение результата не блокирует обращения к очереди из других потоков
+    deleting, deleted = threading.Event(), threading.Event()
+
+    def slow_discard(result):
+        deleting.set()
+        deleted.wait(5)
+
+    queue = JobQueue(workers=1, result_ttl=0, on_discard=slow_discard)
+    _wait(queue.submit('late', finish_late, {'name': 'slow'}))
+    purging = threading.Thread(target=queue.list)
+    purging.start()
+    assert deleting.wait(5)
+    started = time.monotonic()
+    assert queue.stats()['done'] == 0 and queue.get('missing') is None
+    assert time.monotonic() - started < 1
+    deleted.set()
+    purging.join()
+    queue.shutdown()
+
+def test_jobs_api():
+    """Постановка, опрос, результат и отмена заданий через API"""
+    print("\n=== ТЕСТ /api/jobs ===")
+
+    client = app.test_client()
+    body = {
+        'grid': {'hotels_count': {'start': 10, 'stop': 100, 'num': 10}, 'variant': ['A', 'B']},
+        'columns': ['shiwa_net_profit']
+    }
+    response = client.post('/api/jobs', json={'kind': 'batch', 'params': body})
+    assert response.status_code == 202
+    job = response.get_json()['data']
+    assert response.headers['Location'] == f"/api/jobs/{job['id']}"
+    assert job['kind'] == 'batch' and job['state'] in ('queued', 'running', 'done')
+
+    deadline = time.monotonic() + 30
+    while client.get(f"/api/jobs/{job['id']}").get_json()['data']['state'] != 'done':
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    result = client.get(f"/api/jobs/{job['id']}/result")
+    assert result.status_code == 200
+    expected = client.post('/api/calculate/batch', json=body).get_json()['data']
+    data = result.get_json()['data']
+    assert data['columns'] == expected['columns'] and data['dimensions'] == expected['dimensions']
+    assert (data['rows'], data['start'], data['stop']) == (20, 0, 20)
+    assert result.get_json()['job']['progress']['fraction'] == 1.0
+
+    # Результат сетки хранится на диске и читается страницами в порядке синхронного ответа
+    store = job_queue.get(job['id']).result['store']
+    assert os.path.isdir(store)
+    pages = [client.get(f"/api/jobs/{job['id']}/result?start={start}&limit=7").get_json()['data']
+             for start in range(0, 20, 7)]
+    assert [(page['start'], page['stop']) for page in pages] == [(0, 7), (7, 14), (14, 20)]
+    assert sum((page['columns']['shiwa_net_profit'] for page in pages), []) == \
+        expected['columns']['shiwa_net_profit']
+    assert client.get(f"/api/jobs/{job['id']}/result?limit=0").status_code == 400
+    assert client.get(f"/api/jobs/{job['id']}/result?start=x").status_code == 400
+
+    # Отмена долгой оптимизации, ошибки задания и неизвестные задания
+    response = client.post('/api/jobs', json={'kind': 'optimize', 'params': {'iterations': 10_000, 'population': 50}})
+    job_id = response.get_json()['data']['id']
+    assert client.delete(f'/api/jobs/{job_id}').status_code == 200
+    deadline = time.monotonic() + 30
+    while client.get(f'/api/jobs/{job_id}').get_json()['data']['state'] != 'cancelled':
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert client.get(f'/api/jobs/{job_id}/result').status_code == 409
+
+    response = client.post('/api/jobs', json={'kind': 'sensitivity', 'params': {'parameter': 'hotel_count',
+                                                                                'values': [10]}})
+    job_id = response.get_json()['data']['id']
+    deadline = time.monotonic() + 30
+    while (result := client.get(f'/api/jobs/{job_id}/result')).status_code == 202:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert result.status_code == 409 and result.get_json()['job']['state'] == 'failed'
+    print(f"Ошибка задания: {result.get_json()['error']}")
+
+    assert client.post('/api/jobs', json={'kind': 'mine'}).status_code == 400
+    assert client.get('/api/jobs/missing').status_code == 404
+    assert client.delete('/api/jobs/missing').status_code == 404
+    jobs = client.get('/api/jobs').get_json()['data']
+    assert jobs['stats']['done'] >= 1 and jobs['stats']['cancelled'] >= 1
+    print(f"Заданий: {len(jobs['jobs'])}, {jobs['stats']}")
@@ -0,0 +1,141 @@
+"""
+Тест графа зависимостей финансовой модели
+"""
+
+import numpy as np
+from model_graph import ModelGraph, FINANCIAL_MODEL, IncrementalEvaluation
+from batch_calculator import BATCH_INPUTS, SUMMARY_COLUMNS, batch_inputs_from_config
+from business_calculator import BusinessCalculator
+
+def test_graph_structure():
+    """Входы графа совпадают с входами пакетного расчета"""
+    print("=== ТЕСТ СТРУКТУРЫ ГРАФА ===")
+
+    assert set(FINANCIAL_MODEL.inputs) == set(BATCH_INPUTS)
+    assert set(SUMMARY_COLUMNS) <= set(FINANCIAL_MODEL.nodes)
+
+    order = FINANCIAL_MODEL.nodes
+    for name in order:
+        for dependency in FINANCIAL_MODEL.dependencies(name):
+            if dependency in order:
+                assert order.index(dependency) < order.index(name)
+    print(f"Узлов: {len(order)}, входов: {len(FINANCIAL_MODEL.inputs)}")
+
+def test_each_node_computed_once():
+    """Каждый узел вычисляется один раз, даже если он нужен нескольким"""
+    print("\n=== ТЕСТ ОДНОКРАТНОГО ВЫЧИСЛЕНИЯ ===")
+
+    calls = []
+    graph = ModelGraph('test')
+
+    @graph.node('x')
+    def revenue(x):
+        calls.append('revenue')
+        return x * 2
+
+    @graph.node('revenue')
+    def profit(revenue):
+        calls.append('profit')
+        return revenue - 1
+
+    @graph.node('revenue', 'profit')
+    def margin(revenue, profit):
+        calls.append('margin')
+        return profit / revenue
+
+    values = graph.evaluate({'x': 5})
+    assert values['margin'] == 0.9
+    assert sorted(calls) == ['margin', 'profit', 'revenue']
+
+    # Частичный пересчет: узлы, не зависящие от изменения, не вычисляются
+    calls.clear()
+    updated = graph.recompute(values, {'profit': 4})
+    assert updated['margin'] == 0.4
+    assert calls == ['margin']
+
+def test_cycle_detection():
+    """Циклические зависимости обнаруживаются"""
+    print("\n=== ТЕСТ ОБНАРУЖЕНИЯ ЦИКЛОВ ===")
+
+    graph = ModelGraph('cycle')
+
+    @graph.node('b')
+    def a(b):
+        return b
+
+    @graph.node('a')
+    def b(a):
+        return a
+
+    try:
+        graph.nodes
+        assert False, "Ожидалась ошибка цикла"
+    except ValueError as e:
+        print(f"Цикл обнаружен: {e}")
+
+def test_partial_recompute_financial_model():
+    """Изменение курса пересчитывает только зависящие от него величины"""
+    print("\n=== ТЕСТ ЧАСТИЧНОГО ПЕРЕСЧЕТА МОДЕЛИ ===")
+
+    inputs = batch_inputs_from_config('baseline', 'A')
+    values = FINANCIAL_MODEL.evaluate(inputs)
+    affected = FINANCIAL_MODEL.dependents(['rub_to_usd_rate'])
+
+    assert 'hotels_annual_cost' not in affected
+    assert 'effective_hotels' not in affected
+    assert 'shiwa_net_profit' in affected
+
+    updated = FINANCIAL_MODEL.recompute(values, {'rub_to_usd_rate': 90})
+    expected = FINANCIAL_MODEL.evaluate(dict(inputs, rub_to_usd_rate=90))
+    assert updated['shiwa_net_profit'] == expected['shiwa_net_profit']
+    print(f"Пересчитано узлов: {len(affected)} из {len(FINANCIAL_MODEL.nodes)}")
+
+def test_calculator_single_evaluation():
+    """Сводка и окупаемость используют один расчет графа"""
+    print("\n=== ТЕСТ ЕДИНОГО РАСЧЕТА КАЛЬКУЛЯТОРА ===")
+
+    calc = BusinessCalculator('baseline', 'A')
+    calc.generate_financial_summary()
+    first = calc.evaluate()
+    calc.calculate_payback_period()
+    assert calc.evaluate() is first
+
+    # Изменение параметров сбрасывает кэш расчета
+    calc.scenario_params['hotels_count'] = 75
+    assert calc.evaluate() is not first
+    assert calc.generate_financial_summary()['effective_hotels'] == 75
+
+def test_incremental_evaluation():
+    """Изменение входа помечает устаревшими только зависящие величины"""
+    print("\n=== ТЕСТ ИНКРЕМЕНТАЛЬНОГО РАСЧЕТА ===")
+
+    inputs = batch_inputs_from_config('baseline', 'B')
+    session = IncrementalEvaluation(FINANCIAL_MODEL, inputs)
+    before = session.values(SUMMARY_COLUMNS)
+    assert not session.dirty
+
+    stale = session.update({'hotel_annual_benefit': 8000})
+    assert session.dirty == {'hotels_total_benefit', 'hotels_roi'} and stale == 2
+    assert session['shiwa_net_profit'] is before['shiwa_net_profit']
+    assert session['hotels_roi'] > before['hotels_roi']
+    assert session.last_recomputed == 2
+
+    # Повторная установка того же значения ничего не пересчитывает
+    assert session.update({'hotel_annual_benefit': 8000}) == 0
+
+    # Портфель конфигураций: массивы входов
+    hotels = np.arange(10, 1010, dtype=float)
+    portfolio = IncrementalEvaluation(FINANCIAL_MODEL, dict(inputs, hotels_count=hotels))
+    portfolio.values(SUMMARY_COLUMNS)
+    portfolio.update({'monthly_fee': 450})
+    expected = FINANCIAL_MODEL.evaluate(dict(inputs, hotels_count=hotels, monthly_fee=450))
+    assert np.array_equal(portfolio['shiwa_net_profit'], expected['shiwa_net_profit'])
+    print(f"Пересчитано узлов после изменения платы: {portfolio.last_recomputed}")
+
+if __name__ == "__main__":
+    test_graph_structure()
+    test_each_node_computed_once()
+    test_cycle_detection()
+    test_partial_recompute_financial_model()
+    test_calculator_single_evaluation()
+    test_incremental_evaluation()
@@ -0,0 +1,86 @@
+"""
+Тест моделирования Монте-Карло
+"""
+
+import numpy as np
+from monte_carlo import run_monte_carlo, print_monte_carlo_report
+from distributions import Constant, Discrete, Normal, Triangular, Uniform, default_distributions
+from batch_calculator import batch_inputs_from_config, calculate_batch
+from parameters import UNCERTAINTY_RANGES
+
+def test_distributions():
+    """Обратные функции распределений"""
+    print("=== ТЕСТ РАСПРЕДЕЛЕНИЙ ===")
+
+    u = np.linspace(0, 1, 11, endpoint=False)
+    assert np.allclose(Uniform(10, 20).ppf(u), 10 + 10 * u)
+    assert np.all(np.diff(Triangular(0, 3, 10).ppf(u)) > 0)
+    assert Constant(5).ppf(u).tolist() == [5.0] * 11
+    assert set(Discrete([90000, 350000], [0.75, 0.25]).ppf(u)) == {90000.0, 350000.0}
+
+    normal = Normal(0, 1).ppf(np.array([0.025, 0.5, 0.975]))
+    assert np.allclose(normal, [-1.959964, 0, 1.959964], atol=1e-6)
+
+    truncated = Normal(78, 10, low=70, high=90).sample(np.random.default_rng(0), 10000)
+    assert truncated.min() >= 70 and truncated.max() <= 90
+    print("Распределения рассчитаны корректно")
+
+def test_monte_carlo_constant_inputs():
+    """При фиксированных входах все испытания совпадают с детерминированным расчетом"""
+    print("\n=== ТЕСТ МОНТЕ-КАРЛО С ФИКСИРОВАННЫМИ ПАРАМЕТРАМИ ===")
+
+    # Явные базовые параметры: результат не зависит от общих таблиц сценариев
+    base = dict(batch_inputs_from_config('baseline', 'B'), hotels_count=50)
+    result = run_monte_carlo({'hotels_count': Constant(50)}, n_draws=1000, base_inputs=base, seed=1, workers=1)
+    expected = calculate_batch(base)['shiwa_net_profit']
+
+    stats = result['metrics']['shiwa_net_profit']
+    assert np.isclose(stats['percentiles']['p5'], expected)
+    assert np.isclose(stats['percentiles']['p95'], expected)
+    print(f"Прибыль SHIWA: ${stats['mean']:,.0f}")
+
+def test_monte_carlo_default_ranges():
+    """Моделирование по диапазонам неопределенности из parameters.py"""
+    print("\n=== ТЕСТ МОНТЕ-КАРЛО ПО УМОЛЧАНИЮ ===")
+
+    result = run_monte_carlo(n_draws=200_000, seed=42, chunk_size=50_000)
+    profit = result['metrics']['shiwa_net_profit']
+
+    assert profit['percentiles']['p5'] < profit['percentiles']['p50'] < profit['percentiles']['p95']
+    assert sum(profit['histogram']['counts']) == 200_000
+    print_monte_carlo_report(result)
+
+def test_default_ranges_follow_base_inputs():
+    """Диапазон себестоимости оборудования строится от базовой конфигурации"""
+    print("\n=== ТЕСТ ДИАПАЗОНОВ ДЛЯ ОБОРУДОВАНИЯ 1U/2U ===")
+
+    base = batch_inputs_from_config(equipment_type='1u_2u', variant='A')
+    low, mode, high = UNCERTAINTY_RANGES['equipment_cost_rub']
+    cost = default_distributions(base)['equipment_cost_rub']
+    scale = base['equipment_cost_rub'] / mode
+    assert np.allclose([cost.low, cost.mode, cost.high], [low * scale, base['equipment_cost_rub'], high * scale])
+    assert default_distributions()['equipment_cost_rub'].mode == mode
+
+    # Разница медиан 1U/2U и мини-оборудования следует за разницей детерминированных расчетов
+    mini = batch_inputs_from_config(variant='A')
+    medians = [run_monte_carlo(n_draws=50_000, base_inputs=inputs, seed=3, workers=1)
+               ['metrics']['shiwa_net_profit']['percentiles']['p50'] for inputs in (base, mini)]
+    expected = [float(calculate_batch(inputs)['shiwa_net_profit']) for inputs in (base, mini)]
+    assert medians[0] - medians[1] > 0.5 * (expected[0] - expected[1])
+    print(f"Медианы прибыли SHIWA 1U/2U и мини: ${medians[0]:,.0f}, ${medians[1]:,.0f} "
+          f"(детерминированно ${expected[0]:,.0f}, ${expected[1]:,.0f})")
+
+def test_monte_carlo_reproducible():
+    """Одинаковое зерно дает одинаковый результат"""
+    print("\n=== ТЕСТ ВОСПРОИЗВОДИМОСТИ ===")
+
+    first = run_monte_carlo(n_draws=20_000, seed=7, chunk_size=5_000, workers=1)
+    second = run_monte_carlo(n_draws=20_000, seed=7, chunk_size=5_000, workers=1)
+    assert first['metrics'] == second['metrics']
+    print("Результаты совпадают")
+
+if __name__ == "__main__":
+    test_distributions()
+    test_monte_carlo_constant_inputs()
+    test_monte_carlo_default_ranges()
+    test_monte_carlo_reproducible()
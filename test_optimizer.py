@@ -0,0 +1,46 @@
+"""
+Тест оптимизации условий сделки
+"""
+
+import numpy as np
+from business_calculator import BusinessCalculator
+from optimizer import optimize_deal
+
+def test_optimum_matches_analytic_solution():
+    """При аренде оптимум лежит на границах ограничений и находится точно"""
+    print("=== ТЕСТ ОПТИМУМА С ОГРАНИЧЕНИЯМИ ===")
+
+    # ROI отеля ≥ 20% ограничивает плату 500 USD, безубыточность ETECSA - долю SHIWA
+    result = optimize_deal('shiwa_net_profit', {'hotels_roi': (20, None), 'etecsa_net_profit': (0, None)},
+                           scenario='baseline', variant='B', seed=1)
+    assert result['feasible']
+    assert np.isclose(result['parameters']['monthly_fee'], 500, rtol=1e-4)
+    assert np.isclose(result['parameters']['shiwa_share'], 1 - 40000 / 12 / 50 / 500, rtol=1e-4)
+    assert result['outputs']['hotels_roi'] >= 20 - 1e-6
+    assert result['outputs']['etecsa_net_profit'] >= -1e-6
+    print(f"Плата ${result['parameters']['monthly_fee']:.2f}, доля SHIWA {result['parameters']['shiwa_share']:.4f}")
+
+def test_optimum_consistent_with_calculator():
+    """Найденные условия дают тот же показатель в BusinessCalculator"""
+    print("\n=== ТЕСТ СОГЛАСОВАННОСТИ С КАЛЬКУЛЯТОРОМ ===")
+
+    result = optimize_deal('shiwa_roi', {'etecsa_net_profit': (50_000, None)}, variant='A',
+                           population=500, iterations=10, seed=2)
+    parameters = result['parameters']
+    calc = BusinessCalculator('baseline', 'A', parameters['equipment_type'], parameters['assembly_option'],
+                              overrides={'monthly_fee': parameters['monthly_fee']})
+    assert np.isclose(calc.generate_financial_summary()['shiwa']['roi'], result['value'])
+    assert len(result['options']) == 6
+    print(f"Рассчитано {result['evaluations']} кандидатов за {result['elapsed_seconds']:.2f} с")
+
+def test_infeasible_constraints_reported():
+    """Невыполнимые ограничения отмечаются как недопустимые"""
+    print("\n=== ТЕСТ НЕВЫПОЛНИМЫХ ОГРАНИЧЕНИЙ ===")
+
+    result = optimize_deal('shiwa_roi', {'etecsa_net_profit': (1e9, None)}, population=200, iterations=5, seed=3)
+    assert not result['feasible']
+
+if __name__ == "__main__":
+    test_optimum_matches_analytic_solution()
+    test_optimum_consistent_with_calculator()
+    test_infeasible_constraints_reported()
@@ -0,0 +1,100 @@
+"""
+Тест неизменяемых наборов параметров
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from business_calculator import BusinessCalculator
+from parameter_set import ParameterSet, ParameterOverrides
+from parameters import get_scenario_params, BASELINE_SCENARIO
+
+def test_parameter_set_immutable():
+    """ParameterSet нельзя изменить, replace создает новый набор"""
+    print("=== ТЕСТ НЕИЗМЕНЯЕМОСТИ ===")
+
+    params = get_scenario_params('baseline')
+    try:
+        params['hotels_count'] = 75
+        assert False, "Ожидалась ошибка при изменении"
+    except TypeError as e:
+        print(f"Изменение запрещено: {e}")
+
+    changed = params.replace(hotels_count=75)
+    assert changed['hotels_count'] == 75
+    assert params['hotels_count'] == BASELINE_SCENARIO['hotels_count']
+    assert params.replace(hotels_count=params['hotels_count']) is params
+
+def test_parameter_set_hashable():
+    """Одинаковые наборы равны и имеют одинаковый хеш"""
+    print("\n=== ТЕСТ ХЕШИРОВАНИЯ ===")
+
+    first = ParameterSet({'hotels_count': 50, 'monthly_fee': 500})
+    second = ParameterSet(monthly_fee=500, hotels_count=50)
+    assert first == second and hash(first) == hash(second)
+    assert first == {'hotels_count': 50, 'monthly_fee': 500}
+
+    cache = {first: 'результат'}
+    assert cache[second] == 'результат'
+
+    calc1 = BusinessCalculator('baseline', 'B', overrides={'hotels_count': 60})
+    calc2 = BusinessCalculator('baseline', 'B')
+    calc2.scenario_params['hotels_count'] = 60
+    assert calc1.params_key() == calc2.params_key()
+    assert calc1.params_key() != BusinessCalculator('baseline', 'B').params_key()
+    print("Ключи калькуляторов совпадают для одинаковых параметров")
+
+def test_calculators_share_without_leaks():
+    """Изменения параметров одного калькулятора не влияют на другие"""
+    print("\n=== ТЕСТ ИЗОЛЯЦИИ КАЛЬКУЛЯТОРОВ ===")
+
+    calc = BusinessCalculator('baseline', 'B')
+    calc.scenario_params['hotels_count'] = 75
+    other = BusinessCalculator('baseline', 'B')
+
+    assert other.scenario_params['hotels_count'] == BASELINE_SCENARIO['hotels_count']
+    assert other.scenario_params.freeze() is get_scenario_params('baseline')
+    assert calc.generate_financial_summary()['hotels_count'] == 75
+    assert other.generate_financial_summary()['hotels_count'] == BASELINE_SCENARIO['hotels_count']
+
+    overrides = ParameterOverrides(get_scenario_params('baseline'))
+    overrides['custom'] = 1
+    assert 'custom' in overrides and 'custom' not in get_scenario_params('baseline')
+
+def test_table_edits_reach_new_calculators():
+    """Изменение таблицы в памяти учитывается в новых калькуляторах, прежние сохраняют снимок"""
+    print("\n=== ТЕСТ ИЗМЕНЕНИЯ ТАБЛИЦЫ СЦЕНАРИЯ ===")
+
+    before = BusinessCalculator('baseline', 'B')
+    snapshot = get_scenario_params('baseline')
+    hotels_count = BASELINE_SCENARIO['hotels_count']
+    try:
+        BASELINE_SCENARIO['hotels_count'] = hotels_count + 25
+        after = BusinessCalculator('baseline', 'B')
+        assert after.generate_financial_summary()['hotels_count'] == hotels_count + 25
+        assert before.generate_financial_summary()['hotels_count'] == hotels_count
+        assert get_scenario_params('baseline') is not snapshot
+    finally:
+        BASELINE_SCENARIO['hotels_count'] = hotels_count
+    assert get_scenario_params('baseline') == snapshot
+    print(f"Новый калькулятор: {after.scenario_params['hotels_count']} отелей, прежний: {before.scenario_params['hotels_count']}")
+
+def test_parallel_calculators():
+    """Калькуляторы с разными параметрами в параллельных потоках"""
+    print("\n=== ТЕСТ ПАРАЛЛЕЛЬНЫХ РАСЧЕТОВ ===")
+
+    def profit(hotels):
+        calc = BusinessCalculator('baseline', 'B', overrides={'hotels_count': hotels})
+        return calc.generate_financial_summary()['shiwa']['net_profit']
+
+    hotels = list(range(10, 210)) * 5
+    expected = [profit(count) for count in hotels]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(profit, hotels))
+
+    assert results == expected
+    print(f"Выполнено {len(hotels)} параллельных расчетов без взаимного влияния")
+
+if __name__ == "__main__":
+    test_parameter_set_immutable()
+    test_parameter_set_hashable()
+    test_calculators_share_without_leaks()
+    test_parallel_calculators()
@@ -0,0 +1,92 @@
+"""
+Тест портфеля разнородных отелей
+"""
+
+import time
+import numpy as np
+from portfolio import (EQUIPMENT_TYPE_CODES, ASSEMBLY_OPTION_CODES, make_portfolio, portfolio_from_config,
+                       calculate_portfolio, portfolio_cash_flows, print_portfolio_report)
+from batch_calculator import batch_inputs_from_config, calculate_batch
+from cashflow import calculate_cash_flows
+
+def test_homogeneous_portfolio_matches_model():
+    """Портфель из одинаковых отелей совпадает с расчетом по количеству отелей"""
+    print("=== ТЕСТ ОДНОРОДНОГО ПОРТФЕЛЯ ===")
+
+    for scenario, variant, equipment_type, assembly_option, assembly_variant in [
+            ('baseline', 'B', 'mini', 'shiwa_assembled', '80_20'),
+            ('pessimistic', 'A', '1u_2u', 'etecsa_assembly', '50_50'),
+            ('optimistic', 'A', 'mini', 'mixed_approach', '80_20')]:
+        # Срок подключения кратен количеству отелей: подключается целое число отелей в месяц
+        hotels = portfolio_from_config(scenario, equipment_type, assembly_option, rollout_months=5)
+        config = {'scenario': scenario, 'variant': variant, 'assembly_variant': assembly_variant}
+        inputs = batch_inputs_from_config(equipment_type=equipment_type, assembly_option=assembly_option, **config)
+
+        totals = calculate_portfolio(hotels, **config)['totals']
+        expected = calculate_batch(inputs)
+        for name in ('shiwa_total_revenue', 'shiwa_total_costs', 'shiwa_net_profit', 'shiwa_roi',
+                     'payback_months', 'etecsa_total_revenue', 'etecsa_net_profit', 'hotels_roi'):
+            assert np.isclose(totals[name], expected[name], rtol=1e-12, equal_nan=True), name
+
+        flows = portfolio_cash_flows(hotels, **config)
+        expected_flows = calculate_cash_flows(inputs, rollout_months=5)
+        for name in ('shiwa_revenue', 'shiwa_costs', 'etecsa_revenue', 'etecsa_cumulative', 'shiwa_payback_month'):
+            assert np.allclose(flows[name], expected_flows[name], equal_nan=True), name
+        print(f"{scenario}/{variant}/{equipment_type}/{assembly_option}: прибыль SHIWA ${totals['shiwa_net_profit']:,.0f}")
+
+def test_heterogeneous_groups():
+    """Итоги групп складываются в итоги портфеля"""
+    print("\n=== ТЕСТ ГРУППИРОВКИ РАЗНОРОДНОГО ПОРТФЕЛЯ ===")
+
+    rng = np.random.default_rng(0)
+    count = 10_000
+    hotels = make_portfolio(count, region=rng.integers(0, 4, count), monthly_fee=rng.uniform(300, 700, count),
+                            equipment_type=rng.choice(EQUIPMENT_TYPE_CODES, count),
+                            assembly_option=rng.choice(ASSEMBLY_OPTION_CODES, count),
+                            go_live_month=rng.integers(1, 13, count), size=rng.uniform(0.5, 2, count))
+
+    result = calculate_portfolio(hotels, by=['region', 'equipment_type'], variant='A')
+    totals = result['totals']
+    assert len(result['groups']) == 4 * len(EQUIPMENT_TYPE_CODES)
+    assert sum(group['hotels'] for group in result['groups']) == count
+    assert np.isclose(sum(group['shiwa_revenue'] for group in result['groups']), totals['shiwa_total_revenue'])
+    assert np.isclose(sum(group['etecsa_revenue'] for group in result['groups']), totals['etecsa_total_revenue'])
+
+    # Вклад отеля не зависит от остальных: сумма по частям равна целому (без постоянных затрат)
+    first, second = (calculate_portfolio(part, variant='A')['totals'] for part in (hotels[:3000], hotels[3000:]))
+    assert np.isclose(first['shiwa_total_revenue'] + second['shiwa_total_revenue'], totals['shiwa_total_revenue'])
+
+    flows = portfolio_cash_flows(hotels, horizon_months=24, by='region', variant='A')
+    assert flows['group_shiwa_revenue'].shape == (4, 24)
+    assert np.allclose(flows['group_shiwa_revenue'].sum(axis=0), flows['shiwa_revenue'])
+    assert flows['active_hotels'][11] == count and flows['active_hotels'][0] < count
+    print_portfolio_report(calculate_portfolio(hotels, by='region', variant='A'))
+
+def test_large_portfolio_speed():
+    """Портфель из 100 000 отелей рассчитывается за миллисекунды"""
+    print("\n=== ТЕСТ СКОРОСТИ БОЛЬШОГО ПОРТФЕЛЯ ===")
+
+    rng = np.random.default_rng(1)
+    count = 100_000
+    hotels = make_portfolio(count, region=rng.integers(0, 20, count), monthly_fee=rng.choice([400, 500, 600], count),
+                            go_live_month=rng.integers(1, 37, count))
+    assert hotels.nbytes == 22 * count
+
+    calculate_portfolio(hotels, by='region')
+    start = time.perf_counter()
+    calculate_portfolio(hotels, by='region')
+    portfolio_cash_flows(hotels, by='region')
+    elapsed = time.perf_counter() - start
+    print(f"{count:,} отелей: {elapsed * 1000:.1f} мс")
+    assert elapsed < 0.5
+
+    try:
+        calculate_portfolio(hotels, monthly_fee=500)
+        assert False, "Ожидалась ошибка"
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+
+if __name__ == "__main__":
+    test_homogeneous_portfolio_matches_model()
+    test_heterogeneous_groups()
+    test_large_portfolio_speed()
@@ -0,0 +1,53 @@
+"""
+Тест воспроизводимых потоков случайных чисел
+"""
+
+import numpy as np
+from random_streams import RandomStreams
+from monte_carlo import run_monte_carlo
+from sobol import run_sobol
+
+def test_stream_keys():
+    """Потоки пакетов совпадают с SeedSequence.spawn, именованные потоки от них отличаются"""
+    print("=== ТЕСТ КЛЮЧЕЙ ПОТОКОВ ===")
+
+    streams = RandomStreams(2024)
+    spawned = np.random.SeedSequence(2024).spawn(4)
+    for index, seed_sequence in enumerate(spawned):
+        assert np.array_equal(streams.chunk(index).generate_state(4), seed_sequence.generate_state(4))
+
+    states = [streams.chunk(index).generate_state(2).tolist() for index in range(100)]
+    states += [streams.named(name).generate_state(2).tolist() for name in ('sampler', 'bootstrap', 'candidates')]
+    assert len({tuple(state) for state in states}) == len(states)
+
+    # Потоки из дочернего дерева не пересекаются с потоками родителя
+    child = RandomStreams(streams.chunk(0))
+    assert child.chunk(0).generate_state(2).tolist() not in states
+
+def test_bit_identical_across_workers():
+    """Результат при одном зерне не зависит от количества процессов"""
+    print("\n=== ТЕСТ НЕЗАВИСИМОСТИ ОТ КОЛИЧЕСТВА ПРОЦЕССОВ ===")
+
+    runs = [run_monte_carlo(n_draws=40_000, seed=11, chunk_size=7_000, workers=workers)
+            for workers in (1, 2, 3)]
+    assert runs[0]['metrics'] == runs[1]['metrics'] == runs[2]['metrics']
+
+    runs = [run_sobol(n_samples=6_000, seed=11, chunk_size=1_000, workers=workers, n_bootstrap=50)
+            for workers in (1, 3)]
+    assert runs[0]['metrics'] == runs[1]['metrics']
+    print("Результаты совпадают побитово")
+
+def test_unseeded_run_is_repeatable():
+    """Зерно случайного запуска возвращается в результате и позволяет его повторить"""
+    print("\n=== ТЕСТ ПОВТОРЕНИЯ ЗАПУСКА БЕЗ ЗЕРНА ===")
+
+    first = run_monte_carlo(n_draws=10_000, chunk_size=3_000, workers=1)
+    repeated = run_monte_carlo(n_draws=10_000, chunk_size=3_000, workers=1, seed=first['seed'])
+    other = run_monte_carlo(n_draws=10_000, chunk_size=3_000, workers=1)
+    assert repeated['metrics'] == first['metrics']
+    assert other['seed'] != first['seed'] and other['metrics'] != first['metrics']
+
+if __name__ == "__main__":
+    test_stream_keys()
+    test_bit_identical_across_workers()
+    test_unseeded_run_is_repeatable()
@@ -0,0 +1,169 @@
+"""
+Тест кэша результатов на диске
+"""
+
+import os
+import ast
+import time
+import shutil
+import tempfile
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from business_calculator import BusinessCalculator
+from result_cache import ResultCache, params_hash, cached_financial_summary, default_cache
+from result_store import MODEL_SOURCE_FILES, model_fingerprint
+
+def _worker(task):
+    """Одновременная запись и чтение одних и тех же ключей (в рабочем процессе)"""
+    directory, worker = task
+    cache = ResultCache(directory, max_bytes=20_000)
+    results = []
+    for step in range(60):
+        key = {'config': step % 12}
+        value = cache.get('test', key)
+        assert value is None or value == {'config': step % 12, 'payload': list(range(50))}
+        cache.put('test', key, {'config': step % 12, 'payload': list(range(50))})
+        results.append(value is not None)
+    return sum(results)
+
+def test_keys_and_round_trip():
+    """Ключ не зависит от порядка и типа равных чисел; значения читаются обратно"""
+    print("=== ТЕСТ КЛЮЧЕЙ КЭША ===")
+
+    assert params_hash('x', {'a': 75, 'b': [1, 2]}, 'v1') == params_hash('x', {'b': (1.0, 2), 'a': 75.0}, 'v1')
+    assert params_hash('x', {'a': np.float64(0.1)}, 'v1') == params_hash('x', {'a': 0.1}, 'v1')
+    assert params_hash('x', {'a': True}, 'v1') != params_hash('x', {'a': 1}, 'v1')
+    assert params_hash('x', {'a': 1}, 'v1') != params_hash('x', {'a': 1}, 'v2')
+    assert params_hash('x', {'a': 1}, 'v1') != params_hash('y', {'a': 1}, 'v1')
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(directory)
+        assert cache.get('x', {'a': 1}) is None
+        stored = cache.put('x', {'a': 1}, {'values': np.arange(3), 'nan': float('nan'), 'none': None})
+        assert stored['values'] == [0, 1, 2] and stored['none'] is None
+        value = cache.get('x', {'a': 1.0})
+        assert value['values'] == [0, 1, 2] and np.isnan(value['nan'])
+        assert ResultCache(directory, model_version='other').get('x', {'a': 1}) is None
+
+        calls = []
+        for _ in range(3):
+            assert cache.get_or_compute('y', {'b': 2}, lambda: calls.append(1) or 42) == 42
+        assert len(calls) == 1
+        stats = cache.stats()
+        assert stats['entries'] == 2 and stats['hits'] == 3 and stats['misses'] == 2
+        print(f"Статистика: {stats}")
+
+def test_lru_eviction():
+    """При превышении размера удаляются давно не использованные записи"""
+    print("\n=== ТЕСТ ОЧИСТКИ КЭША ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(directory, max_bytes=10**9)
+        for index in range(10):
+            cache.put('x', {'index': index}, list(range(100)))
+            path = cache._path(cache.key('x', {'index': index}))
+            os.utime(path, (time.time() - 100 + index, time.time() - 100 + index))
+        assert cache.get('x', {'index': 0}) is not None  # запись 0 использована последней
+
+        size = cache.stats()['bytes']
+        removed = cache.evict(max_bytes=size // 2)
+        assert removed == 6
+        assert cache.get('x', {'index': 0}) is not None
+        assert all(cache.get('x', {'index': index}) is None for index in range(1, 7))
+        assert all(cache.get('x', {'index': index}) is not None for index in range(7, 10))
+        assert cache.stats()['bytes'] <= size // 2
+
+        cache.clear()
+        assert cache.stats()['entries'] == 0
+
+def test_concurrent_processes():
+    """Одновременные читатели и писатели не видят неполных записей"""
+    print("\n=== ТЕСТ ОДНОВРЕМЕННОГО ДОСТУПА ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        with ProcessPoolExecutor(4) as pool:
+            hits = list(pool.map(_worker, [(directory, worker) for worker in range(4)]))
+        assert sum(hits) > 0
+        leftovers = [name for shard in os.listdir(directory) if os.path.isdir(os.path.join(directory, shard))
+                     for name in os.listdir(os.path.join(directory, shard)) if name.endswith('.tmp')]
+        assert leftovers == []
+        print(f"Попаданий по процессам: {hits}")
+
+def test_cached_financial_summary():
+    """Сводка из кэша совпадает с прямым расчетом; изменение параметров меняет ключ"""
+    print("\n=== ТЕСТ КЭША СВОДКИ ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(directory)
+        calc = BusinessCalculator('optimistic', 'A', '1u_2u', overrides={'hotels_count': 75})
+        summary, payback = cached_financial_summary(calc, cache)
+        assert summary == calc.generate_financial_summary()
+        assert payback == calc.calculate_payback_period()
+
+        again, _ = cached_financial_summary(BusinessCalculator('optimistic', 'A', '1u_2u',
+                                                               overrides={'hotels_count': 75.0}), cache)
+        assert again == summary and cache.hits == 1
+
+        changed = BusinessCalculator('optimistic', 'A', '1u_2u', overrides={'hotels_count': 75})
+        changed.equipment_prices['adjusted_cost_usd'] *= 2
+        summary_changed, _ = cached_financial_summary(changed, cache)
+        assert cache.misses == 2
+        assert summary_changed['shiwa']['net_profit'] == changed.generate_financial_summary()['shiwa']['net_profit']
+        print(f"Прибыль SHIWA: {summary['shiwa']['net_profit']:,.0f} -> {summary_changed['shiwa']['net_profit']:,.0f}")
+
+def test_model_version_covers_model_sources():
+    """Изменение любого модуля модели (например, cashflow.py) делает записи кэша недостижимыми"""
+    print("\n=== ТЕСТ ВЕРСИИ МОДЕЛИ ===")
+
+    # В версию входят все модули проекта, которые (косвенно) импортируют калькуляторы
+    project = os.path.dirname(os.path.abspath(__file__))
+    local = {name[:-3] for name in os.listdir(project) if name.endswith('.py')}
+    imported, pending = set(), ['business_calculator', 'batch_calculator']
+    while pending:
+        module = pending.pop()
+        if module in imported:
+            continue
+        imported.add(module)
+        with open(os.path.join(project, module + '.py'), encoding='utf-8') as file:
+            for node in ast.walk(ast.parse(file.read())):
+                if isinstance(node, ast.Import):
+                    pending.extend(alias.name for alias in node.names if alias.name in local)
+                elif isinstance(node, ast.ImportFrom) and node.module in local:
+                    pending.append(node.module)
+    model_modules = {module + '.py' for module in imported} - {'result_cache.py', 'result_store.py'}
+    assert model_modules <= set(MODEL_SOURCE_FILES), model_modules - set(MODEL_SOURCE_FILES)
+
+    with tempfile.TemporaryDirectory() as directory:
+        sources = os.path.join(directory, 'sources')
+        os.makedirs(sources)
+        for name in MODEL_SOURCE_FILES:
+            shutil.copy(os.path.join(project, name), sources)
+        before = model_fingerprint(directory=sources)
+        with open(os.path.join(sources, 'cashflow.py'), 'a', encoding='utf-8') as file:
+            file.write("\n# изменение расчета денежного потока\n")
+        after = model_fingerprint(directory=sources)
+        assert before != after
+
+        calc = BusinessCalculator('baseline', 'A')
+        summary, _ = cached_financial_summary(calc, ResultCache(os.path.join(directory, 'cache'), model_version=before))
+        cache = ResultCache(os.path.join(directory, 'cache'), model_version=after)
+        assert cached_financial_summary(calc, cache)[0] == summary
+        assert cache.misses == 1 and cache.hits == 0
+        print(f"Версия модели: {before} -> {after}")
+
+def test_default_cache_is_opt_in(monkeypatch, tmp_path):
+    """Общий кэш включается только переменной QUANTUM_CACHE_DIR"""
+    print("\n=== ТЕСТ ВКЛЮЧЕНИЯ КЭША ===")
+
+    monkeypatch.delenv('QUANTUM_CACHE_DIR', raising=False)
+    assert default_cache() is None
+    monkeypatch.setenv('QUANTUM_CACHE_DIR', '')
+    assert default_cache() is None
+
+    monkeypatch.setenv('QUANTUM_CACHE_DIR', str(tmp_path / 'results'))
+    cache = default_cache()
+    assert cache is not None and cache.directory == str(tmp_path / 'results')
+    calc = BusinessCalculator('pessimistic', 'B')
+    assert cached_financial_summary(calc)[0] == calc.generate_financial_summary()
+    assert cache.stats()['entries'] == 1
+    print(f"Кэш: {cache.directory}")
@@ -0,0 +1,100 @@
+"""
+Тест хранилища результатов на диске
+"""
+
+import os
+import tempfile
+import numpy as np
+from result_store import create_store, open_store, model_fingerprint
+from sweep import run_sweep, open_sweep
+
+def test_append_and_reopen():
+    """Строки дописываются пакетами и читаются срезами после повторного открытия"""
+    print("=== ТЕСТ ДОПИСЫВАНИЯ И ОТКРЫТИЯ ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'results')
+        store = create_store(path, {'variant': ['A', 'B'], 'hotels_count': 'int32'}, ['shiwa_net_profit'],
+                             attributes={'source': 'test'})
+        assert len(store) == 0 and len(store['shiwa_net_profit']) == 0
+
+        rng = np.random.default_rng(0)
+        profit = rng.normal(size=1000)
+        for start in range(0, 1000, 300):
+            stop = min(start + 300, 1000)
+            store.append({'variant': np.where(np.arange(start, stop) % 2, 'B', 'A'),
+                          'hotels_count': np.arange(start, stop),
+                          'shiwa_net_profit': profit[start:stop]})
+        assert len(store) == 1000 and np.array_equal(store['shiwa_net_profit'], profit)
+
+        reopened = open_store(path)
+        assert len(reopened) == 1000
+        assert reopened.params == ['variant', 'hotels_count'] and reopened.metrics == ['shiwa_net_profit']
+        assert reopened.columns['hotels_count']['dtype'] == np.dtype('int32').str
+        assert reopened.model_version == model_fingerprint() and reopened.is_current()
+        assert reopened.attributes == {'source': 'test'}
+        assert isinstance(reopened['shiwa_net_profit'], np.memmap)
+
+        rows = reopened.read(10, 13, decode=True)
+        assert rows['variant'].tolist() == ['A', 'B', 'A']
+        assert rows['hotels_count'].tolist() == [10, 11, 12]
+        assert np.array_equal(rows['shiwa_net_profit'], profit[10:13])
+        print(f"Строк: {len(reopened)}, версия модели {reopened.model_version}")
+
+def test_interrupted_append_and_errors():
+    """Недописанный хвост отбрасывается; колонки проверяются по схеме"""
+    print("\n=== ТЕСТ ПРЕРВАННОЙ ЗАПИСИ ===")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'results')
+        store = create_store(path, {'scenario': ['baseline', 'optimistic']}, ['payback_months'])
+        store.append({'scenario': ['baseline', 'optimistic'], 'payback_months': [12.0, np.nan]})
+
+        # Данные записаны, а заголовок - нет (как при прерванной записи)
+        with open(os.path.join(path, 'payback_months.bin'), 'ab') as file:
+            file.write(np.arange(5, dtype=float).tobytes())
+        store = open_store(path)
+        assert len(store) == 2
+        store.append({'scenario': [1], 'payback_months': [7.0]})
+        assert np.array_equal(open_store(path)['payback_months'], [12.0, np.nan, 7.0], equal_nan=True)
+        assert os.path.getsize(os.path.join(path, 'payback_months.bin')) == 3 * 8
+
+        for columns in ({'scenario': ['baseline']},
+                        {'scenario': ['pessimistic'], 'payback_months': [1.0]},
+                        {'scenario': [2], 'payback_months': [1.0]},
+                        {'scenario': [0, 1], 'payback_months': [1.0]}):
+            try:
+                store.append(columns)
+                assert False, "Ожидалась ошибка"
+            except ValueError as e:
+                print(f"Ошибка: {e}")
+        try:
+            create_store(path, {}, ['payback_months'])
+            assert False, "Ожидалась ошибка"
+        except FileExistsError as e:
+            print(f"Ошибка: {e}")
+
+def test_sweep_store():
+    """Перебор с записью на диск совпадает с перебором в памяти"""
+    print("\n=== ТЕСТ ПЕРЕБОРА С ХРАНИЛИЩЕМ ===")
+
+    grids = {'hotels_count': [20, 50, 80], 'monthly_fee': np.array([400.0, 500.0])}
+    categories = {'scenario': ['baseline', 'pessimistic']}
+    columns = ('shiwa_net_profit', 'payback_months')
+    in_memory = run_sweep(grids, categories, columns, workers=1, chunk_size=50)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'cube')
+        stored = run_sweep(grids, categories, columns, workers=1, chunk_size=50, store=path)
+        assert stored['store'] == path
+        cube = open_sweep(path)
+        assert cube['shape'] == in_memory['shape']
+        assert cube['dimensions'] == {name: list(values) for name, values in in_memory['dimensions'].items()}
+        for name in columns:
+            assert np.array_equal(cube['columns'][name], in_memory['columns'][name], equal_nan=True)
+
+        store = open_store(path)
+        rows = store.read(decode=True)
+        index = np.unravel_index(np.arange(len(store)), cube['shape'])
+        assert rows['scenario'].tolist() == [cube['dimensions']['scenario'][i] for i in index[0]]
+        assert np.array_equal(rows['monthly_fee'], grids['monthly_fee'][index[-1]])
+        print(f"{len(store)} строк в {path}")
@@ -0,0 +1,101 @@
+"""
+Тест квазислучайных выборок и латинского гиперкуба
+"""
+
+import numpy as np
+from sampling import SOBOL_DIRECTIONS, LatinHypercube, Halton, SobolSequence, iter_samples
+from distributions import Uniform, range_distributions
+from batch_calculator import batch_inputs_from_config, calculate_batch
+from monte_carlo import run_monte_carlo
+from sobol import run_sobol
+
+def _is_primitive(degree, coefficients):
+    """Многочлен над GF(2) примитивен, если порядок x по модулю многочлена равен 2^s - 1"""
+    polynomial = (1 << degree) | (coefficients << 1) | 1
+    value, order = 1, 0
+    while True:
+        value <<= 1
+        if value >> degree:
+            value ^= polynomial
+        order += 1
+        if value == 1:
+            return order == 2 ** degree - 1
+
+def _stratified(points, n):
+    """По каждому измерению ровно одна точка в каждом из n интервалов"""
+    return all(len(np.unique(np.floor(points[:, j] * n))) == n for j in range(points.shape[1]))
+
+def test_sobol_sequence():
+    """Направляющие числа и стратификация последовательности Соболя"""
+    print("=== ТЕСТ ПОСЛЕДОВАТЕЛЬНОСТИ СОБОЛЯ ===")
+
+    for degree, coefficients, initial in SOBOL_DIRECTIONS:
+        assert _is_primitive(degree, coefficients)
+        assert len(initial) == degree
+        assert all(m % 2 == 1 and m < 2 ** (b + 1) for b, m in enumerate(initial))
+
+    points = SobolSequence(2, 8, scramble=False).points()
+    assert points.tolist() == [[0, 0], [0.5, 0.5], [0.75, 0.25], [0.25, 0.75],
+                               [0.375, 0.375], [0.875, 0.875], [0.625, 0.125], [0.125, 0.625]]
+
+    sampler = SobolSequence(21, 2 ** 12, seed=1)
+    assert _stratified(sampler.points(), 2 ** 12)
+    # Любой выровненный блок из 2^m точек также стратифицирован
+    assert _stratified(sampler.points(1024, 2048), 1024)
+    print("Направляющие числа корректны, выборка стратифицирована")
+
+def test_latin_hypercube_and_halton():
+    """Латинский гиперкуб стратифицирован при любом n, Холтон равномерен"""
+    print("\n=== ТЕСТ ЛАТИНСКОГО ГИПЕРКУБА И ХОЛТОНА ===")
+
+    for n in (1, 2, 3, 1000, 12345):
+        points = LatinHypercube(7, n, seed=n).points()
+        assert _stratified(points, n)
+        assert points.min() >= 0 and points.max() < 1
+
+    points = Halton(7, 3 ** 7, seed=1).points()
+    assert len(np.unique(np.floor(points[:, 1] * 3 ** 7))) == 3 ** 7
+    assert np.allclose(points.mean(axis=0), 0.5, atol=0.01)
+
+def test_chunks_independent():
+    """Результат не зависит от разбиения выборки на пакеты"""
+    print("\n=== ТЕСТ НЕЗАВИСИМОСТИ ОТ ПАКЕТОВ ===")
+
+    for sampler_class in (LatinHypercube, Halton, SobolSequence):
+        sampler = sampler_class(5, 10_000, seed=7)
+        chunks = np.concatenate([points for _, _, points in sampler.chunks(3_000)])
+        assert np.array_equal(sampler.points(), chunks)
+
+    distributions = range_distributions()
+    chunks = list(iter_samples(distributions, 10_000, 'lhs', seed=7, chunk_size=3_000))
+    assert [len(inputs['hotels_count']) for inputs in chunks] == [3_000, 3_000, 3_000, 1_000]
+    hotels = np.concatenate([inputs['hotels_count'] for inputs in chunks])
+    assert hotels.min() >= 30 and hotels.max() <= 75
+
+def test_quasi_monte_carlo_accuracy():
+    """Квазислучайная выборка оценивает среднее линейного показателя точнее случайной"""
+    print("\n=== ТЕСТ ТОЧНОСТИ КВАЗИ-МОНТЕ-КАРЛО ===")
+
+    distributions = {'hotels_count': Uniform(30, 75), 'monthly_fee': Uniform(400, 600)}
+    # Выручка SHIWA при аренде билинейна, поэтому среднее равно значению в центре
+    exact = calculate_batch(dict(batch_inputs_from_config(), hotels_count=52.5, monthly_fee=500))['shiwa_total_revenue']
+
+    errors = {}
+    for method in ('random', 'lhs', 'halton', 'sobol'):
+        result = run_monte_carlo(distributions, n_draws=2 ** 14, seed=3, workers=1, chunk_size=5_000,
+                                 method=method, metrics=('shiwa_total_revenue',))
+        errors[method] = abs(result['metrics']['shiwa_total_revenue']['mean'] / exact - 1)
+        print(f"  {method}: относительная ошибка среднего {errors[method]:.2e}")
+    assert errors['sobol'] < 1e-4 and errors['halton'] < 1e-3 and errors['lhs'] < 1e-3
+
+    # Индексы Соболя по квазислучайной выборке размерности 2k
+    result = run_sobol(distributions, n_samples=2 ** 13, seed=3, workers=1, method='sobol',
+                       metrics=('shiwa_total_revenue',))
+    indices = result['metrics']['shiwa_total_revenue']['indices']
+    assert indices['hotels_count']['first_order'] > indices['monthly_fee']['first_order'] > 0
+
+if __name__ == "__main__":
+    test_sobol_sequence()
+    test_latin_hypercube_and_halton()
+    test_chunks_independent()
+    test_quasi_monte_carlo_accuracy()
@@ -0,0 +1,63 @@
+"""
+Тест анализа чувствительности
+"""
+
+import numpy as np
+from business_calculator import BusinessCalculator
+from batch_calculator import batch_inputs_from_config, calculate_batch, SUMMARY_COLUMNS
+from sensitivity import derivatives, tornado, scan_parameter
+
+def test_derivatives_match_finite_differences():
+    """Производные за один проход совпадают с конечными разностями"""
+    print("=== ТЕСТ ПРОИЗВОДНЫХ ===")
+
+    inputs = batch_inputs_from_config('pessimistic', 'A', assembly_option='etecsa_assembly')
+    result = derivatives(inputs)
+
+    for name in result['inputs']:
+        step = 1e-6 * max(1.0, abs(inputs[name]))
+        up = calculate_batch(dict(inputs, **{name: inputs[name] + step}))
+        down = calculate_batch(dict(inputs, **{name: inputs[name] - step}))
+        for output in SUMMARY_COLUMNS:
+            finite = (up[output] - down[output]) / (2 * step)
+            if np.isfinite(finite):
+                assert np.isclose(result['derivatives'][output][name], finite, rtol=1e-5, atol=1e-6), (output, name)
+
+    # Прибыль SHIWA при аренде пропорциональна плате: эластичность выручки равна 1
+    rental = derivatives(batch_inputs_from_config('baseline', 'B'), ['shiwa_total_revenue'])
+    assert np.isclose(rental['elasticities']['shiwa_total_revenue']['monthly_fee'], 1.0)
+    print(f"Проверено {len(result['inputs'])} параметров × {len(SUMMARY_COLUMNS)} показателей")
+
+def test_equipment_cost_affects_results():
+    """Себестоимость оборудования влияет на результат (раньше писалась в неиспользуемый ключ)"""
+    print("\n=== ТЕСТ СЕБЕСТОИМОСТИ ОБОРУДОВАНИЯ ===")
+
+    inputs = batch_inputs_from_config('baseline', 'A')
+    columns = scan_parameter('equipment_cost', [800, 1154, 1800], inputs)
+    profits = columns['shiwa_net_profit']
+    assert not np.allclose(profits, profits[0])
+
+    # Значения перебора совпадают с отдельными расчетами калькулятора
+    fees = [300, 500, 700]
+    columns = scan_parameter('monthly_fee', fees, batch_inputs_from_config('baseline', 'B'))
+    for index, fee in enumerate(fees):
+        calc = BusinessCalculator('baseline', 'B', overrides={'monthly_fee': fee})
+        assert np.isclose(columns['shiwa_net_profit'][index], calc.generate_financial_summary()['shiwa']['net_profit'])
+
+def test_tornado_ranking():
+    """Торнадо упорядочено по размаху, линейная оценка точна для линейных параметров"""
+    print("\n=== ТЕСТ ДИАГРАММЫ ТОРНАДО ===")
+
+    result = tornado('shiwa_net_profit')
+    swings = [row['swing'] for row in result['rows']]
+    assert swings == sorted(swings, reverse=True)
+
+    rows = {row['parameter']: row for row in result['rows']}
+    assert np.isclose(rows['monthly_fee']['swing'], rows['monthly_fee']['linear_swing'])
+    assert rows['hotel_annual_benefit']['swing'] == 0
+    print(f"Самый влиятельный параметр: {result['rows'][0]['parameter']}")
+
+if __name__ == "__main__":
+    test_derivatives_match_finite_differences()
+    test_equipment_cost_affects_results()
+    test_tornado_ranking()
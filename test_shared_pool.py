@@ -0,0 +1,86 @@
+"""
+Тест пула процессов с общей памятью
+"""
+
+import numpy as np
+from multiprocessing import shared_memory
+from batch_calculator import SUMMARY_COLUMNS, batch_inputs_from_config, calculate_batch
+from shared_pool import SharedArrays, SharedMemoryPool, calculate_batch_shared, benchmark_transfer
+
+def _sample_inputs(size, seed=0):
+    rng = np.random.default_rng(seed)
+    inputs = batch_inputs_from_config('optimistic', 'A')
+    inputs['hotels_count'] = rng.integers(10, 200, size)
+    inputs['monthly_fee'] = rng.uniform(300, 700, size)
+    inputs['is_sale'] = rng.random(size) < 0.5
+    return inputs
+
+def test_shared_pool_matches_batch():
+    """Результаты пула совпадают с calculate_batch при любом числе процессов"""
+    print("=== ТЕСТ ПУЛА С ОБЩЕЙ ПАМЯТЬЮ ===")
+
+    inputs = _sample_inputs(5_000)
+    expected = calculate_batch(inputs)
+    with SharedMemoryPool(2) as pool:
+        shared = pool.calculate_batch(inputs, chunk_size=700)
+        pickled = pool.calculate_batch_pickled(inputs, chunk_size=700)
+        segment = pool._workspace._segments['results'].name
+
+        # Рабочая область используется повторно, если ее размера хватает
+        subset = pool.calculate_batch(inputs, columns=('shiwa_net_profit',), chunk_size=1_000,
+                                      hotels_count=inputs['hotels_count'][:100].reshape(10, 10),
+                                      monthly_fee=400, is_sale=False)
+        assert pool._workspace._segments['results'].name == segment
+    for name in SUMMARY_COLUMNS:
+        assert np.array_equal(shared[name], expected[name], equal_nan=True), name
+        assert np.array_equal(pickled[name], expected[name], equal_nan=True), name
+    assert subset['shiwa_net_profit'].shape == (10, 10)
+    direct = calculate_batch(inputs, hotels_count=inputs['hotels_count'][:100].reshape(10, 10),
+                             monthly_fee=400, is_sale=False)
+    assert np.array_equal(subset['shiwa_net_profit'], direct['shiwa_net_profit'])
+
+    # Сегменты удалены после закрытия пула
+    try:
+        shared_memory.SharedMemory(name=segment)
+        assert False, "Сегмент не удален"
+    except FileNotFoundError:
+        pass
+
+    serial = calculate_batch_shared(inputs, workers=1, chunk_size=700)
+    assert np.array_equal(serial['payback_months'], expected['payback_months'], equal_nan=True)
+    print(f"Строк: {len(inputs['hotels_count'])}")
+
+def test_shared_arrays_lifecycle():
+    """Сегменты набора удаляются при выходе из with и при сборке мусора"""
+    print("\n=== ТЕСТ ЖИЗНЕННОГО ЦИКЛА СЕГМЕНТОВ ===")
+
+    with SharedArrays() as arrays:
+        values = arrays.put('x', np.arange(10.0))
+        assert arrays.reserve('x', 5) is not values and arrays.spec()['x'][1] == 10
+        larger = arrays.reserve('x', 20)
+        assert len(larger) == 20
+        name = arrays.spec()['x'][0]
+        del values, larger
+    try:
+        shared_memory.SharedMemory(name=name)
+        assert False, "Сегмент не удален"
+    except FileNotFoundError:
+        pass
+
+    arrays = SharedArrays()
+    arrays.put('y', np.ones(3))
+    name = arrays.spec()['y'][0]
+    del arrays
+    try:
+        shared_memory.SharedMemory(name=name)
+        assert False, "Сегмент не удален"
+    except FileNotFoundError:
+        pass
+
+def test_benchmark_transfer():
+    """Сравнение с pickle возвращает согласованные результаты"""
+    print("\n=== ТЕСТ ЗАМЕРА ===")
+
+    result = benchmark_transfer(size=20_000, workers=2, chunk_size=5_000, repeats=1)
+    assert result['rows'] == 20_000 and result['shared_seconds'] > 0 and result['pickled_seconds'] > 0
+    print(f"Ускорение: {result['speedup']:.2f}x")
@@ -0,0 +1,52 @@
+"""
+Тест индексов Соболя
+"""
+
+import numpy as np
+from sobol import run_sobol, print_sobol_report
+from distributions import Uniform
+
+def test_additive_model():
+    """Прибыль SHIWA линейна по затратам SHIWA и не зависит от затрат ETECSA"""
+    print("=== ТЕСТ АДДИТИВНОЙ МОДЕЛИ ===")
+
+    result = run_sobol({'shiwa_costs_rub': Uniform(3_500_000, 5_500_000),
+                        'etecsa_fixed_costs': Uniform(30_000, 60_000)},
+                       n_samples=20_000, seed=1, workers=1, metrics=('shiwa_net_profit',))
+    indices = result['metrics']['shiwa_net_profit']['indices']
+    assert np.isclose(indices['shiwa_costs_rub']['first_order'], 1, atol=0.02)
+    assert np.isclose(indices['shiwa_costs_rub']['total'], 1, atol=0.02)
+    assert indices['etecsa_fixed_costs']['total'] == 0
+    low, high = indices['shiwa_costs_rub']['first_order_ci']
+    assert low <= indices['shiwa_costs_rub']['first_order'] <= high
+
+def test_interaction_model():
+    """Для произведения X1 * X2 равномерных величин индексы известны аналитически"""
+    print("\n=== ТЕСТ МОДЕЛИ С ВЗАИМОДЕЙСТВИЕМ ===")
+
+    # Выручка SHIWA при аренде = отели × плата × доля × 12; для U(0, 1) × U(0, 1):
+    # S1 = 3/7 для каждого множителя, ST = 4/7
+    result = run_sobol({'hotels_count': Uniform(0, 1), 'monthly_fee': Uniform(0, 1)},
+                       n_samples=100_000, seed=2, workers=1, metrics=('shiwa_total_revenue',))
+    indices = result['metrics']['shiwa_total_revenue']['indices']
+    for name in ['hotels_count', 'monthly_fee']:
+        assert np.isclose(indices[name]['first_order'], 3 / 7, atol=0.03)
+        assert np.isclose(indices[name]['total'], 4 / 7, atol=0.03)
+        assert indices[name]['total_ci'][0] < 4 / 7 < indices[name]['total_ci'][1]
+
+def test_default_ranges_and_workers():
+    """Индексы по диапазонам parameters.py не зависят от числа процессов"""
+    print("\n=== ТЕСТ ДИАПАЗОНОВ ПО УМОЛЧАНИЮ ===")
+
+    serial = run_sobol(n_samples=10_000, seed=3, chunk_size=2_500, workers=1)
+    parallel = run_sobol(n_samples=10_000, seed=3, chunk_size=2_500, workers=2)
+    assert serial['metrics'] == parallel['metrics']
+
+    ranked = max(serial['metrics']['shiwa_net_profit']['indices'].items(), key=lambda item: item[1]['total'])
+    assert ranked[0] == 'hotels_count'
+    print_sobol_report(serial)
+
+if __name__ == "__main__":
+    test_additive_model()
+    test_interaction_model()
+    test_default_ranges_and_workers()
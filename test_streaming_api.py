@@ -0,0 +1,73 @@
+"""
+Тест потоковых ответов анализа (NDJSON и Server-Sent Events)
+"""
+
+import json
+from app import app, STREAM_CHUNK_ROWS
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+def _sse(response):
+    events = []
+    for block in response.get_data(as_text=True).strip().split('\n\n'):
+        kind, data = block.split('\n')
+        events.append((kind[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+def test_sensitivity_stream():
+    """Строки потока совпадают с обычным ответом; первая строка отправляется сразу"""
+    print("=== ТЕСТ ПОТОКА ЧУВСТВИТЕЛЬНОСТИ ===")
+
+    client = app.test_client()
+    body = {'parameter': 'hotels_count', 'values': list(range(10, 10 + 3 * STREAM_CHUNK_ROWS)), 'variant': 'A'}
+    expected = client.post('/api/sensitivity', json=body).get_json()['data']['results']
+
+    response = client.post('/api/sensitivity/stream', json=body, buffered=False)
+    assert response.mimetype == 'application/x-ndjson'
+    first = json.loads(next(iter(response.response)))
+    assert first == {'type': 'row', 'data': expected[0]}
+    response.close()
+
+    events = _ndjson(client.post('/api/sensitivity/stream', json=body))
+    assert [event['data'] for event in events if event['type'] == 'row'] == expected
+    progress = [event['data']['done'] for event in events if event['type'] == 'progress']
+    assert progress == sorted(progress) and progress[-1] == len(expected)
+    assert max(b - a for a, b in zip([0] + progress, progress)) == STREAM_CHUNK_ROWS
+    assert events[-1]['type'] == 'done' and events[-1]['data']['rows'] == len(expected)
+    print(f"Событий: {len(events)}, прогресс: {progress[:5]}...")
+
+def test_sensitivity_whole_hotels():
+    """Дробное количество отелей рассчитывается как целое"""
+    print("\n=== ТЕСТ ЦЕЛОГО КОЛИЧЕСТВА ОТЕЛЕЙ ===")
+
+    client = app.test_client()
+    fractional = client.post('/api/sensitivity', json={'parameter': 'hotels_count', 'values': [10.6]}).get_json()
+    whole = client.post('/api/sensitivity', json={'parameter': 'hotels_count', 'values': [10]}).get_json()
+    row = fractional['data']['results'][0]
+    assert row['value'] == 10.6
+    assert dict(row, value=10) == whole['data']['results'][0]
+    print(row)
+
+def test_compare_stream_sse_and_errors():
+    """Формат SSE по параметру и по заголовку Accept; ошибки до и во время потока"""
+    print("\n=== ТЕСТ ПОТОКА СРАВНЕНИЯ ===")
+
+    client = app.test_client()
+    scenarios = [{'scenario': 'baseline', 'variant': 'A'}, {'scenario': 'optimistic', 'variant': 'B'}]
+    expected = client.post('/api/compare', json={'scenarios': scenarios}).get_json()['data']
+
+    for url, headers in (('/api/compare/stream?format=sse', {}),
+                         ('/api/compare/stream', {'Accept': 'text/event-stream'})):
+        response = client.post(url, json={'scenarios': scenarios}, headers=headers)
+        assert response.mimetype == 'text/event-stream'
+        events = _sse(response)
+        assert [kind for kind, _ in events] == ['row', 'progress', 'row', 'progress', 'done']
+        assert [data['scenario'] for kind, data in events if kind == 'row'] == [row['scenario'] for row in expected]
+
+    assert client.post('/api/sensitivity/stream', json={'parameter': 'hotel_count', 'values': [1]}).status_code == 400
+    assert client.post('/api/compare/stream?format=xml', json={'scenarios': scenarios}).status_code == 400
+
+    events = _ndjson(client.post('/api/compare/stream', json={'scenarios': scenarios + ['baseline']}))
+    assert [event['type'] for event in events] == ['row', 'progress', 'row', 'progress', 'error']
+    print(f"Ошибка в потоке: {events[-1]['data']['error']}")
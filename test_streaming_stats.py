@@ -0,0 +1,99 @@
+"""
+Тест потоковой статистики
+"""
+
+import pickle
+import numpy as np
+from streaming_stats import RunningMoments, QuantileSketch, FixedHistogram, StreamingStatistics, summarize_columns
+from sampling import iter_samples
+from distributions import default_distributions
+from batch_calculator import batch_inputs_from_config, calculate_batch
+from monte_carlo import run_monte_carlo
+
+def test_moments_and_histogram_merge():
+    """Объединение частичных результатов совпадает с расчетом по всем значениям"""
+    print("=== ТЕСТ ОБЪЕДИНЕНИЯ МОМЕНТОВ И ГИСТОГРАММ ===")
+
+    rng = np.random.default_rng(0)
+    values = rng.normal(1e6, 2e5, 100_000)
+    parts = np.array_split(values, 7)
+
+    moments = RunningMoments()
+    histogram = FixedHistogram(0, 2e6, 40)
+    for part in parts:
+        moments.merge(RunningMoments().update(part))
+        histogram.merge(FixedHistogram(0, 2e6, 40).update(part))
+
+    assert moments.count == len(values)
+    assert np.isclose(moments.mean, values.mean(), rtol=1e-12)
+    assert np.isclose(moments.std, values.std(), rtol=1e-10)
+    assert moments.min == values.min() and moments.max == values.max()
+    assert histogram.counts.tolist() == np.histogram(values, bins=histogram.edges)[0].tolist()
+    assert histogram.counts.sum() + histogram.underflow + histogram.overflow == len(values)
+
+def test_quantile_sketch_accuracy():
+    """Квантили скетча отличаются от точных не более чем на относительную точность"""
+    print("\n=== ТЕСТ ТОЧНОСТИ СКЕТЧА КВАНТИЛЕЙ ===")
+
+    rng = np.random.default_rng(1)
+    values = np.concatenate([rng.normal(-5e4, 3e4, 50_000), rng.lognormal(12, 1, 50_000), np.zeros(1000)])
+    q = np.array([0.001, 0.05, 0.25, 0.5, 0.75, 0.95, 0.999])
+
+    sketch = QuantileSketch(relative_accuracy=0.001)
+    for part in np.array_split(rng.permutation(values), 10):
+        sketch.merge(pickle.loads(pickle.dumps(QuantileSketch(0.001).update(part))))
+
+    exact = np.quantile(values, q, method='lower')
+    estimate = sketch.quantiles(q)
+    assert np.all(np.abs(estimate - exact) <= 0.001 * np.abs(exact) + 1e-12)
+    assert sketch.count == len(values)
+    for quantile, e, a in zip(q, exact, estimate):
+        print(f"  q = {quantile}: точно {e:,.2f}, скетч {a:,.2f}")
+
+def test_streaming_summary_of_batches():
+    """Статистика по потоку пакетов calculate_batch при ограниченной памяти"""
+    print("\n=== ТЕСТ ПОТОКОВОЙ СТАТИСТИКИ ПАКЕТОВ ===")
+
+    base = batch_inputs_from_config()
+    samples = iter_samples(default_distributions(), 400_000, 'lhs', seed=2, chunk_size=50_000)
+    batches = (calculate_batch(dict(base, **inputs)) for inputs in samples)
+    statistics = summarize_columns(batches, ['shiwa_net_profit', 'payback_months'],
+                                   histogram_ranges={'payback_months': (0, 36)})
+
+    profit = statistics['shiwa_net_profit']
+    assert profit.total == 400_000
+    assert len(profit.sketch.positive.counts) + len(profit.sketch.negative.counts) < 20_000
+    summary = profit.summary()
+    assert sum(summary['histogram']['counts']) == 400_000
+    assert summary['percentiles']['p5'] < summary['percentiles']['p50'] < summary['percentiles']['p95']
+
+    payback = statistics['payback_months'].summary()
+    assert len(payback['histogram']['edges']) == 51 and payback['histogram']['edges'][-1] == 36
+    print(f"Прибыль SHIWA: P5 ${summary['percentiles']['p5']:,.0f}, P95 ${summary['percentiles']['p95']:,.0f}")
+
+def test_monte_carlo_percentiles():
+    """Процентили Монте-Карло совпадают с точными в пределах точности скетча"""
+    print("\n=== ТЕСТ ПРОЦЕНТИЛЕЙ МОНТЕ-КАРЛО ===")
+
+    distributions = default_distributions()
+    result = run_monte_carlo(distributions, n_draws=100_000, seed=4, workers=1, chunk_size=30_000,
+                             method='sobol', metrics=('shiwa_net_profit',), percentiles=(5, 50, 95))
+
+    # Точные процентили по независимой выборке того же размера
+    base = batch_inputs_from_config()
+    values = np.concatenate([calculate_batch(dict(base, **inputs))['shiwa_net_profit']
+                             for inputs in iter_samples(distributions, 100_000, 'sobol', seed=5)])
+    stats = result['metrics']['shiwa_net_profit']
+    for p in (5, 50, 95):
+        assert np.isclose(stats['percentiles'][f'p{p}'], np.percentile(values, p), rtol=0.01)
+    assert np.isclose(stats['mean'], values.mean(), rtol=1e-3)
+
+    parallel = run_monte_carlo(distributions, n_draws=100_000, seed=4, workers=2, chunk_size=30_000,
+                               method='sobol', metrics=('shiwa_net_profit',), percentiles=(5, 50, 95))
+    assert parallel['metrics'] == result['metrics']
+
+if __name__ == "__main__":
+    test_moments_and_histogram_merge()
+    test_quantile_sketch_accuracy()
+    test_streaming_summary_of_batches()
+    test_monte_carlo_percentiles()
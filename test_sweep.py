@@ -0,0 +1,91 @@
+"""
+Тест перебора пространства конфигураций
+"""
+
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from business_calculator import BusinessCalculator
+from parallel import thread_safe_context
+from sweep import run_sweep, save_sweep, load_sweep, SWEEP_CATEGORIES
+
+def test_sweep_matches_calculator():
+    """Ячейки куба совпадают с расчетом BusinessCalculator"""
+    print("=== ТЕСТ СОГЛАСОВАННОСТИ КУБА ===")
+
+    hotels = [20, 50, 80]
+    result = run_sweep(grids={'hotels_count': hotels, 'monthly_fee': [400, 500]}, workers=1, chunk_size=100)
+    expected_shape = tuple(len(values) for values in SWEEP_CATEGORIES.values()) + (3, 2)
+    assert result['shape'] == expected_shape
+    assert result['rows'] == int(np.prod(expected_shape))
+
+    rng = np.random.default_rng(0)
+    for flat_index in rng.choice(result['rows'], 40, replace=False):
+        index = np.unravel_index(flat_index, result['shape'])
+        config = {name: values[i] for (name, values), i in zip(result['dimensions'].items(), index)}
+        calc = BusinessCalculator(config['scenario'], config['variant'], config['equipment_type'],
+                                  config['assembly_option'], config['assembly_variant'],
+                                  overrides={'hotels_count': config['hotels_count'],
+                                             'monthly_fee': config['monthly_fee']})
+        summary = calc.generate_financial_summary()
+        assert np.isclose(result['columns']['shiwa_net_profit'][index], summary['shiwa']['net_profit'])
+        assert np.isclose(result['columns']['etecsa_net_profit'][index], summary['etecsa']['net_profit'])
+    print(f"{result['rows']} строк за {result['elapsed_seconds']:.3f} с")
+
+def test_sweep_workers_and_storage():
+    """Результат не зависит от числа процессов и сохраняется в столбцовом виде"""
+    print("\n=== ТЕСТ ПРОЦЕССОВ И СОХРАНЕНИЯ ===")
+
+    grids = {'rub_to_usd_rate': np.linspace(70, 100, 7)}
+    categories = {'scenario': ['baseline'], 'variant': ['A', 'B']}
+    columns = ('shiwa_net_profit', 'payback_months')
+    serial = run_sweep(grids, categories, columns, workers=1, chunk_size=10)
+    parallel = run_sweep(grids, categories, columns, workers=2, chunk_size=10)
+    for name in columns:
+        assert np.array_equal(serial['columns'][name], parallel['columns'][name], equal_nan=True)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'cube.npz')
+        save_sweep(serial, path)
+        loaded = load_sweep(path)
+    assert loaded['shape'] == serial['shape']
+    assert loaded['dimensions']['variant'] == ['A', 'B']
+    assert np.array_equal(loaded['columns']['shiwa_net_profit'], serial['columns']['shiwa_net_profit'])
+
+def test_sweep_pool_from_thread():
+    """Пул процессов, созданный из фонового потока, запускается через forkserver/spawn"""
+    print("\n=== ТЕСТ ПУЛА ИЗ ПОТОКА ===")
+
+    grids = {'hotels_count': np.arange(10, 40)}
+    categories = {'scenario': ['baseline'], 'variant': ['B']}
+    context = thread_safe_context()
+    assert context.get_start_method() in ('forkserver', 'spawn')
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        threaded = executor.submit(run_sweep, grids, categories, ('shiwa_net_profit',), workers=2, chunk_size=10,
+                                   mp_context=context).result(timeout=120)
+    serial = run_sweep(grids, categories, ('shiwa_net_profit',), workers=1)
+    assert np.array_equal(threaded['columns']['shiwa_net_profit'], serial['columns']['shiwa_net_profit'])
+    print(f"Способ запуска: {context.get_start_method()}, процессов: {threaded['workers']}")
+
+def test_sweep_rejects_unknown_inputs():
+    """Неизвестные параметры сетки отклоняются"""
+    try:
+        run_sweep(grids={'hotel_count': [10]})
+        assert False, "Ожидалась ошибка"
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+
+    # Неизвестные значения категорий не заменяются значениями по умолчанию
+    for categories in ({'variant': ['A', 'Z']}, {'equipment_type': ['bogus']}, {'region': ['havana']}):
+        try:
+            run_sweep(grids={'hotels_count': [10]}, categories=categories)
+            assert False, "Ожидалась ошибка"
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+
+if __name__ == "__main__":
+    test_sweep_matches_calculator()
+    test_sweep_workers_and_storage()
+    test_sweep_pool_from_thread()
+    test_sweep_rejects_unknown_inputs()